@@ -0,0 +1,190 @@
+"""
+端到端基准测试：启动本地夹具网站（fixture_site.py），用真实的 main_worker 流程抓取，
+报告吞吐量（URL/分钟）、单URL耗时 p50/p95、传输字节数和峰值内存。全程离线。
+
+用法::
+
+    python benchmarks/bench_e2e.py --policies 20 --threads 3
+    python benchmarks/bench_e2e.py --processes 4 --chromedriver /usr/local/bin/chromedriver
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e-<sha>.json
+    python benchmarks/bench_e2e.py --oecd-policies 20                     # OECD.ai 式页面走站点适配器
+    python benchmarks/bench_e2e.py --oecd-policies 20 --no-site-adapters  # 对照：同样的页面用浏览器渲染
+
+需要本机安装 Chrome 和 chromedriver（页面由真实浏览器渲染）。结果按 git 提交保存到
+benchmarks/results/e2e-<sha>[-dirty].json，便于跨提交比较。
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+from fixture_site import FixtureSite  # noqa: E402
+
+RESULTS_DIR = BENCH_DIR / "results"
+COMPARED_METRICS = ["urls_per_min", "latency_p50_s", "latency_p95_s", "success_rate", "bytes_sent_mb", "peak_rss_mb"]
+
+def git_revision() -> dict:
+    """当前提交及工作区是否有未提交修改"""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"sha": git("rev-parse", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+class RssSampler:
+    """后台采样本进程及其子进程（Chrome、工作进程）的总内存，记录峰值"""
+
+    def __init__(self, engine, interval: float = 0.5):
+        self.engine = engine
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, self.engine.process_tree_rss_mb(os.getpid()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def configure_engine(engine, args, work_dir: Path) -> None:
+    """把输出、缓存目录指向临时目录，并去掉与吞吐量无关的人为延迟"""
+    config = engine.Config
+    config.SAVE_DIR = work_dir / "texts"
+    config.PDF_SAVE_DIR = work_dir / "pdfs"
+    config.TEMP_DIR = work_dir / "temp"
+    config.PAGE_CACHE_PATH = work_dir / "page_cache.sqlite3"
+    for path in [config.SAVE_DIR, config.PDF_SAVE_DIR, config.TEMP_DIR]:
+        path.mkdir(parents=True, exist_ok=True)
+    config.ENABLE_PAGE_CACHE = args.cache
+    config.RANDOM_DELAY_MIN = config.RANDOM_DELAY_MAX = 0
+    config.MAX_THREADS = args.threads
+    config.WORKER_PROCESSES = args.processes
+    config.MAX_NAVIGATION_DEPTH = args.depth
+    config.ENABLE_SITE_ADAPTERS = args.site_adapters
+    config.SITE_ADAPTERS = ["oecd"]  # 默认不启用，基准测试在夹具网站上启用
+    config.SITE_ADAPTER_EXTRA_DOMAINS = {"oecd": ["127.0.0.1"]}  # 夹具网站代替 oecd.ai
+    if args.chromedriver:
+        config.CHROMEDRIVER_PATHS = [args.chromedriver] + config.CHROMEDRIVER_PATHS
+    if not args.polite:
+        # 所有页面都来自同一个本地主机，默认取消按主机限速，测量的是流水线本身的吞吐量
+        config.PER_HOST_MAX_CONCURRENCY, config.PER_HOST_MIN_INTERVAL = 1000, 0
+        engine.host_politeness = engine.HostPoliteness(config.PER_HOST_MAX_CONCURRENCY, config.PER_HOST_MIN_INTERVAL)
+
+def run_benchmark(args) -> dict:
+    import pandas as pd
+    import crawler_engine as engine
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench-e2e-"))
+    try:
+        configure_engine(engine, args, work_dir)
+        with FixtureSite(policies=args.policies, slow_delay=args.slow_delay, oecd_policies=args.oecd_policies) as site, \
+                RssSampler(engine) as sampler:
+            df = pd.DataFrame({"url": site.input_urls()})
+            df["编号"] = range(1, len(df) + 1)
+            start = time.time()
+            results = engine.main_worker(df, "url", len(df), start)
+            wall = time.time() - start
+            bytes_sent, requests_served = site.bytes_sent, site.requests_served
+    finally:
+        engine.shutdown_process_pool()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    latencies = sorted(r.get("处理时间(秒)", 0) for r in results if not r.get("结果复用自"))
+    succeeded = [r for r in results if str(r.get("处理状态", "")).startswith("成功")]
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "label": args.label,
+        "git": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: getattr(args, k) for k in ["policies", "oecd_policies", "threads", "processes", "depth",
+                                                  "slow_delay", "cache", "polite", "site_adapters"]},
+        "metrics": {
+            "urls": len(results),
+            "wall_s": round(wall, 2),
+            "urls_per_min": round(len(results) / wall * 60, 2) if wall else 0,
+            "latency_p50_s": round(percentile(latencies, 50), 2),
+            "latency_p95_s": round(percentile(latencies, 95), 2),
+            "success_rate": round(len(succeeded) / len(results), 3) if results else 0,
+            "bytes_sent_mb": round(bytes_sent / 1024 / 1024, 3),
+            "http_requests": requests_served,
+            "peak_rss_mb": round(max(sampler.peak_mb, self_rss), 1),
+        },
+        "statuses": {status: sum(1 for r in results if r.get("处理状态") == status)
+                     for status in sorted({r.get("处理状态", "") for r in results})},
+    }
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    metrics = report["metrics"]
+    print("=" * 60)
+    print(f"📊 端到端基准 @ {report['git']['sha'][:10]}{' (dirty)' if report['git']['dirty'] else ''}")
+    for name, value in metrics.items():
+        line = f"   {name:<16}{value:>12}"
+        if baseline and name in COMPARED_METRICS and baseline["metrics"].get(name):
+            old = baseline["metrics"][name]
+            line += f"   (基线 {old}, {(value - old) / old * 100:+.1f}%)"
+        print(line)
+    print(f"   处理状态: {report['statuses']}")
+    print("=" * 60)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线端到端吞吐量基准测试")
+    parser.add_argument("--policies", type=int, default=20, help="夹具网站的政策数量（决定输入URL数量）")
+    parser.add_argument("--oecd-policies", type=int, default=0, help="额外加入的 OECD.ai 式政策页面数量")
+    parser.add_argument("--no-site-adapters", dest="site_adapters", action="store_false",
+                        help="禁用站点适配器（OECD.ai 式页面也用浏览器渲染）")
+    parser.add_argument("--threads", type=int, default=3, help="线程池模式的并发数")
+    parser.add_argument("--processes", type=int, default=0, help="多进程模式的工作进程数（0 表示线程池模式）")
+    parser.add_argument("--depth", type=int, default=2, help="导航深度")
+    parser.add_argument("--slow-delay", type=float, default=3.0, help="慢速页面的响应延迟（秒）")
+    parser.add_argument("--cache", action="store_true", help="启用页面缓存（使用新的临时缓存库）")
+    parser.add_argument("--polite", action="store_true", help="保留按主机限速设置")
+    parser.add_argument("--chromedriver", help="chromedriver 路径（优先于 Config.CHROMEDRIVER_PATHS）")
+    parser.add_argument("--label", default="", help="结果标签")
+    parser.add_argument("--output", help="结果JSON路径（默认 benchmarks/results/e2e-<sha>.json）")
+    parser.add_argument("--compare", help="与之前保存的结果JSON比较")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    print_report(report, baseline)
+
+    git = report["git"]
+    output = Path(args.output) if args.output else RESULTS_DIR / f"e2e-{git['sha'][:10]}{'-dirty' if git['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"💾 结果已保存到: {output}")
+
+if __name__ == "__main__":
+    main()
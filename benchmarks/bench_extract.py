@@ -0,0 +1,192 @@
+"""
+文本提取基准测试：在可复现的合成语料上测量 extract_pdf_text_robust、extract_html_text、
+extract_xml_text 和 clean_text_for_csv 的速度（页/秒、MB/秒）、峰值内存和输出大小。
+
+语料（首次运行时生成到 --corpus 目录，之后复用）：
+    pdf-text-<N>p         纯文本PDF，1 ~ 1000 页
+    pdf-table-<N>p        表格为主的PDF
+    pdf-multicolumn-<N>p  双栏排版PDF
+    pdf-image-<N>p        只有图片、没有文字层的PDF（扫描件）
+    html-<K>kb            合成政策页面
+    xml-<K>kb             合成XML文档
+
+用法::
+
+    python benchmarks/bench_extract.py
+    python benchmarks/bench_extract.py --max-pages 100 --configs pdfplumber html-selectolax
+    python benchmarks/bench_extract.py --output extract.json
+
+每个 (提取配置, 语料) 组合在独立子进程中运行，峰值内存为提取阶段 ru_maxrss 的增量。
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+from bench_html_parse import _max_rss_mb, generate_synthetic_page  # noqa: E402
+from synthetic_pdf import WORDS, generate_pdf  # noqa: E402
+
+# (类型, 每个文件的页数, 文件数)
+PDF_CORPUS = [
+    ("text", 1, 20), ("text", 10, 5), ("text", 100, 2), ("text", 1000, 1),
+    ("table", 10, 3), ("table", 100, 1),
+    ("multicolumn", 10, 3), ("multicolumn", 100, 1),
+    ("image", 5, 2),
+]
+HTML_CORPUS = [(100, 10), (800, 3)]  # (KB, 文件数)
+XML_CORPUS = [(100, 10), (2000, 2)]
+CLEAN_TEXT_MB = 20
+
+def generate_xml(size_kb: int, seed: int) -> str:
+    rng = random.Random(seed)
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<policies>']
+    size = 0
+    i = 0
+    while size < size_kb * 1024:
+        block = (f'<policy id="{i}"><title>{rng.choice(WORDS)} {rng.choice(WORDS)}</title>'
+                 f"<body>{' '.join(rng.choice(WORDS) for _ in range(80))}</body></policy>\n")
+        parts.append(block)
+        size += len(block)
+        i += 1
+    parts.append("</policies>")
+    return "".join(parts)
+
+def corpus_cases(max_pages: int) -> dict:
+    """语料名称 -> {'kind', 'files': [(文件名, 页数)]}"""
+    cases = {}
+    for kind, pages, count in PDF_CORPUS:
+        if pages <= max_pages:
+            cases[f"pdf-{kind}-{pages}p"] = {"kind": "pdf", "files": [(f"{kind}-{pages}p-{i}.pdf", pages) for i in range(count)]}
+    for size_kb, count in HTML_CORPUS:
+        cases[f"html-{size_kb}kb"] = {"kind": "html", "files": [(f"page-{size_kb}kb-{i}.html", 1) for i in range(count)]}
+    for size_kb, count in XML_CORPUS:
+        cases[f"xml-{size_kb}kb"] = {"kind": "xml", "files": [(f"doc-{size_kb}kb-{i}.xml", 1) for i in range(count)]}
+    cases[f"text-{CLEAN_TEXT_MB}mb"] = {"kind": "text", "files": [(f"raw-{CLEAN_TEXT_MB}mb.txt", 1)]}
+    return cases
+
+def ensure_corpus(corpus_dir: Path, cases: dict) -> None:
+    """生成缺失的语料文件（内容由文件名确定，可复现）"""
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    for name, case in cases.items():
+        for file_name, pages in case["files"]:
+            path = corpus_dir / file_name
+            if path.exists():
+                continue
+            seed = sum(file_name.encode())
+            if case["kind"] == "pdf":
+                path.write_bytes(generate_pdf(file_name.split("-")[0], pages=pages, seed=seed))
+            elif case["kind"] == "html":
+                path.write_text(generate_synthetic_page(int(file_name.split("-")[1][:-2]), seed), encoding="utf-8")
+            elif case["kind"] == "xml":
+                path.write_text(generate_xml(int(file_name.split("-")[1][:-2]), seed), encoding="utf-8")
+            else:
+                rng = random.Random(seed)
+                lines = []
+                size = 0
+                while size < CLEAN_TEXT_MB * 1024 * 1024:
+                    line = " ".join(rng.choice(WORDS) for _ in range(14)) + rng.choice(["\n", "\r\n", "\t\"quoted\"\n", "\x0c\n"])
+                    lines.append(line)
+                    size += len(line)
+                path.write_text("".join(lines), encoding="utf-8")
+            print(f"🧪 生成语料 {file_name} ({path.stat().st_size / 1024:.0f}KB)", file=sys.stderr)
+
+def extractor_configs(engine) -> dict:
+    """提取配置名称 -> (适用的语料类型, 配置函数)"""
+    configs = {"pdfplumber": ("pdf", None), "xml-bs4": ("xml", None), "clean_text_for_csv": ("text", None)}
+    for backend in engine.available_html_backends():
+        configs[f"html-{backend}"] = ("html", backend)
+    return configs
+
+def run_worker(args) -> None:
+    """子进程：测量一个 (提取配置, 语料) 组合，结果以JSON输出到stdout"""
+    import crawler_engine as engine
+
+    engine.Config.PARSE_PROCESS_WORKERS = 0  # 只测量提取本身，不经过进程池
+    kind, backend = extractor_configs(engine)[args.worker]
+    if backend:
+        engine.Config.HTML_PARSER_BACKEND = backend
+    extract = {
+        "pdf": engine.extract_pdf_text_robust,
+        "html": engine.extract_html_text,
+        "xml": engine.extract_xml_text,
+        "text": lambda path: engine.clean_text_for_csv(path.read_text(encoding="utf-8")),
+    }[kind]
+
+    files = [(Path(args.corpus) / name, pages) for name, pages in corpus_cases(args.max_pages)[args.case]["files"]]
+    extract(files[0][0])  # 预热（导入、首次分配）
+    baseline_mb = _max_rss_mb()
+
+    elapsed, output_chars, failures = 0.0, 0, 0
+    for _ in range(args.repeat):
+        for path, _pages in files:
+            start = time.perf_counter()
+            text = extract(path)
+            elapsed += time.perf_counter() - start
+            output_chars += len(text)
+            failures += text.startswith(("[ERROR]", "[WARNING]"))
+
+    runs = args.repeat * len(files)
+    pages = args.repeat * sum(p for _, p in files)
+    input_mb = args.repeat * sum(path.stat().st_size for path, _ in files) / (1024 * 1024)
+    print(json.dumps({
+        "config": args.worker,
+        "case": args.case,
+        "files": len(files),
+        "pages_per_sec": pages / elapsed,
+        "mb_per_sec": input_mb / elapsed,
+        "ms_per_file": elapsed / runs * 1000,
+        "output_chars_per_file": output_chars // runs,
+        "warnings_or_errors": failures,
+        "peak_rss_delta_mb": _max_rss_mb() - baseline_mb,
+    }))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="文本提取基准测试")
+    parser.add_argument("--corpus", default=str(BENCH_DIR / ".corpus"), help="语料目录（不存在的文件会自动生成）")
+    parser.add_argument("--max-pages", type=int, default=1000, help="跳过页数超过该值的PDF语料")
+    parser.add_argument("--repeat", type=int, default=1, help="每个文件重复提取次数")
+    parser.add_argument("--configs", nargs="*", help="要测量的提取配置，默认全部")
+    parser.add_argument("--cases", nargs="*", help="要测量的语料名称，默认全部")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    import crawler_engine as engine
+    cases = corpus_cases(args.max_pages)
+    ensure_corpus(Path(args.corpus), cases)
+    configs = extractor_configs(engine)
+
+    results = []
+    for config, (kind, _backend) in configs.items():
+        if args.configs and config not in args.configs:
+            continue
+        for case, spec in cases.items():
+            if spec["kind"] != kind or (args.cases and case not in args.cases):
+                continue
+            cmd = [sys.executable, __file__, "--worker", config, "--case", case, "--corpus", args.corpus,
+                   "--max-pages", str(args.max_pages), "--repeat", str(args.repeat)]
+            completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{config:<20}{case:<22}{result['pages_per_sec']:>10.1f} 页/s{result['mb_per_sec']:>9.2f} MB/s"
+                  f"{result['ms_per_file']:>11.1f} ms/文件{result['output_chars_per_file']:>11} 字符"
+                  f"{result['peak_rss_delta_mb']:>9.1f} MB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+HTML解析后端基准测试：比较各后端解析大型政策页面的耗时（ms/页）和峰值内存。
+
+用法::
+
+    # 使用保存下来的页面（目录下的 *.html / *.htm）
+    python benchmarks/bench_html_parse.py --pages /path/to/saved_pages
+
+    # 没有样本时生成合成的大页面
+    python benchmarks/bench_html_parse.py --synthetic 20 --page-kb 800
+
+每个后端在独立的子进程中运行，峰值内存为解析阶段 ru_maxrss 相对于加载页面后基线的增量。
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def _max_rss_mb() -> float:
+    """当前进程的峰值RSS（MB），Linux 上单位为KB，macOS 上为字节"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def generate_synthetic_page(size_kb: int, seed: int) -> str:
+    """生成类似政策门户的页面：导航、侧栏、长正文、大量链接和表格"""
+    rng = random.Random(seed)
+    words = ["artificial", "intelligence", "policy", "governance", "machine", "learning", "data",
+             "strategy", "national", "ministry", "framework", "regulation", "innovation", "public"]
+    parts = ["<html><head><title>Policy page</title><script>var tracking = {};</script>",
+             "<style>.x{color:red}</style></head><body>",
+             "<header><nav>" + "".join(f'<a href="/section/{i}">Section {i}</a>' for i in range(60)) + "</nav></header>",
+             '<div class="main-content"><article>']
+    size = 0
+    i = 0
+    while size < size_kb * 1024:
+        paragraph = " ".join(rng.choice(words) for _ in range(120))
+        block = f"<h2>Chapter {i}</h2><p>{paragraph}</p>"
+        if i % 5 == 0:
+            block += f'<p><a href="/docs/report-{i}.pdf" title="Report {i}">Download AI strategy report {i}</a></p>'
+        if i % 7 == 0:
+            block += "<table>" + "".join(
+                f"<tr><td>{rng.choice(words)}</td><td>{rng.randint(0, 9999)}</td></tr>" for _ in range(20)
+            ) + "</table>"
+        parts.append(block)
+        size += len(block)
+        i += 1
+    parts.append("</article></div><aside>related</aside><footer>© gov</footer></body></html>")
+    return "".join(parts)
+
+def load_pages(args) -> list:
+    """读取样本页面或生成合成页面"""
+    if args.pages:
+        files = sorted(p for p in Path(args.pages).iterdir() if p.suffix.lower() in (".html", ".htm"))
+        return [f.read_text(encoding="utf-8", errors="ignore") for f in files]
+    return [generate_synthetic_page(args.page_kb, seed) for seed in range(args.synthetic)]
+
+def run_worker(args) -> None:
+    """子进程：只测量一个后端，结果以JSON输出到stdout"""
+    import crawler_engine as engine
+    
+    pages = load_pages(args)
+    engine.parse_html_document(pages[0], args.worker)  # 预热（导入、首次分配）
+    baseline_mb = _max_rss_mb()
+    
+    timings = []
+    for _ in range(args.repeat):
+        for html in pages:
+            start = time.perf_counter()
+            engine.parse_html_document(html, args.worker)
+            timings.append((time.perf_counter() - start) * 1000)
+    
+    total_mb = sum(len(p.encode("utf-8")) for p in pages) * args.repeat / (1024 * 1024)
+    print(json.dumps({
+        "backend": args.worker,
+        "pages": len(pages),
+        "repeat": args.repeat,
+        "ms_per_page_mean": statistics.mean(timings),
+        "ms_per_page_p50": statistics.median(timings),
+        "ms_per_page_max": max(timings),
+        "mb_per_sec": total_mb / (sum(timings) / 1000),
+        "peak_rss_delta_mb": _max_rss_mb() - baseline_mb,
+    }))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTML解析后端基准测试")
+    parser.add_argument("--pages", help="保存的页面目录（*.html / *.htm）")
+    parser.add_argument("--synthetic", type=int, default=10, help="未提供 --pages 时生成的合成页面数量")
+    parser.add_argument("--page-kb", type=int, default=500, help="合成页面大小（KB）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个页面重复解析次数")
+    parser.add_argument("--backends", nargs="*", help="要比较的后端，默认全部可用后端")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args)
+        return
+    
+    import crawler_engine as engine
+    backends = args.backends or engine.available_html_backends()
+    
+    results = []
+    for backend in backends:
+        cmd = [sys.executable, __file__, "--worker", backend, "--repeat", str(args.repeat),
+               "--synthetic", str(args.synthetic), "--page-kb", str(args.page_kb)]
+        if args.pages:
+            cmd += ["--pages", args.pages]
+        completed = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    
+    print(f"{'后端':<12}{'ms/页(均值)':>14}{'ms/页(p50)':>14}{'MB/s':>10}{'峰值内存增量MB':>18}")
+    for r in results:
+        print(f"{r['backend']:<12}{r['ms_per_page_mean']:>14.1f}{r['ms_per_page_p50']:>14.1f}"
+              f"{r['mb_per_sec']:>10.2f}{r['peak_rss_delta_mb']:>18.1f}")
+    
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
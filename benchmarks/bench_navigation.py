@@ -0,0 +1,140 @@
+"""
+多标签页渲染基准测试：一层导航（NAVIGATION_TABS 个兄弟页面）从打开标签页到拿到全部页面源码的墙钟时间。
+
+对比两种收尾方式：
+    serial  之前的做法：逐个标签页阻塞等待加载，再调用 handle_page_interactions（逐个选择器等待弹窗、滚动 sleep）
+    tabs    render_pages_in_tabs：轮流检查各标签页，就绪后在页面内一次性关闭弹窗并滚动，整批共用一次等待
+
+用法::
+
+    python benchmarks/bench_navigation.py --tabs 4 --levels 2
+    python benchmarks/bench_navigation.py --popup-timeout 3 --popup-attempts 5   # 仓库默认的弹窗设置（很慢）
+
+浏览器是模拟的（每个页面在打开后 --load-min..--load-max 秒内随机时刻加载完成，页面上没有弹窗），
+因此不需要 Chrome；测到的是引擎自身的等待和轮询开销，而不是真实页面的渲染时间。
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class _Element:
+    def send_keys(self, *keys) -> None:
+        pass
+
+class _SwitchTo:
+    def __init__(self, browser: "SimulatedBrowser"):
+        self._browser = browser
+
+    def new_window(self, kind: str) -> None:
+        self._browser.open_tab()
+
+    def window(self, handle: str) -> None:
+        self._browser.current_window_handle = handle
+
+class SimulatedBrowser:
+    """只实现 render_pages_in_tabs 和 handle_page_interactions 用到的 WebDriver 接口"""
+    def __init__(self, engine, load_range, seed: int = 0):
+        self._engine = engine
+        self._rng = random.Random(seed)
+        self._load_range = load_range
+        self._tabs = {"home": {"url": "about:blank", "ready_at": 0.0}}
+        self._next = 0
+        self.current_window_handle = "home"
+        self.switch_to = _SwitchTo(self)
+
+    def open_tab(self) -> None:
+        self._next += 1
+        self.current_window_handle = f"tab-{self._next}"
+        self._tabs[self.current_window_handle] = {"url": "about:blank", "ready_at": 0.0}
+
+    def _ready(self) -> bool:
+        tab = self._tabs[self.current_window_handle]
+        return tab["url"] != "about:blank" and time.time() >= tab["ready_at"]
+
+    def execute_script(self, script: str, *args):
+        tab = self._tabs[self.current_window_handle]
+        if "window.location.href" in script:
+            tab.update(url=args[0], ready_at=time.time() + self._rng.uniform(*self._load_range))
+        elif script == self._engine.TAB_READY_SCRIPT:
+            return self._ready()
+        elif "document.readyState" in script:
+            return "complete" if self._ready() else "loading"
+        return None
+
+    def find_elements(self, by, value):
+        return []
+
+    def find_element(self, by, value):
+        return _Element()
+
+    @property
+    def page_source(self) -> str:
+        return f"<html><body><p>{self._tabs[self.current_window_handle]['url']}</p></body></html>"
+
+    def close(self) -> None:
+        self._tabs.pop(self.current_window_handle, None)
+
+def render_serially(engine, driver, urls):
+    """之前的收尾方式：打开全部标签页后逐个等待加载并处理交互"""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    opened = []
+    for url in urls:
+        driver.switch_to.new_window("tab")
+        driver.execute_script("window.location.href = arguments[0];", url)
+        opened.append((driver.current_window_handle, url))
+    sources = []
+    for handle, url in opened:
+        driver.switch_to.window(handle)
+        WebDriverWait(driver, engine.Config.PAGE_LOAD_TIMEOUT).until(
+            lambda d: d.execute_script("return document.readyState") == "complete")
+        engine.handle_page_interactions(driver, url)
+        sources.append((url, driver.page_source))
+        driver.close()
+    driver.switch_to.window("home")
+    return sources
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=4, help="每层页面数（= NAVIGATION_TABS）")
+    parser.add_argument("--levels", type=int, default=2, help="测量几层")
+    parser.add_argument("--load-min", type=float, default=1.0)
+    parser.add_argument("--load-max", type=float, default=3.0)
+    parser.add_argument("--popup-timeout", type=float, default=0.1, help="POPUP_DETECTION_TIMEOUT（仓库默认 3）")
+    parser.add_argument("--popup-attempts", type=int, default=1, help="MAX_POPUP_ATTEMPTS（仓库默认 5）")
+    args = parser.parse_args()
+
+    import crawler_engine as engine
+    config = engine.Config
+    config.NAVIGATION_TABS = args.tabs
+    engine.host_politeness = engine.HostPoliteness(args.tabs, 0)  # 只测渲染本身，不受按主机限速影响
+    config.POPUP_DETECTION_TIMEOUT = args.popup_timeout
+    config.MAX_POPUP_ATTEMPTS = args.popup_attempts
+    config.ENABLE_TRACING = False
+
+    results = {"serial": [], "tabs": []}
+    for level in range(args.levels):
+        urls = [f"https://site-{level}.example/page/{i}" for i in range(args.tabs)]
+        for mode in results:
+            driver = SimulatedBrowser(engine, (args.load_min, args.load_max), seed=level)
+            start = time.perf_counter()
+            if mode == "serial":
+                sources = render_serially(engine, driver, urls)
+            else:
+                sources = engine.render_pages_in_tabs(driver, urls, log=lambda *a: None)
+            assert all(source for _, source in sources)
+            results[mode].append(time.perf_counter() - start)
+
+    print(f"每层 {args.tabs} 个页面，加载 {args.load_min}-{args.load_max}s，"
+          f"弹窗检测 {args.popup_timeout}s x {args.popup_attempts} 轮，{args.levels} 层")
+    for mode, seconds in results.items():
+        print(f"  {mode:<7} 每层 {statistics.mean(seconds):6.2f}s  ({', '.join(f'{s:.2f}' for s in seconds)})")
+    print(f"  加速 {statistics.mean(results['serial']) / statistics.mean(results['tabs']):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+命令行启动耗时基准：测量各子命令从启动解释器到退出的时间，以及运行期间实际导入了哪些重量级依赖。
+
+用法::
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --baseline-rev HEAD~1   # 与某个提交中的 version-10-main.py 比较
+
+每条命令在新的子进程中运行 --runs 次，报告中位数和最小值。工作目录为临时目录（日志文件写在那里）。
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+SCRIPT = REPO_DIR / "version-10-main.py"
+HEAVY_MODULES = ["pandas", "selenium", "pdfplumber", "requests", "bs4", "lxml", "selectolax", "psutil"]
+
+# 运行脚本后把已导入的重量级依赖写到stderr最后一行
+PROBE = """
+import json, runpy, sys
+script, run_name, args = sys.argv[1], sys.argv[2], sys.argv[3:]
+sys.argv = [script] + args
+try:
+    runpy.run_path(script, run_name=run_name)
+except SystemExit:
+    pass
+print("HEAVY=" + json.dumps([m for m in {heavy} if m in sys.modules]), file=sys.stderr)
+"""
+
+def commands(work_dir: Path) -> dict:
+    """名称 -> (run_name, 命令行参数)；import 只导入模块，不执行 CLI"""
+    queue = str(work_dir / "queue.sqlite3")
+    return {
+        "import": ("crawler_engine", []),
+        "--help": ("__main__", ["--help"]),
+        "queue-status": ("__main__", ["queue-status", "--queue", queue]),
+    }
+
+def time_command(script: Path, run_name: str, args: list, runs: int, work_dir: Path) -> dict:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(script), *args] if run_name == "__main__" else
+                       [sys.executable, "-c", f"import runpy; runpy.run_path({str(script)!r}, run_name={run_name!r})"],
+                       cwd=work_dir, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    probe = subprocess.run([sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES), str(script), run_name, *args],
+                           cwd=work_dir, capture_output=True, text=True, check=True)
+    heavy = json.loads(probe.stderr.strip().splitlines()[-1].split("=", 1)[1])
+    return {"median_ms": statistics.median(timings) * 1000, "min_ms": min(timings) * 1000, "heavy_imports": heavy}
+
+def interpreter_baseline(runs: int) -> float:
+    """空解释器启动耗时（ms），作为下限参考"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="命令行启动耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="每条命令运行次数")
+    parser.add_argument("--baseline-rev", help="同时测量该 git 提交中的 version-10-main.py 作为对照")
+    parser.add_argument("--output", help="将结果保存为JSON文件")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        work_dir = Path(tmp)
+        scripts = {"current": SCRIPT}
+        if args.baseline_rev:
+            baseline = work_dir / "baseline-main.py"
+            baseline.write_bytes(subprocess.run(["git", "show", f"{args.baseline_rev}:version-10-main.py"],
+                                                cwd=REPO_DIR, capture_output=True, check=True).stdout)
+            scripts = {args.baseline_rev: baseline, **scripts}
+
+        python_ms = interpreter_baseline(args.runs)
+        print(f"🐍 空解释器启动: {python_ms:.0f} ms")
+        results = {"python_ms": python_ms, "commands": []}
+        for name, (run_name, cmd_args) in commands(work_dir).items():
+            for label, script in scripts.items():
+                result = time_command(script, run_name, cmd_args, args.runs, work_dir)
+                results["commands"].append({"command": name, "script": label, **result})
+                print(f"{name:<14}{label:<12}{result['median_ms']:>9.0f} ms (最快 {result['min_ms']:.0f} ms)"
+                      f"   已导入: {', '.join(result['heavy_imports']) or '-'}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 结果已保存到: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+离线基准测试用的本地夹具网站：在 127.0.0.1 上模拟政策门户，不访问任何外部网站。
+
+页面类型：
+    /policy/<i>              落地页：cookie弹窗、大量无关导航链接、AI相关子页面链接和PDF链接
+    /policy/<i>/<slug>       AI相关子页面，包含正文和更多PDF链接
+    /js/<i>                  内容由JavaScript延迟渲染的页面（只有浏览器能看到链接）
+    /slow/<i>                响应前等待 slow_delay 秒的落地页
+    /redirect/<i>            302 跳转到 /policy/<i>
+    /files/<name>.pdf        合成PDF（页数由文件名确定），支持 HEAD 和 Range 请求
+    /en/dashboards/policy-initiatives/...policyInitiatives-<n>
+                             OECD.ai 式政策页面：内容由前端从JSON接口加载（浏览器渲染后才有正文和PDF链接）
+    /api/policy-initiatives/<n>
+                             上述页面使用的JSON接口（site_adapters/oecd.py 直接请求它）
+
+用法::
+
+    with FixtureSite(policies=20, oecd_policies=10) as site:
+        urls = site.input_urls()
+        ...
+        print(site.bytes_sent)
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from synthetic_pdf import WORDS, generate_pdf
+
+AI_CHILD_PAGES = ["ai-strategy", "ai-ethics-guidelines", "data-governance"]
+PDF_PAGE_COUNTS = [1, 4, 12, 40]
+
+COOKIE_BANNER = """
+<div class="cookie-banner" style="position:fixed;bottom:0;width:100%;background:#eee">
+  We use cookies to improve your experience.
+  <button id="accept-cookies" onclick="this.parentNode.remove()">Accept all cookies</button>
+</div>"""
+
+def _paragraphs(seed: str, count: int) -> str:
+    digest = hashlib.sha1(seed.encode()).digest()
+    words = [WORDS[(digest[i % len(digest)] + i * 7) % len(WORDS)] for i in range(count * 60)]
+    return "".join(f"<p>{' '.join(words[i * 60:(i + 1) * 60])}.</p>" for i in range(count))
+
+def _page(title: str, body: str, script: str = "") -> bytes:
+    nav = "".join(f'<a href="/section/{n}">Section {n}</a> ' for n in range(30))
+    return (f"<html><head><title>{title}</title>{script}</head><body>"
+            f"<header><nav>{nav}</nav></header>{COOKIE_BANNER}"
+            f'<div class="main-content"><main><h1>{title}</h1>{body}</main></div>'
+            f"<footer>Government portal footer</footer></body></html>").encode("utf-8")
+
+class FixtureSite:
+    """在后台线程中运行的夹具网站，统计发送的字节数和请求数"""
+
+    def __init__(self, policies: int = 20, slow_delay: float = 3.0, host: str = "127.0.0.1", port: int = 0,
+                 oecd_policies: int = 0):
+        self.policies = policies
+        self.oecd_policies = oecd_policies
+        self.slow_delay = slow_delay
+        self.bytes_sent = 0
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._pdf_cache: Dict[str, bytes] = {}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def input_urls(self) -> List[str]:
+        """基准输入：按固定比例混合各种页面类型，以及少量直接PDF链接、OECD.ai 式政策页面和重复URL"""
+        urls = []
+        for i in range(self.policies):
+            kind = ["policy", "policy", "js", "slow", "redirect"][i % 5]
+            urls.append(f"{self.base_url}/{kind}/{i}")
+            if i % 7 == 3:
+                urls.append(f"{self.base_url}/files/{i}-direct.pdf")
+        urls.extend(self.oecd_url(n) for n in range(self.oecd_policies))
+        urls.append(f"{self.base_url}/policy/0/")  # 规范化后与 /policy/0 相同
+        return urls
+
+    def oecd_url(self, n: int) -> str:
+        return f"{self.base_url}/en/dashboards/policy-initiatives/http:%2F%2Faipo.oecd.org%2F2021-data-policyInitiatives-{n}"
+
+    # --- 内容生成 ---
+    def pdf_bytes(self, name: str) -> bytes:
+        with self._lock:
+            if name not in self._pdf_cache:
+                seed = int(hashlib.sha1(name.encode()).hexdigest()[:8], 16)
+                pages = PDF_PAGE_COUNTS[seed % len(PDF_PAGE_COUNTS)]
+                self._pdf_cache[name] = generate_pdf("mixed", pages=pages, seed=seed)
+            return self._pdf_cache[name]
+
+    def landing_page(self, i: int) -> bytes:
+        links = "".join(f'<li><a href="/policy/{i}/{slug}">{slug.replace("-", " ").title()} for AI policy</a></li>'
+                        for slug in AI_CHILD_PAGES)
+        docs = (f'<p><a href="/files/{i}-national-ai-strategy.pdf">National AI strategy (PDF)</a></p>'
+                f'<p><a href="/files/{i}-annual-report.pdf">Annual report</a></p>')
+        return _page(f"Artificial intelligence policy {i}", _paragraphs(f"landing-{i}", 4) + f"<ul>{links}</ul>" + docs)
+
+    def child_page(self, i: int, slug: str) -> bytes:
+        docs = f'<p><a href="/files/{i}-{slug}.pdf">{slug.replace("-", " ")} AI governance framework</a></p>'
+        return _page(f"{slug.replace('-', ' ').title()} - AI governance {i}", _paragraphs(f"{slug}-{i}", 6) + docs)
+
+    def js_page(self, i: int) -> bytes:
+        body = _paragraphs(f"js-{i}", 5).replace('"', '\\"')
+        script = ("<script>setTimeout(function(){document.getElementById('app').innerHTML = \""
+                  f"{body}<a href='/policy/{i}/ai-strategy'>AI strategy</a>"
+                  f"<a href='/files/{i}-js-rendered.pdf'>AI policy document</a>\";}}, 300);</script>")
+        return _page(f"AI policy dashboard {i}", '<div id="app">Loading...</div>', script)
+
+    def oecd_record(self, n: int) -> Dict:
+        """OECD.ai 式政策接口返回的记录"""
+        return {
+            "id": n,
+            "name": f"National artificial intelligence strategy {n}",
+            "country": {"name": ["France", "Japan", "Canada", "Brazil"][n % 4]},
+            "description": re.sub(r"<[^>]+>", " ", _paragraphs(f"oecd-{n}", 3)).strip(),
+            "objectives": re.sub(r"<[^>]+>", " ", _paragraphs(f"oecd-objectives-{n}", 1)).strip(),
+            "documents": [
+                {"title": "AI strategy (PDF)", "url": f"/files/oecd-{n}-strategy.pdf"},
+                {"title": "Implementation report", "url": f"/files/oecd-{n}-report.pdf"},
+            ],
+        }
+
+    def oecd_page(self, n: int) -> bytes:
+        script = ("<script>fetch('/api/policy-initiatives/" + str(n) + "').then(r => r.json()).then(d => {"
+                  "document.getElementById('app').innerHTML = '<h1>' + d.name + '</h1><p>' + d.description + '</p>'"
+                  " + d.documents.map(x => '<a href=\"' + x.url + '\">' + x.title + '</a>').join(' ');});</script>")
+        return _page(f"OECD.AI Policy Observatory {n}", '<div id="app">Loading...</div>', script)
+
+    def route(self, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        """返回 (状态码, 额外响应头, 内容)"""
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        match = re.fullmatch(r"/(policy|js|slow|redirect)/(\d+)(?:/([\w-]+))?", path)
+        if match:
+            kind, i, slug = match.group(1), int(match.group(2)), match.group(3)
+            if kind == "redirect":
+                return 302, {"Location": f"/policy/{i}"}, b""
+            if kind == "slow":
+                time.sleep(self.slow_delay)
+            if kind == "js":
+                return 200, {"Content-Type": "text/html; charset=utf-8"}, self.js_page(i)
+            if slug:
+                return 200, {"Content-Type": "text/html; charset=utf-8"}, self.child_page(i, slug)
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.landing_page(i)
+        match = re.fullmatch(r"/en/dashboards/policy-initiatives/.*policyInitiatives-(\d+)", path)
+        if match and int(match.group(1)) < self.oecd_policies:
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.oecd_page(int(match.group(1)))
+        match = re.fullmatch(r"/api/policy-initiatives/(\d+)", path)
+        if match and int(match.group(1)) < self.oecd_policies:
+            body = json.dumps(self.oecd_record(int(match.group(1)))).encode("utf-8")
+            return 200, {"Content-Type": "application/json"}, body
+        match = re.fullmatch(r"/files/([\w-]+)\.pdf", path)
+        if match:
+            return 200, {"Content-Type": "application/pdf"}, self.pdf_bytes(match.group(1))
+        return 404, {"Content-Type": "text/html; charset=utf-8"}, _page("Not found", "<p>Page not found</p>")
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, include_body: bool) -> None:
+                status, headers, body = site.route(self.path)
+                range_match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if status == 200 and range_match:
+                    start = int(range_match.group(1))
+                    end = min(int(range_match.group(2) or len(body) - 1), len(body) - 1)
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                    status, body = 206, body[start:end + 1]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if include_body:
+                    self.wfile.write(body)
+                    with site._lock:
+                        site.bytes_sent += len(body)
+                with site._lock:
+                    site.requests_served += 1
+
+            def do_GET(self):
+                self._respond(include_body=True)
+
+            def do_HEAD(self):
+                self._respond(include_body=False)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
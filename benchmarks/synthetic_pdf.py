@@ -0,0 +1,141 @@
+"""
+合成PDF生成器（无第三方依赖），供基准测试生成可复现的文档语料。
+
+支持的页面类型：
+    text         纯文本段落
+    table        带边框的表格（文字在单元格中）
+    multicolumn  双栏排版
+    image        只有图片、没有文字层（模拟扫描件）
+
+用法::
+
+    from synthetic_pdf import generate_pdf
+    data = generate_pdf("table", pages=20, seed=1)
+"""
+import random
+import zlib
+from typing import List, Tuple
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+WORDS = ["artificial", "intelligence", "policy", "governance", "machine", "learning", "data",
+         "strategy", "national", "ministry", "framework", "regulation", "innovation", "public",
+         "algorithm", "accountability", "transparency", "risk", "oversight", "ethics"]
+PAGE_KINDS = ("text", "table", "multicolumn", "image")
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def _wrap(text: str, width: int) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+def _text_block(lines: List[str], x: float, y: float, size: int = 10, leading: int = 13) -> str:
+    body = "".join(f"({_escape(line)}) Tj T*\n" for line in lines)
+    return f"BT /F1 {size} Tf {leading} TL {x} {y} Td\n{body}ET\n"
+
+def text_page(rng: random.Random, page_no: int) -> Tuple[str, None]:
+    lines = [f"Chapter {page_no}: national AI governance strategy", ""]
+    while len(lines) < 52:
+        lines.extend(_wrap(_sentence(rng, 60), 95) + [""])
+    return _text_block(lines[:52], 50, PAGE_HEIGHT - 60), None
+
+def table_page(rng: random.Random, page_no: int) -> Tuple[str, None]:
+    rows, cols = 30, 5
+    cell_w, cell_h = (PAGE_WIDTH - 100) / cols, 22
+    top = PAGE_HEIGHT - 80
+    parts = [_text_block([f"Table {page_no}: AI policy instruments by ministry"], 50, top + 25, size=12)]
+    parts.append("0.5 w\n")
+    for r in range(rows):
+        for c in range(cols):
+            x, y = 50 + c * cell_w, top - (r + 1) * cell_h
+            parts.append(f"{x:.1f} {y:.1f} {cell_w:.1f} {cell_h:.1f} re S\n")
+            value = rng.choice(WORDS) if c < 3 else str(rng.randint(0, 99999))
+            parts.append(_text_block([value], x + 4, y + 7, size=9))
+    return "".join(parts), None
+
+def multicolumn_page(rng: random.Random, page_no: int) -> Tuple[str, None]:
+    column_width = (PAGE_WIDTH - 130) / 2
+    parts = [_text_block([f"Section {page_no}: oversight and accountability"], 50, PAGE_HEIGHT - 50, size=12)]
+    for column in range(2):
+        lines: List[str] = []
+        while len(lines) < 55:
+            lines.extend(_wrap(_sentence(rng, 50), 45) + [""])
+        parts.append(_text_block(lines[:55], 50 + column * (column_width + 30), PAGE_HEIGHT - 80, size=9, leading=12))
+    return "".join(parts), None
+
+def image_page(rng: random.Random, page_no: int) -> Tuple[str, bytes]:
+    """灰度图片（条纹+噪点，模拟扫描件），没有文字层"""
+    width, height = 850, 1100
+    seed = rng.randint(0, 255)
+    patterns = {}  # 行只取决于 (灰度, y % 97)，缓存后按行拼接
+    rows = bytearray()
+    for y in range(height):
+        key = (235 if (y // 14 + seed) % 3 else 60, y % 97)
+        if key not in patterns:
+            patterns[key] = bytes(key[0] if (x * 7 + y) % 97 else 0 for x in range(width))
+        rows += patterns[key]
+    content = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im1 Do Q\n"
+    image = (f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray"
+             f" /BitsPerComponent 8 /Filter /FlateDecode /Length {{length}} >>").encode("ascii"), zlib.compress(bytes(rows))
+    return content, image
+
+PAGE_BUILDERS = {
+    "text": text_page,
+    "table": table_page,
+    "multicolumn": multicolumn_page,
+    "image": image_page,
+}
+
+def generate_pdf(kind: str = "text", pages: int = 1, seed: int = 0) -> bytes:
+    """生成指定类型和页数的PDF；kind="mixed" 时按页轮换文本、表格和双栏页"""
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    catalog_id = add(b"")  # 占位，最后填写
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    page_ids = []
+    for page_no in range(1, pages + 1):
+        page_kind = ("text", "table", "multicolumn")[page_no % 3] if kind == "mixed" else kind
+        content, image = PAGE_BUILDERS[page_kind](rng, page_no)
+        stream = zlib.compress(content.encode("latin-1"))
+        content_id = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        resources = f"/Font << /F1 {font_id} 0 R >>"
+        if image:
+            header, data = image
+            image_id = add(header.replace(b"{length}", str(len(data)).encode()) + b"\nstream\n" + data + b"\nendstream")
+            resources += f" /XObject << /Im1 {image_id} 0 R >>"
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]"
+            f" /Resources << {resources} >> /Contents {content_id} 0 R >>".encode("ascii")
+        ))
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("ascii")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_offset)
+    return bytes(out)
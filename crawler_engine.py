@@ -0,0 +1,18 @@
+"""
+可导入的抓取引擎入口。
+
+version-10-main.py 的文件名包含连字符，不能直接 import。本模块按文件路径加载它，
+并以 crawler_engine 的名字注册到 sys.modules，供基准测试、站点脚本和
+多进程子进程（spawn 模式需要可导入的模块名来反序列化任务函数）使用::
+
+    import crawler_engine as engine
+    engine.parse_html_document(html)
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+_spec = importlib.util.spec_from_file_location(__name__, Path(__file__).with_name("version-10-main.py"))
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
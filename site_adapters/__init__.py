@@ -0,0 +1,61 @@
+"""
+站点适配器插件：为已知域名声明如何直接通过HTTP获取结构化数据或文档列表。
+适配器命中时引擎不再启动浏览器渲染页面；适配器返回 None 或出错时回退到 Selenium 智能导航。
+
+每个插件是本包中的一个模块，定义 ADAPTER（SiteAdapter 子类），并在 Config.SITE_ADAPTERS 中按模块名启用
+（默认不启用任何插件：插件的接口地址在真实站点上验证之后再加入）::
+
+    class ExampleAdapter(SiteAdapter):
+        name = 'example'
+        domains = ('example.gov',)
+
+        def fetch(self, url, session, timeout):
+            response = session.get(api_url_for(url), timeout=timeout)
+            ...
+            return {'page_texts': [...], 'documents': [{'url': ..., 'text': ...}], 'heading': ..., 'bytes': len(response.content)}
+
+    ADAPTER = ExampleAdapter
+
+fetch 的返回值：
+    page_texts  页面正文块（与智能导航提取的页面文本同等对待）
+    documents   文档链接 [{'url', 'text'}]，由引擎排序、探测、下载
+    heading     政策标题（Config.PAGE_INFO_TITLE_FROM_HEADING 时用于文件名和元数据），可省略
+    bytes       接口响应的字节数，计入单个URL的字节预算，可省略
+
+插件不导入 crawler_engine（引擎以脚本运行时会被重复加载），需要的会话和超时由引擎传入。
+"""
+import importlib
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+class SiteAdapter(ABC):
+    """站点适配器基类：按主机名匹配URL，fetch 返回结构化内容，无法处理时返回 None"""
+    name = ''
+    domains = ()  # 匹配的主机名（包括其子域名）
+
+    def __init__(self, extra_domains: Iterable[str] = ()):
+        self.domains = tuple(self.domains) + tuple(d.lower() for d in extra_domains)
+
+    def matches(self, url: str) -> bool:
+        host = (urlparse(url).hostname or '').lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in self.domains)
+
+    @abstractmethod
+    def fetch(self, url: str, session, timeout: float) -> Optional[Dict]:
+        """获取URL的结构化内容（返回值见模块说明），无法处理时返回 None"""
+
+def load_adapters(names: Iterable[str], extra_domains: Optional[Dict[str, List[str]]] = None) -> List[SiteAdapter]:
+    """按模块名加载插件并实例化，加载失败的插件记录警告后跳过"""
+    extra_domains = extra_domains or {}
+    adapters = []
+    for name in names:
+        try:
+            module = importlib.import_module(f"{__name__}.{name}")
+            adapters.append(module.ADAPTER(extra_domains.get(name, ())))
+        except Exception as e:
+            logger.warning(f"⚠️ 站点适配器 {name} 加载失败: {e}")
+    return adapters
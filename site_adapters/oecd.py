@@ -0,0 +1,88 @@
+"""
+OECD.ai 政策倡议页面适配器。
+
+OECD.ai 的政策页面（/dashboards/policy-initiatives/...policyInitiatives-<编号>）由前端从JSON接口加载内容。
+本适配器直接请求该接口，把名称、描述等字段作为页面文本，把接口中列出的链接作为待下载文档，
+一个URL只需要一次小的HTTP请求。接口地址由 api_path 决定；响应不是预期的JSON时返回 None，由引擎回退到浏览器。
+
+注意：api_path 目前只在本地夹具网站（benchmarks/fixture_site.py）上验证过，默认不启用；
+确认 oecd.ai 的真实接口后再把 'oecd' 加入 Config.SITE_ADAPTERS。
+"""
+import re
+import time
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urljoin, urlparse
+
+from . import SiteAdapter
+
+INITIATIVE_ID_PATTERN = re.compile(r'policyInitiatives-(\d+)', re.I)
+TEXT_FIELDS = ['description', 'objectives', 'background', 'summary', 'content']  # 按顺序拼接为页面文本
+DOCUMENT_FIELDS = ['documents', 'links', 'relatedDocuments', 'resources']
+DOCUMENT_URL_FIELDS = ['url', 'link', 'href']
+
+def _as_text(value) -> str:
+    """接口字段可能是字符串、{'name': ...} 或它们的列表"""
+    if isinstance(value, dict):
+        return str(value.get('name') or value.get('label') or value.get('title') or '')
+    if isinstance(value, list):
+        return '; '.join(filter(None, (_as_text(v) for v in value)))
+    return str(value).strip() if value is not None else ''
+
+class OecdAdapter(SiteAdapter):
+    name = 'oecd'
+    domains = ('oecd.ai',)
+    api_path = '/api/policy-initiatives/{initiative_id}'
+
+    def api_url(self, url: str) -> Optional[str]:
+        """政策页面URL对应的JSON接口地址；不是政策倡议页面时返回 None"""
+        match = INITIATIVE_ID_PATTERN.search(unquote(url))
+        if not match:
+            return None
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}{self.api_path.format(initiative_id=match.group(1))}"
+
+    def documents_of(self, data: Dict, base_url: str) -> List[Dict]:
+        documents = []
+        for field in DOCUMENT_FIELDS:
+            for item in data.get(field) or []:
+                if isinstance(item, str):
+                    item = {'url': item}
+                href = next((item[key] for key in DOCUMENT_URL_FIELDS if item.get(key)), None)
+                if href:
+                    documents.append({'url': urljoin(base_url, href), 'text': _as_text(item.get('title') or item.get('name'))})
+        return documents
+
+    def fetch(self, url: str, session, timeout: float) -> Optional[Dict]:
+        api_url = self.api_url(url)
+        if not api_url:
+            return None
+        response = session.get(api_url, timeout=timeout, headers={'Accept': 'application/json'})
+        if response.status_code != 200 or 'json' not in response.headers.get('content-type', '').lower():
+            return None
+        data = response.json()
+        if isinstance(data, dict) and isinstance(data.get('data'), dict):
+            data = data['data']
+        if not isinstance(data, dict):
+            return None
+
+        title = _as_text(data.get('name') or data.get('title'))
+        body = '\n\n'.join(filter(None, (_as_text(data.get(field)) for field in TEXT_FIELDS)))
+        documents = self.documents_of(data, url)
+        if not body and not documents:
+            return None
+
+        page_text = (
+            f"[页面URL]: {url}\n"
+            f"[数据接口]: {api_url}\n"
+            f"[国家]: {_as_text(data.get('country'))}\n"
+            f"[提取时间]: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            f"{title}\n\n{body}"
+        )
+        return {
+            'page_texts': [page_text] if body else [],
+            'documents': documents,
+            'heading': title,
+            'bytes': len(response.content),
+        }
+
+ADAPTER = OecdAdapter
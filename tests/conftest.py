@@ -0,0 +1,41 @@
+"""
+测试共用夹具：engine 夹具把 Config 中所有指向 PROJECT_DIR 的路径改到临时目录，
+并在每个测试前后清空模块级的单例（文本存储、检索索引、缓存等），测试之间互不影响。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+import crawler_engine  # noqa: E402
+
+SINGLETONS = ["_extraction_cache", "_text_store", "_search_index", "_near_duplicate_index", "_page_cache", "_site_adapters"]
+
+def _reset_singletons(engine) -> None:
+    for name in SINGLETONS:
+        instance = getattr(engine, name)
+        if instance is not None and hasattr(instance, "close"):
+            instance.close()
+        setattr(engine, name, None)
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    config = crawler_engine.Config
+    project_dir = str(config.PROJECT_DIR)
+    for name, value in list(vars(config).items()):
+        if name.isupper() and isinstance(value, Path) and str(value).startswith(project_dir):
+            monkeypatch.setattr(config, name, tmp_path / value.relative_to(project_dir))
+    monkeypatch.setattr(config, "PROJECT_DIR", tmp_path)
+    monkeypatch.setattr(config, "RANDOM_DELAY_MIN", 0)
+    monkeypatch.setattr(config, "RANDOM_DELAY_MAX", 0)
+    monkeypatch.setattr(config, "PER_HOST_MIN_INTERVAL", 0)
+    monkeypatch.setattr(crawler_engine.tracer, "output_path", None)
+    for path in [config.SAVE_DIR, config.PDF_SAVE_DIR, config.TEMP_DIR]:
+        path.mkdir(parents=True, exist_ok=True)
+    _reset_singletons(crawler_engine)
+    yield crawler_engine
+    _reset_singletons(crawler_engine)
@@ -0,0 +1,52 @@
+def probe(url, kind, size_bytes=0):
+    return {"url": url, "final_url": url, "status": 0, "content_type": "", "size_bytes": size_bytes, "kind": kind}
+
+def test_probe_error_on_document_url_still_downloads(engine):
+    assert engine.is_downloadable_probe(probe("https://a.gov/files/strategy.pdf", "error"))
+    assert engine.is_downloadable_probe(probe("https://a.gov/files/Report.DOCX?v=2", "error"))
+
+def test_probe_error_without_document_extension_is_skipped(engine):
+    assert not engine.is_downloadable_probe(probe("https://a.gov/download/policy", "error"))
+    assert not engine.is_downloadable_probe(probe("https://a.gov/files/page.pdf", "html"))
+
+def test_probe_size_limit_applies_to_errors(engine):
+    too_big = engine.Config.MAX_PDF_SIZE_MB * 1024 * 1024 + 1
+    assert not engine.is_downloadable_probe(probe("https://a.gov/files/strategy.pdf", "error", too_big))
+
+def test_probes_respect_host_limits_and_use_their_own_cache(engine, monkeypatch):
+    import threading
+
+    import requests
+    from fixture_site import FixtureSite
+
+    class RecordingPoliteness(engine.HostPoliteness):
+        def __init__(self):
+            super().__init__(max_concurrency=1, min_interval=0)
+            self.active = self.peak = self.calls = 0
+            self._count_lock = threading.Lock()
+
+        def acquire(self, url, blocking=True):
+            acquired = super().acquire(url, blocking)
+            with self._count_lock:
+                self.active += 1
+                self.calls += 1
+                self.peak = max(self.peak, self.active)
+            return acquired
+
+        def release(self, url):
+            with self._count_lock:
+                self.active -= 1
+            super().release(url)
+
+    politeness = RecordingPoliteness()
+    monkeypatch.setattr(engine, "host_politeness", politeness)
+    monkeypatch.setattr(engine.Config, "ENABLE_PAGE_CACHE", False)
+    with FixtureSite(policies=0) as site, requests.Session() as session:
+        docs = [{"url": f"{site.base_url}/files/doc-{i}.pdf"} for i in range(6)]
+        probes = engine.probe_documents(docs, session)
+        assert [p["kind"] for p in probes] == ["pdf"] * 6
+        assert politeness.calls == 6 and politeness.peak == 1
+
+        assert engine.get_page_cache() is None
+        assert engine.probe_documents(docs, session) == probes
+        assert politeness.calls == 6  # 第二次全部命中探测缓存
@@ -0,0 +1,69 @@
+import pandas as pd
+
+from fixture_site import FixtureSite
+
+def test_multi_url_cell_tasks_have_distinct_ids(engine):
+    df = pd.DataFrame({"编号": ["7", "8"], "Source": ["https://a.gov/x; https://a.gov/y.pdf", "see http://b.org/z"]})
+    batch, _ = engine.prepare_input_batch(df, engine.find_url_column(df), 1)
+    rows = [row.to_dict() for _, row in batch.iterrows()]
+    assert [r["Source"] for r in rows] == ["https://a.gov/x", "https://a.gov/y.pdf", "http://b.org/z"]
+    assert [r["来源行"] for r in rows] == [1, 1, 2]
+    assert [engine.row_task_id(r, 0) for r in rows] == [7, "7-2", 8]
+    assert [engine.row_filename_base(r, 0) for r in rows] == ["0007", "7-2", "0008"]
+
+def test_multi_url_cell_does_not_overwrite_text_or_documents(engine):
+    with FixtureSite(policies=0) as site:
+        df = pd.DataFrame({"编号": [7], "url": [f"{site.base_url}/files/7-a.pdf\n{site.base_url}/files/7-b.pdf"]})
+        batch, _ = engine.prepare_input_batch(df, "url", 1)
+        records = [engine.process_single_url(idx, row.to_dict(), "url", len(batch)) for idx, row in batch.iterrows()]
+
+    assert [r["文件名"] for r in records] == ["0007.txt", "7-2.txt"]
+    texts = [engine.load_row_text(r["文件名"]) for r in records]
+    assert all(texts) and texts[0] != texts[1]
+    pdfs = sorted(p.name for p in engine.Config.PDF_SAVE_DIR.glob("*.pdf"))
+    assert len(pdfs) == 2 and pdfs[0].startswith("7-2_") and pdfs[1].startswith("7_")
+
+def test_csv_with_late_gbk_section_is_reread_strictly(engine, tmp_path):
+    path = tmp_path / "mixed.csv"
+    ascii_rows = [f"{i},https://a.gov/policy/{i},{'x' * 60}" for i in range(20000)]  # 超过编码嗅探的1MB
+    with open(path, "wb") as f:
+        f.write(b"id,url,title\n")
+        f.write("\n".join(ascii_rows).encode("ascii") + b"\n")
+        f.write("20000,https://b.gov/zc,人工智能治理政策\n".encode("gbk"))
+    assert path.stat().st_size > 1024 * 1024
+
+    assert engine.sniff_csv_encoding(path) == "utf-8"
+
+    df = pd.concat(list(engine.iter_file_batches(path, batch_size=5000)))
+    assert list(df.index) == list(range(20001))
+    assert df["title"].iloc[-1] == "人工智能治理政策"
+    assert "\ufffd" not in "".join(df["title"])
+
+def test_string_and_blank_ids_are_kept_or_numbered(engine):
+    df = pd.DataFrame({"编号": ["A-7", "", "12", "3.0", None],
+                       "url": [f"https://a.gov/{i}" for i in range(5)]})
+    batch, next_number = engine.prepare_input_batch(df, "url", 101)
+    rows = [row.to_dict() for _, row in batch.iterrows()]
+    assert [r["编号"] for r in rows] == ["A-7", 102, 12, 3, 105]
+    assert next_number == 106
+    assert [engine.row_filename_base(r, idx) for idx, r in zip(batch.index, rows)] == ["A-7", "0102", "0012", "0003", "0105"]
+
+def test_canonical_url_drops_only_tracking_params(engine, monkeypatch):
+    canonical = engine.canonicalize_url
+    assert canonical("http://A.gov/p?id=1&utm_source=x&gclid=y&fbclid=z") == "https://a.gov/p?id=1"
+    assert canonical("https://a.gov/p?ref=2024-01") != canonical("https://a.gov/p?ref=2024-02")
+    assert canonical("https://a.gov/p?source=eu") != canonical("https://a.gov/p?source=us")
+    assert canonical("https://a.gov/p?spm=1") != canonical("https://a.gov/p")
+
+    monkeypatch.setattr(engine.Config, "TRACKING_QUERY_PARAMS", ["spm"])
+    assert canonical("https://a.gov/p?spm=1&gclid=y") == "https://a.gov/p?gclid=y"
+
+def test_url_cells_keep_balanced_closing_parenthesis(engine):
+    df = pd.DataFrame({"url": [
+        "see https://en.wikipedia.org/wiki/Foo_(bar), and (https://a.gov/x).",
+        "https://en.wikipedia.org/wiki/Foo_(bar))",
+    ]})
+    expanded = engine.expand_url_cells(df, "url")
+    assert list(expanded["url"]) == [
+        "https://en.wikipedia.org/wiki/Foo_(bar)", "https://a.gov/x", "https://en.wikipedia.org/wiki/Foo_(bar)",
+    ]
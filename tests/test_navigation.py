@@ -0,0 +1,19 @@
+import time
+
+from bench_navigation import SimulatedBrowser
+
+def test_tabs_are_finalized_without_serial_waits(engine, monkeypatch):
+    monkeypatch.setattr(engine.Config, "NAVIGATION_TABS", 4)
+    monkeypatch.setattr(engine, "host_politeness", engine.HostPoliteness(4, 0))
+    monkeypatch.setattr(engine.Config, "TAB_POLL_INTERVAL", 0.02)
+    monkeypatch.setattr(engine.Config, "TAB_SETTLE_SECONDS", 0.1)
+    driver = SimulatedBrowser(engine, (0.2, 0.4))
+    urls = [f"https://a.gov/page/{i}" for i in range(6)]
+
+    start = time.perf_counter()
+    sources = engine.render_pages_in_tabs(driver, urls)
+    elapsed = time.perf_counter() - start
+
+    assert [url for url, _ in sources] == urls and all(url in source for url, source in sources)
+    assert elapsed < 1.5  # 两批，每批约为最慢页面的加载时间加一次共用等待
+    assert list(driver._tabs) == ["home"] and driver.current_window_handle == "home"
@@ -0,0 +1,22 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+def test_sampled_task_extends_to_pool_threads(engine, monkeypatch):
+    monkeypatch.setattr(engine.Config, "PROFILE_MODE", "sample")
+    monkeypatch.setattr(engine.Config, "PROFILE_TASK_FRACTION", 0.5)
+    profiler = engine.task_profiler
+    urls = [f"https://a.gov/policy/{i}" for i in range(50)]
+    sampled = next(u for u in urls if profiler.should_profile(u))
+    skipped = next(u for u in urls if not profiler.should_profile(u))
+
+    def is_sampled():
+        return threading.get_ident() in profiler._sampled_threads
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with profiler.profile_task(sampled):
+            assert is_sampled()
+            assert engine.submit_in_context(executor, is_sampled).result() is True
+        with profiler.profile_task(skipped):
+            assert engine.submit_in_context(executor, is_sampled).result() is False
+        assert executor.submit(is_sampled).result() is False
+    assert profiler._sampled_threads == {}
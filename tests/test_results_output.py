@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from fixture_site import FixtureSite
+
+def test_parquet_write_failure_is_contained(engine, tmp_path):
+    pytest.importorskip("pyarrow")
+    writer = engine.ResultsParquetWriter(tmp_path / "results.parquet", row_group_size=1)
+    writer.write({"编号": 1, "处理状态": "成功", "PDF文档数": "not-a-number"})  # int32 列转换失败
+    writer.write({"编号": 2, "处理状态": "成功"})
+    writer.close()
+    writer.close()
+    assert writer.failed and "ValueError" in writer.failed
+    assert not (tmp_path / "results.parquet").exists()
+    assert not (tmp_path / "results.parquet.tmp").exists()
+
+def test_failed_parquet_falls_back_to_csv(engine, tmp_path):
+    pytest.importorskip("pyarrow")
+    output = tmp_path / "results.csv"
+    engine.save_processing_results([{"编号": 1, "处理状态": "成功", "提取文本": "t", "PDF文档数": "x"}], output, formats=["parquet"])
+    assert output.exists() and not output.with_suffix(".parquet").exists()
+
+def test_parquet_keeps_string_ids_and_late_columns(engine, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "results.parquet"
+    with engine.ResultsParquetWriter(path, row_group_size=2) as writer:
+        writer.write({"编号": 1, "url": "https://a.gov/1", "处理状态": "成功", "PDF文档数": 2})
+        writer.write({"编号": "P-001", "url": "https://a.gov/2", "处理状态": "失败"})
+        writer.write({"编号": "3-2", "url": "https://a.gov/3", "Country": "France", "处理状态": "成功"})
+    assert writer.failed is None
+
+    table = pq.read_table(path)
+    assert table.column_names[:3] == ["编号", "url", "Country"]
+    assert table.column("编号").to_pylist() == ["1", "P-001", "3-2"]
+    assert table.column("Country").to_pylist() == [None, None, "France"]
+    assert table.column("PDF文档数").to_pylist() == [2, None, None]
+    assert [str(v) for v in table.column("处理状态").to_pylist()] == ["成功", "失败", "成功"]
+
+def test_csv_writer_appends_batches_and_rewrites_header_for_late_columns(engine, tmp_path):
+    path = tmp_path / "results.csv"
+    with engine.ResultsCsvWriter(path, flush_rows=2) as writer:
+        writer.write({"编号": 1, "url": "https://a.gov/1", "处理状态": "成功", "提取文本": "a"})
+        writer.write({"编号": "P-001", "url": "https://a.gov/2", "处理状态": "失败", "提取文本": "b"})
+        assert writer.rows_written == 2 and (tmp_path / "results.csv.tmp").exists()
+        writer.write({"编号": "3-2", "url": "https://a.gov/3", "Country": "France", "处理状态": "成功"})
+    assert writer.failed is None and writer.rows_written == 3
+
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    assert list(df.columns[:3]) == ["编号", "url", "Country"]
+    assert list(df.columns[3:]) == engine.RESULT_COLUMNS
+    assert list(df["编号"]) == ["1", "P-001", "3-2"]
+    assert list(df["Country"]) == ["", "", "France"]
+    assert list(df["处理状态"]) == ["成功", "失败", "成功"]
+
+def test_main_streams_results_and_reuses_late_duplicates(engine, monkeypatch):
+    with FixtureSite(policies=0) as site:
+        urls = [f"{site.base_url}/files/1-a.pdf", f"{site.base_url}/files/2-a.pdf", f"{site.base_url}/files/1-a.pdf"]
+        pd.DataFrame({"编号": ["A-1", "A-2", "A-3"], "url": urls}).to_csv(engine.Config.EXCEL_PATH, index=False)
+        monkeypatch.setattr(engine.Config, "RESULTS_FORMATS", ["csv"])
+        monkeypatch.setattr(engine.Config, "MAX_THREADS", 1)
+        monkeypatch.setattr(engine.Config, "SCHEDULER_QUEUE_FACTOR", 1)  # 重复行在第一行完成后才读到
+        monkeypatch.setattr(engine.Config, "INPUT_BATCH_SIZE", 1)
+        monkeypatch.setattr(engine.Config, "CSV_FLUSH_ROWS", 1)
+        engine.main()
+
+    df = pd.read_csv(engine.Config.CSV_OUTPUT, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+    assert list(df["编号"]) == ["A-1", "A-2", "A-3"]
+    assert df["处理状态"].str.startswith("成功").all()
+    assert list(df["结果复用自"]) == ["", "", "A-1"]
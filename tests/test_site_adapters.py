@@ -0,0 +1,40 @@
+import pytest
+import requests
+
+from fixture_site import FixtureSite
+from site_adapters import SiteAdapter
+
+@pytest.fixture
+def oecd_site(engine, monkeypatch):
+    with FixtureSite(policies=0, oecd_policies=2) as site:
+        monkeypatch.setattr(engine.Config, "ENABLE_SITE_ADAPTERS", True)
+        monkeypatch.setattr(engine.Config, "SITE_ADAPTERS", ["oecd"])
+        monkeypatch.setattr(engine.Config, "SITE_ADAPTER_EXTRA_DOMAINS", {"oecd": ["127.0.0.1"]})
+        yield site
+
+def test_site_adapter_fetch_is_abstract():
+    with pytest.raises(TypeError):
+        SiteAdapter()
+
+def test_site_adapters_disabled_by_default(engine):
+    assert engine.Config.SITE_ADAPTERS == []
+    assert engine.get_site_adapters() == []
+
+def test_oecd_adapter_against_fixture_site(engine, oecd_site):
+    with requests.Session() as session:
+        result = engine.fetch_with_site_adapter(oecd_site.oecd_url(1), session, engine.TaskBudget.from_config())
+
+    record = oecd_site.oecd_record(1)
+    assert result["adapter"] == "oecd"
+    assert result["heading"] == record["name"]
+    assert len(result["page_texts"]) == 1 and record["objectives"] in result["page_texts"][0]
+    assert [d["url"] for d in result["documents"]] == [
+        f"{oecd_site.base_url}/files/oecd-1-strategy.pdf",
+        f"{oecd_site.base_url}/files/oecd-1-report.pdf",
+    ]
+    assert result["bytes"] > 0
+
+def test_oecd_adapter_falls_back_when_api_has_no_record(engine, oecd_site):
+    with requests.Session() as session:
+        assert engine.fetch_with_site_adapter(oecd_site.oecd_url(5), session, engine.TaskBudget.from_config()) is None
+        assert engine.fetch_with_site_adapter(f"{oecd_site.base_url}/policy/0", session, engine.TaskBudget.from_config()) is None
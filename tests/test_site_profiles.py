@@ -0,0 +1,21 @@
+import importlib.util
+from pathlib import Path
+
+SHARED_CACHES = {"PAGE_CACHE_PATH", "EXTRACTION_CACHE_PATH"}
+
+def load_oecd_profile():
+    path = Path(__file__).resolve().parent.parent / "version-10-oecd.py"
+    spec = importlib.util.spec_from_file_location("oecd_profile", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_oecd_profile_has_its_own_crawl_state():
+    import crawler_engine as engine
+
+    profile = load_oecd_profile().OECD_PROFILE
+    state_paths = {name for name, value in vars(engine.Config).items()
+                   if name.isupper() and isinstance(value, Path) and name != "PROJECT_DIR"}
+    assert state_paths - SHARED_CACHES <= set(profile)
+    for name in state_paths - SHARED_CACHES - {"EXCEL_PATH"}:
+        assert profile[name] != getattr(engine.Config, name), name
@@ -0,0 +1,52 @@
+import json
+
+import pandas as pd
+
+from fixture_site import FixtureSite
+
+def test_failed_discover_still_produces_a_result_row(engine, monkeypatch):
+    with FixtureSite(policies=1) as site:
+        pdf_url, broken_url = f"{site.base_url}/files/1-a.pdf", f"{site.base_url}/policy/0"
+        pd.DataFrame({"编号": [1, 2], "url": [pdf_url, broken_url]}).to_csv(engine.Config.EXCEL_PATH, index=False)
+
+        discover_manifest = engine.discover_manifest
+        def flaky_discover(task, force_navigation=False):
+            if task["payload"]["row"]["url"] == broken_url:
+                raise RuntimeError("browser crashed")
+            return discover_manifest(task, force_navigation)
+        monkeypatch.setattr(engine, "discover_manifest", flaky_discover)
+
+        engine.run_discover_stage(threads=1)
+        engine.run_download_stage(threads=1)
+        engine.run_extract_stage(processes=0)
+        assert engine.run_score_stage() == 2
+
+    with open(engine.stage_results_path(), encoding="utf-8") as f:
+        records = {r["url"]: r for r in map(json.loads, f)}
+    assert records[pdf_url]["处理状态"] != "失败"
+    assert records[broken_url]["处理状态"] == "失败"
+    assert "browser crashed" in records[broken_url]["提取文本"]
+
+    manifests = list(engine.ManifestStore().select())
+    assert [m["idx"] for m in manifests] == [1, 2] and manifests[1]["discover_error"]
+
+def test_extraction_pool_over_memory_limit_is_rebuilt(engine, monkeypatch):
+    monkeypatch.setattr(engine.Config, "EXTRACT_WORKER_MAX_RSS_MB", 1)
+    watchdog = engine.MemoryWatchdog()
+    monkeypatch.setattr(engine, "memory_watchdog", watchdog)
+
+    executor = engine.open_extraction_pool(1)
+    fresh = None
+    try:
+        executor.submit(sum, [1, 2]).result()  # 启动进程
+        watchdog.sample()
+        assert watchdog.should_recycle(executor)
+        assert 'kind="extract_worker"' in watchdog.to_prometheus()
+
+        fresh = engine.refresh_extraction_pool(executor, 1)
+        assert fresh is not executor and not watchdog.should_recycle(fresh)
+        assert fresh.submit(sum, [3, 4]).result() == 7
+        assert 'crawler_memory_recycles_total{kind="extract_pool"} 1' in watchdog.to_prometheus()
+    finally:
+        engine.close_extraction_pool(executor)
+        engine.close_extraction_pool(fresh)
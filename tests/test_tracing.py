@@ -0,0 +1,28 @@
+def test_spans_are_capped_without_output_path(engine, monkeypatch):
+    monkeypatch.setattr(engine.Config, "TRACE_FLUSH_SPANS", 5)
+    tracer = engine.Tracer()
+    for i in range(12):
+        with tracer.span("stage", step=i):
+            pass
+    spans = tracer.drain()
+    assert len(spans) == 5 and tracer.dropped == 7
+    assert [a["value"]["intValue"] for s in spans for a in s["attributes"] if a["key"] == "step"] == ["7", "8", "9", "10", "11"]
+
+def test_spans_are_flushed_with_output_path(engine, monkeypatch, tmp_path):
+    monkeypatch.setattr(engine.Config, "TRACE_FLUSH_SPANS", 5)
+    tracer = engine.Tracer()
+    tracer.output_path = tmp_path / "traces.otlp.jsonl"
+    for i in range(12):
+        with tracer.span("stage", step=i):
+            pass
+    assert tracer.dropped == 0 and tracer.flush() == 2
+    assert len(tracer.output_path.read_text(encoding="utf-8").splitlines()) == 3
+
+def test_process_pool_workers_drop_inherited_spans(engine, monkeypatch):
+    monkeypatch.setattr(engine.Config, "ENABLE_TRACING", True)
+    monkeypatch.setattr(engine.tracer, "output_path", engine.Config.TRACE_OUTPUT_PATH)
+    with engine.tracer.span("inherited"):
+        pass
+    engine._process_pool_worker_init()
+    assert engine.Config.ENABLE_TRACING is False
+    assert engine.tracer.output_path is None and engine.tracer.drain() == []
@@ -0,0 +1,43 @@
+import time
+
+def test_late_worker_cannot_complete_a_reclaimed_lease(engine):
+    queue = engine.open_work_queue(engine.Config.QUEUE_PATH)
+    queue.enqueue([{"task_id": "t1", "payload": {"row": {}}}])
+
+    first = queue.lease("worker-a", lease_seconds=0.05, max_attempts=3)
+    time.sleep(0.1)  # worker-a 失联，租约过期
+    second = queue.lease("worker-b", lease_seconds=60, max_attempts=3)
+    assert first["task_id"] == second["task_id"] == "t1" and second["attempts"] == 2
+
+    assert queue.heartbeat("t1", "worker-a", 60) is False
+    assert queue.complete("t1", "worker-b", [{"result": "b"}]) is True
+    assert queue.complete("t1", "worker-a", [{"result": "a"}]) is False
+    assert queue.fail("t1", "worker-a", "late error", max_attempts=3) is False
+    assert list(queue.iter_results()) == [{"result": "b"}]
+    assert queue.stats()["done"] == 1
+
+def test_final_failure_writes_failure_records(engine):
+    queue = engine.open_work_queue(engine.Config.QUEUE_PATH)
+    queue.enqueue([{"task_id": "t1", "payload": {}}])
+    queue.lease("worker-a", 60, 2)
+    assert queue.fail("t1", "worker-a", "boom", max_attempts=2) is True
+    queue.lease("worker-a", 60, 2)
+    assert queue.fail("t1", "worker-a", "boom", max_attempts=2, records=[{"处理状态": "失败"}]) is False
+    assert queue.stats()["failed"] == 1
+    assert list(queue.iter_results()) == [{"处理状态": "失败"}]
+
+def test_task_whose_lease_keeps_expiring_is_failed(engine):
+    queue = engine.open_work_queue(engine.Config.QUEUE_PATH)
+    row = {"编号": 5, "url": "https://a.gov/hang"}
+    queue.enqueue([{"task_id": "t1", "payload": {"idx": 4, "row": row, "url_column": "url", "duplicates": [{**row, "编号": 6}]}}])
+
+    for attempt in range(1, 4):  # 每次租用的工作进程都卡死，租约过期
+        task = queue.lease(f"worker-{attempt}", lease_seconds=0.01, max_attempts=3)
+        assert task["attempts"] == attempt
+        time.sleep(0.03)
+
+    assert queue.lease("worker-4", lease_seconds=60, max_attempts=3) is None
+    assert queue.stats()["failed"] == 1
+    records = list(queue.iter_results())
+    assert [r["编号"] for r in records] == [5, 6]
+    assert all(r["处理状态"] == "失败-任务异常" and "租约过期 3 次" in r["提取文本"] for r in records)
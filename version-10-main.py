@@ -1,33 +1,105 @@
+from __future__ import annotations  # 注解不在定义时求值，延迟导入的模块可以直接用于类型注解
+
 import os
+import sys
 import re
 import time
 import random
 import json
+import gzip
+import codecs
+import zlib
 import threading
-import pandas as pd
-import pdfplumber
-import requests
+import sqlite3
+import socket
+import hashlib
+import argparse
+import multiprocessing
+import functools
+import itertools
+import importlib
+import importlib.util
+import contextvars
+import tracemalloc
+from multiprocessing import connection as mp_connection
 import logging
-from typing import Optional, Tuple, Dict, List, Any
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple, Dict, List, Any, Callable
+from contextlib import contextmanager, closing
 
 from pathlib import Path
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, unquote
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException, ElementClickInterceptedException
-from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse, unquote, urlsplit, urlunsplit, parse_qsl, urlencode
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type, RetryError
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+class _LazyModule:
+    """
+    首次访问属性（或调用）时才导入的模块或模块中的对象。
+    pandas、selenium、pdfplumber 等重量级依赖合计导入耗时接近1秒，
+    queue-status 等不需要它们的子命令因此可以在几十毫秒内启动。
+    注意：except 子句需要真正的异常类，应写成 selenium_exceptions.TimeoutException 这样的属性访问。
+    """
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            target = importlib.import_module(self._module_name)
+            self._target = getattr(target, self._attribute) if self._attribute else target
+        return self._target
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        loaded = '已导入' if self._target is not None else '未导入'
+        return f"<延迟导入 {self._module_name}{'.' + self._attribute if self._attribute else ''} ({loaded})>"
+
+pd = _LazyModule('pandas')
+np = _LazyModule('numpy')
+pdfplumber = _LazyModule('pdfplumber')
+openpyxl = _LazyModule('openpyxl')
+requests = _LazyModule('requests')
+BeautifulSoup = _LazyModule('bs4', 'BeautifulSoup')
+webdriver = _LazyModule('selenium.webdriver')
+By = _LazyModule('selenium.webdriver.common.by', 'By')
+Service = _LazyModule('selenium.webdriver.chrome.service', 'Service')
+WebDriverWait = _LazyModule('selenium.webdriver.support.ui', 'WebDriverWait')
+EC = _LazyModule('selenium.webdriver.support.expected_conditions')
+selenium_exceptions = _LazyModule('selenium.common.exceptions')
+cProfile = _LazyModule('cProfile')
+pstats = _LazyModule('pstats')
+
+def _optional_module(module_name: str, attribute: Optional[str] = None) -> Optional[_LazyModule]:
+    """可选依赖：已安装时返回延迟导入对象，未安装时返回None（只查找，不导入）"""
+    try:
+        found = importlib.util.find_spec(module_name) is not None
+    except ImportError:
+        found = False
+    return _LazyModule(module_name, attribute) if found else None
+
+# 可选的快速HTML解析后端（未安装时自动回退到 BeautifulSoup）
+SelectolaxHTMLParser = _optional_module('selectolax.lexbor', 'LexborHTMLParser')
+lxml_html = _optional_module('lxml.html')
+lxml_etree = _optional_module('lxml.etree')
+# 可选：psutil 用于统计工作进程（含Chrome子进程）的内存，未安装时在Linux上读取 /proc
+psutil = _optional_module('psutil')
+pa = _optional_module('pyarrow')
+pq = _optional_module('pyarrow.parquet')
+zstandard = _optional_module('zstandard')
 # 移除了未使用的zipfile和mimetypes
 
 # ========= 日志配置 (Logging Configuration) ==========
 # 设置日志级别和格式，同时输出到文件和控制台
+# 每行带上当前追踪ID的前16位（无追踪上下文时为 -），便于从交错的并发日志中还原单个URL的时间线
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(levelname)s - [%(trace_id)s] %(message)s',
     handlers=[
         logging.FileHandler('scraper.log', encoding='utf-8'),
         logging.StreamHandler()
@@ -35,6 +107,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+_profiled_task: contextvars.ContextVar = contextvars.ContextVar('profiled_task', default=False)  # 当前任务是否被抽中剖析
+
+class TraceContextFilter(logging.Filter):
+    """为日志记录添加 trace_id 字段"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current_span.get()
+        record.trace_id = span.trace_id[:16] if span is not None else '-'
+        return True
+
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(TraceContextFilter())
+
 # ========= 核心参数配置 (Configuration Class) ==========
 class Config:
     """
@@ -48,16 +133,33 @@ class Config:
     PDF_SAVE_DIR = PROJECT_DIR / "0928-oecd-output_pdfs"
     CSV_OUTPUT = PROJECT_DIR / "0928-oecd_results.csv"
     TEMP_DIR = PROJECT_DIR / "temp"
+    PAGE_CACHE_PATH = PROJECT_DIR / "page_cache.sqlite3"  # 跨URL、跨运行共享的页面缓存
+    QUEUE_PATH = PROJECT_DIR / "crawl_queue.sqlite3"  # 多进程/多机器共享的工作队列（放在共享磁盘上）
     
     # 支持的输入文件格式
     SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls']
     
+    INPUT_BATCH_SIZE = 5000  # 流式读取输入文件时每批的行数
+    URL_DETECTION_SAMPLE = 200  # 查找URL列时每列抽样的行数
+    URL_COLUMN_MIN_DENSITY = 0.3  # 抽样值中含URL的比例达到该值才认为是URL列
+    SCHEDULER_QUEUE_FACTOR = 4  # 线程池模式下在途任务数 = MAX_THREADS × 该值，其余任务留在输入中
+    INPUT_COLUMNS = None  # 只读取这些列（URL列总会被读取）；None 表示读取全部列（结果表保留所有原始列）
+    
     # 可能的URL列名（按优先级排序），用于智能查找
     URL_COLUMN_CANDIDATES = [
         "Public access URL", "URL", "url", "link", "Link", "网址", "链接",
         "Policy URL", "Document URL", "Source URL"
     ]
     
+    # URL规范化（去重和缓存键）时移除的跟踪参数，只包含不会影响页面内容的广告/统计参数；
+    # ref、source、spm 等常被网站用作内容参数，不在其中（需要时自行加入）
+    TRACKING_QUERY_PARAMS = [
+        'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid', 'ttclid',
+        'igshid', 'mc_cid', 'mc_eid', '_ga', '_gl',
+        'pk_campaign', 'pk_kwd', 'pk_source', 'pk_medium', 'pk_content'
+    ]
+    TRACKING_QUERY_PREFIXES = ['utm_', 'mtm_', 'hsa_']  # 以这些前缀开头的参数同样移除
+    
     # ChromeDriver路径（自动检测，请确保你的路径包含在内或已添加到系统PATH）
     CHROMEDRIVER_PATHS = [
         "/opt/homebrew/bin/chromedriver",  # macOS Homebrew
@@ -76,18 +178,122 @@ class Config:
     RANDOM_DELAY_MAX = 5  # 随机延迟最大时间（秒）
     MAX_RETRIES = 3  # 网络请求和核心处理的最大重试次数
     
+    # ========= 多进程工作模式 (Worker Processes) ==========
+    WORKER_PROCESSES = 0  # >0 时启用多进程模式：每个进程独占一个浏览器，崩溃互不影响（0 表示使用线程池）
+    WORKER_MAX_RSS_MB = 2048  # 工作进程（含chromedriver/Chrome子进程）内存上限，超过后回收重启
+    WORKER_MAX_TASKS = 100  # 每个工作进程处理多少个URL后主动重启，防止内存缓慢泄漏
+    WORKER_TASK_GRACE_SECONDS = 300  # 超过时间预算多久仍未返回则判定进程卡死并强制重启
+    DRIVER_MAX_USES = 30  # 进程内复用的浏览器处理多少个URL后重建
+    
+    # ========= 内存看门狗 (Memory Watchdog) ==========
+    MEMORY_WATCHDOG_INTERVAL = 15  # 内存采样间隔（秒），0 表示禁用
+    DRIVER_MAX_RSS_MB = 1536  # 单个 chromedriver+Chrome 进程树上限，超过后当前URL结束即关闭该浏览器
+    PARSE_WORKER_MAX_RSS_MB = 1024  # HTML解析进程池中单个进程的上限，超过后重建进程池
+    EXTRACT_WORKER_MAX_RSS_MB = 2048  # 文档提取进程池（extract/reextract）中单个进程的上限，超过后在批次之间重建进程池
+    PYTHON_MAX_RSS_MB = 4096  # Python进程内存告警阈值（0 表示不检查）
+    TRACEMALLOC_TOP_N = 0  # >0 时启用 tracemalloc，超过告警阈值时在日志中列出分配最多的N个位置（有额外开销）
+    
+    # ========= 监控指标 (Metrics) ==========
+    METRICS_PORT = 0  # >0 时在 127.0.0.1 上提供 Prometheus 文本格式的 /metrics 端点
+    METRICS_JSON_PATH = PROJECT_DIR / "stage_metrics.json"  # 运行结束时写出各阶段耗时统计
+    ENABLE_TRACING = True  # 为每个输入行记录追踪span（导航、页面、下载、提取）
+    TRACE_OUTPUT_PATH = PROJECT_DIR / "traces.otlp.jsonl"  # OTLP JSON Lines 格式，可导入 Jaeger/Tempo 等工具
+    TRACE_FLUSH_SPANS = 2000  # 内存中缓存多少个span后追加写入文件
+    
+    # ========= 性能剖析 (Profiling) ==========
+    PROFILE_MODE = 'off'  # 'off' | 'sample'（统计采样，按阶段输出 collapsed stack）| 'cprofile'
+    PROFILE_TASK_FRACTION = 0.1  # 剖析的URL任务比例，1.0 表示整个运行
+    PROFILE_INTERVAL_MS = 10  # 采样间隔（毫秒）
+    PROFILE_OUTPUT_DIR = PROJECT_DIR / "profiles"
+    
+    # 单个URL的预算（导航、下载、提取共享），耗尽后停止并保留已提取的部分结果
+    URL_TIME_BUDGET_SECONDS = 900  # 每个输入行的最长处理时间（秒），0 表示不限制
+    URL_BYTE_BUDGET_MB = 300  # 每个输入行最多下载的字节数（MB），0 表示不限制
+    
     # 智能导航配置
     ENABLE_SMART_NAVIGATION = True  # 是否启用智能导航功能（使用Selenium递归查找AI子页面）
     MAX_NAVIGATION_DEPTH = 2  # 最大导航深度 (0: 仅当前页; 1: 当前页+一层子页面)
     MAX_AI_LINKS_PER_PAGE = 3  # 每页最多跟踪的AI相关链接数
     MIN_CONTENT_LENGTH = 200  # 页面内容最小长度才保存（防止保存空页或导航页）
+    NAVIGATION_TABS = 4  # 同一层的子页面最多同时在几个标签页中并行渲染（1 表示逐个渲染）
+    TAB_POLL_INTERVAL = 0.2  # 轮流检查各标签页加载状态的间隔（秒）
+    TAB_SETTLE_SECONDS = 2  # 一批标签页滚动后共用的等待时间（秒），让懒加载内容完成
+    
+    # 礼貌抓取配置（按主机，跨线程共享）
+    PER_HOST_MAX_CONCURRENCY = 2  # 同一主机同时打开的页面数上限
+    PER_HOST_MIN_INTERVAL = 1.5  # 同一主机相邻两次页面请求的最小间隔（秒）
+    
+    # 工作队列配置（worker 模式）
+    QUEUE_LEASE_SECONDS = 1800  # 任务租约时长（秒），应大于 URL_TIME_BUDGET_SECONDS
+    QUEUE_HEARTBEAT_SECONDS = 60  # 处理中任务的续约间隔（秒）
+    QUEUE_POLL_SECONDS = 30  # 队列暂时为空但仍有租用中任务时的轮询间隔（秒）
+    QUEUE_MAX_ATTEMPTS = 3  # 任务最多尝试次数，超过后记为失败
+    
+    # 页面缓存配置（页面文本、文档链接、AI子链接）
+    ENABLE_PAGE_CACHE = True  # 命中缓存的页面不再启动浏览器渲染
+    PAGE_CACHE_TTL_HOURS = 72  # 缓存有效期（小时），过期条目会被重新渲染
     
     # 弹窗处理配置
     POPUP_DETECTION_TIMEOUT = 3  # 弹窗检测超时时间（秒）
     MAX_POPUP_ATTEMPTS = 5  # 最大弹窗处理尝试次数
     
+    # HTML解析配置
+    HTML_PARSER_BACKEND = 'auto'  # 'auto' | 'selectolax' | 'lxml' | 'bs4'，auto 选择最快的可用后端
+    PARSE_PROCESS_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # 解析进程池大小（0 表示不使用进程池）
+    PARSE_OFFLOAD_MIN_BYTES = 512 * 1024  # 超过该大小的页面交给进程池解析
+    
+    # 分阶段流水线配置（discover / download / extract / score / export 子命令）
+    STAGE_DIR = PROJECT_DIR / "stages"  # 各阶段持久化的状态：文档清单、结果记录
+    ENABLE_EXTRACTION_CACHE = True  # 按文件内容哈希缓存文档提取文本
+    EXTRACTION_CACHE_PATH = PROJECT_DIR / "extraction_cache.sqlite3"
+    EXTRACT_PROCESSES = max(1, (os.cpu_count() or 2) - 1)  # extract 阶段的提取进程数（0 表示在主进程内提取）
+    
+    # 文本存储配置
+    TEXT_STORAGE = 'sharded'  # 'sharded' 写入压缩分片文本存储；'files' 每行一个 .txt 文件（写入 SAVE_DIR）
+    TEXT_STORE_DIR = PROJECT_DIR / "0928-oecd-output_text_store"
+    TEXT_STORE_CODEC = 'auto'  # 'auto' | 'zstd' | 'gzip'，auto 在安装了 zstandard 时使用 zstd
+    TEXT_STORE_LEVEL = 10  # 压缩级别（gzip 最高为9）
+    TEXT_STORE_SHARD_MB = 256  # 单个分片文件的大小上限，超过后滚动到新分片
+    
+    # 全文检索配置
+    ENABLE_SEARCH_INDEX = True  # 保存文本时增量更新 SQLite FTS5 全文检索索引（search 子命令）
+    SEARCH_INDEX_PATH = PROJECT_DIR / "search_index.sqlite3"
+    
+    # 近似重复文档检测配置（MinHash + LSH）
+    ENABLE_NEAR_DUP_DETECTION = True
+    NEAR_DUP_INDEX_PATH = PROJECT_DIR / "near_duplicates.sqlite3"
+    NEAR_DUP_THRESHOLD = 0.8  # 估计的 Jaccard 相似度达到该值视为近似重复
+    NEAR_DUP_NUM_PERM = 128  # MinHash 签名长度
+    NEAR_DUP_BANDS = 16  # LSH 分段数（每段 NUM_PERM / BANDS 个值）
+    NEAR_DUP_SHINGLE_WORDS = 5  # 每个 shingle 的词数
+    NEAR_DUP_MAX_CANDIDATES = 200  # 每个文档最多比较的候选数
+    SKIP_NEAR_DUPLICATE_DOCUMENTS = False  # 与其他行文档近似重复的文档只保留引用，不保存、不评分全文
+    
+    # 结果输出配置
+    RESULTS_FORMATS = ['parquet', 'csv']  # Parquet 写在结果CSV旁（同名 .parquet），包含完整文本；去掉 'csv' 则不再写CSV
+    PARQUET_ROW_GROUP_SIZE = 500  # 每个行组的记录数，结果按行组边到达边写出
+    CSV_FLUSH_ROWS = 500  # 抓取过程中结果CSV每攒满多少条记录追加写出一次
+    CSV_CELL_MAX_CHARS = 32000  # CSV单元格最大字符数（Excel单元格上限为32767）
+    
     # 文件大小限制（MB）
     MAX_PDF_SIZE_MB = 50
+    
+    # 文档探测配置（下载前用HEAD/1KB范围请求确认链接确实是文档）
+    ENABLE_DOCUMENT_PROBE = True  # 关闭后按原方式直接下载排序靠前的链接
+    PROBE_THREADS = 8  # 每个URL并发探测的链接数
+    PROBE_TIMEOUT = 15  # 单次探测超时时间（秒）
+    PROBE_CANDIDATE_LIMIT = 50  # 每个URL最多探测的候选链接数
+    ENABLE_PROBE_CACHE = True  # 缓存探测结果（存放在页面缓存库 PAGE_CACHE_PATH 中，但不受 ENABLE_PAGE_CACHE 影响）
+
+    # 站点配置（site profile）：按站点调整页面信息的来源，例如 version-10-oecd.py
+    PAGE_INFO_COUNTRY_URL_PATTERN = None  # 正则（第1组为国家），匹配到时用URL中的国家代替输入行的 Country 列
+    PAGE_INFO_TITLE_FROM_HEADING = False  # True 时政策标题使用落地页的 h1 标题（文件名和元数据），否则使用 Policy initiative ID
+
+    # 站点适配器（site_adapters/ 中的插件）：已知域名直接通过HTTP接口获取内容和文档列表，不启动浏览器
+    ENABLE_SITE_ADAPTERS = True  # 适配器无法处理的URL回退到浏览器智能导航
+    SITE_ADAPTERS = []  # 启用的插件（site_adapters 包中的模块名）；'oecd' 的接口地址只在本地夹具网站上验证过，确认真实接口后再加入
+    SITE_ADAPTER_EXTRA_DOMAINS = {}  # 插件名 -> 额外匹配的主机，例如 {'oecd': ['127.0.0.1']} 指向本地夹具网站
+    SITE_ADAPTER_TIMEOUT = 30  # 接口请求超时时间（秒）
 
     # OECD网站特定的AI和治理关键词，用于判断相关性
     AI_GOVERNANCE_KEYWORDS = [
@@ -114,83 +320,908 @@ USER_AGENTS = [
 driver_lock = threading.Lock() # 用于保护浏览器驱动初始化过程
 session_cookies = {} # 存储会话cookies
 
+class HostPoliteness:
+    """
+    按主机的礼貌抓取控制：限制同一主机的并发页面数，并保证相邻请求之间的最小间隔。
+    所有工作线程共享同一个实例。
+    """
+    def __init__(self, max_concurrency: int, min_interval: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.Semaphore(self.max_concurrency)
+            return self._semaphores[host]
+
+    def acquire(self, url: str, blocking: bool = True) -> bool:
+        """获取主机配额；非阻塞模式下配额不足时返回False。获取成功后按最小间隔等待。"""
+        host = urlparse(url).netloc.lower()
+        if not self._semaphore(host).acquire(blocking=blocking):
+            return False
+        
+        # 预约下一个可用时间片，保证同一主机请求之间的间隔
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+        return True
+
+    def release(self, url: str) -> None:
+        """释放主机配额"""
+        self._semaphore(urlparse(url).netloc.lower()).release()
+
+host_politeness = HostPoliteness(Config.PER_HOST_MAX_CONCURRENCY, Config.PER_HOST_MIN_INTERVAL)
+
+class BudgetExceeded(Exception):
+    """单个URL任务的时间或字节预算已耗尽"""
+
+class TaskBudget:
+    """
+    单个URL任务的时间和字节预算，随任务传递到导航、下载和提取各阶段。
+    各阶段在安全点调用 check()/consume_bytes() 协作式取消，并用 timeout() 收紧网络超时。
+    一旦耗尽，exhausted_reason 记录原因，之后的检查都会立即失败。
+    """
+    def __init__(self, time_limit: float = 0, byte_limit: int = 0):
+        self.started = time.time()
+        self.deadline = self.started + time_limit if time_limit else None
+        self.byte_limit = byte_limit or None
+        self.bytes_used = 0
+        self.exhausted_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'TaskBudget':
+        """按 Config 中的默认预算创建"""
+        return cls(Config.URL_TIME_BUDGET_SECONDS, Config.URL_BYTE_BUDGET_MB * 1024 * 1024)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.exhausted_reason is not None
+
+    def remaining_time(self) -> Optional[float]:
+        """剩余时间（秒），不限时返回None"""
+        return None if self.deadline is None else max(0.0, self.deadline - time.time())
+
+    def _exhaust(self, reason: str) -> None:
+        with self._lock:
+            if self.exhausted_reason is None:
+                self.exhausted_reason = reason
+        raise BudgetExceeded(self.exhausted_reason)
+
+    def check(self, stage: str = '') -> None:
+        """检查预算，耗尽时抛出 BudgetExceeded"""
+        if self.exhausted_reason is not None:
+            raise BudgetExceeded(self.exhausted_reason)
+        if self.deadline is not None and time.time() >= self.deadline:
+            self._exhaust(f"时间预算耗尽 ({self.deadline - self.started:.0f}秒){' @' + stage if stage else ''}")
+
+    def consume_bytes(self, n: int) -> None:
+        """记录已下载字节数，超过字节预算时抛出 BudgetExceeded"""
+        with self._lock:
+            self.bytes_used += n
+            over = self.byte_limit is not None and self.bytes_used > self.byte_limit
+        if over:
+            self._exhaust(f"字节预算耗尽 ({self.byte_limit / 1024 / 1024:.1f}MB)")
+        self.check()
+
+    def timeout(self, default: float) -> float:
+        """网络/等待超时：不超过剩余时间（至少1秒）"""
+        remaining = self.remaining_time()
+        return default if remaining is None else max(1.0, min(default, remaining))
+
+# --- 阶段耗时统计 (Stage Metrics) ---
+class StageMetrics:
+    """
+    按 (阶段, 主机, 方法, 结果) 统计耗时直方图，格式与 Prometheus histogram 一致（累计桶、总和、计数）。
+    所有线程共享同一个实例；多进程模式下工作进程把增量（drain）随结果发回主进程合并（merge）。
+    """
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str, str, str], Dict] = {}
+
+    def _new_series(self) -> Dict:
+        return {'buckets': [0] * len(self.BUCKETS), 'sum': 0.0, 'count': 0, 'max': 0.0}
+
+    def observe(self, stage: str, seconds: float, host: str = '', method: str = '', outcome: str = 'ok') -> None:
+        key = (stage, host or '-', method or '-', outcome)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self._new_series()
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += seconds
+            series['count'] += 1
+            series['max'] = max(series['max'], seconds)
+
+    def snapshot(self) -> List[Dict]:
+        """所有序列的副本（可JSON序列化）"""
+        with self._lock:
+            return [{'stage': k[0], 'host': k[1], 'method': k[2], 'outcome': k[3],
+                     'buckets': list(v['buckets']), 'sum': v['sum'], 'count': v['count'], 'max': v['max']}
+                    for k, v in self._series.items()]
+
+    def drain(self) -> List[Dict]:
+        """返回并清空当前统计（工作进程发送增量用）"""
+        snapshot = self.snapshot()
+        with self._lock:
+            self._series.clear()
+        return snapshot
+
+    def merge(self, snapshot: List[Dict]) -> None:
+        """合并其他进程的统计"""
+        with self._lock:
+            for item in snapshot:
+                key = (item['stage'], item['host'], item['method'], item['outcome'])
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = self._new_series()
+                series['buckets'] = [a + b for a, b in zip(series['buckets'], item['buckets'])]
+                series['sum'] += item['sum']
+                series['count'] += item['count']
+                series['max'] = max(series['max'], item['max'])
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        def labels(item, le: Optional[str] = None):
+            pairs = [(k, str(item[k])) for k in ('stage', 'host', 'method', 'outcome')]
+            if le is not None:
+                pairs.append(('le', le))
+            return '{' + ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs) + '}'
+        
+        lines = ['# HELP crawler_stage_seconds Time spent per crawl stage', '# TYPE crawler_stage_seconds histogram']
+        for item in sorted(self.snapshot(), key=lambda s: (s['stage'], s['host'], s['method'], s['outcome'])):
+            for bound, count in zip(self.BUCKETS, item['buckets']):
+                lines.append(f"crawler_stage_seconds_bucket{labels(item, str(bound))} {count}")
+            lines.append(f"crawler_stage_seconds_bucket{labels(item, '+Inf')} {item['count']}")
+            lines.append(f"crawler_stage_seconds_sum{labels(item)} {item['sum']:.6f}")
+            lines.append(f"crawler_stage_seconds_count{labels(item)} {item['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def stage_totals(self) -> List[Dict]:
+        """按阶段汇总（忽略主机等标签），按总耗时从高到低排序"""
+        totals: Dict[str, Dict] = {}
+        for item in self.snapshot():
+            total = totals.setdefault(item['stage'], {'stage': item['stage'], 'sum': 0.0, 'count': 0, 'errors': 0, 'max': 0.0})
+            total['sum'] += item['sum']
+            total['count'] += item['count']
+            total['max'] = max(total['max'], item['max'])
+            if item['outcome'] != 'ok':
+                total['errors'] += item['count']
+        return sorted(totals.values(), key=lambda t: t['sum'], reverse=True)
+
+    def dump_json(self, path: Path) -> None:
+        """运行结束时写出全部统计"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'buckets': list(self.BUCKETS), 'stages': self.stage_totals(), 'series': self.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+
+stage_metrics = StageMetrics()
+
+def _host_label(url: str) -> str:
+    return urlparse(url).netloc.lower() if isinstance(url, str) and url.startswith(('http://', 'https://')) else ''
+
+@contextmanager
+def stage_timer(stage: str, url: str = '', method: str = ''):
+    """统计一个阶段的耗时并记录同名追踪span；抛出异常时记为 outcome=error（异常照常向上抛出）"""
+    host = _host_label(url)
+    with tracer.span(stage, host=host, method=method, url=url if host else ''):
+        start = time.perf_counter()
+        outcome = 'ok'
+        task_profiler.enter_stage(stage)
+        try:
+            yield
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            task_profiler.exit_stage()
+            stage_metrics.observe(stage, time.perf_counter() - start, host, method, outcome)
+
+def timed_stage(stage: str, method: str = ''):
+    """stage_timer 的装饰器形式：第一个参数是URL时按其主机标注"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage, args[0] if args else '', method):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def start_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    """在本机启动 Prometheus 文本格式的 /metrics 端点（后台线程）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') not in ('', '/metrics'):
+                self.send_error(404)
+                return
+            body = (stage_metrics.to_prometheus() + memory_watchdog.to_prometheus()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    try:
+        server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    except OSError as e:
+        logger.warning(f"⚠️ 指标端点启动失败 (端口 {port}): {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"📈 指标端点: http://127.0.0.1:{server.server_address[1]}/metrics")
+    print(f"📈 指标端点: http://127.0.0.1:{server.server_address[1]}/metrics")
+    return server
+
+def save_stage_metrics(path: Path) -> None:
+    """运行结束时打印阶段耗时汇总并写出JSON"""
+    print_stage_summary()
+    try:
+        stage_metrics.dump_json(path)
+        print(f"   📈 阶段耗时统计: {path}")
+    except Exception as e:
+        logger.error(f"❌ 保存阶段耗时统计失败: {e}")
+
+def print_stage_summary() -> None:
+    """打印各阶段耗时汇总，看时间花在哪里"""
+    totals = stage_metrics.stage_totals()
+    if not totals:
+        return
+    print("\n⏱️ 阶段耗时汇总 (按总耗时排序):")
+    print(f"   {'阶段':<18}{'次数':>8}{'总耗时(秒)':>14}{'平均(秒)':>12}{'最长(秒)':>12}{'失败':>8}")
+    for t in totals:
+        print(f"   {t['stage']:<18}{t['count']:>8}{t['sum']:>14.1f}{t['sum'] / t['count']:>12.2f}{t['max']:>12.1f}{t['errors']:>8}")
+
+# --- 请求追踪 (Tracing) ---
+class Span:
+    """一个追踪区间；trace_id/span_id 与 W3C Trace Context 和 OTLP 的格式一致"""
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_ns', 'end_ns', 'attributes', 'error')
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = '', attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = {k: v for k, v in (attributes or {}).items() if v not in (None, '')}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent 头，用于跨线程/进程/队列传递上下文"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value not in (None, ''):
+            self.attributes[key] = value
+
+    def to_otlp(self) -> Dict:
+        def otlp_value(value):
+            if isinstance(value, bool):
+                return {'boolValue': value}
+            if isinstance(value, int):
+                return {'intValue': str(value)}
+            if isinstance(value, float):
+                return {'doubleValue': value}
+            return {'stringValue': str(value)}
+        
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': k, 'value': otlp_value(v)} for k, v in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+def parse_traceparent(traceparent: str) -> Optional[Tuple[str, str]]:
+    """解析 traceparent，返回 (trace_id, parent_span_id)"""
+    parts = (traceparent or '').split('-')
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return None
+
+class Tracer:
+    """
+    轻量级追踪器：每个输入行一个trace，导航、页面、下载、提取等阶段是其中的span。
+    当前span保存在 contextvars 中；跨线程用 submit_in_context 传递，
+    跨进程/队列通过 traceparent 字符串传递，子进程的span随结果发回主进程合并。
+    已结束的span缓存在内存中，超过 TRACE_FLUSH_SPANS 时追加写入 OTLP JSON Lines 文件；
+    没有输出文件时（output_path 为None）只保留最近的 TRACE_FLUSH_SPANS 个span，更早的直接丢弃。
+    """
+    ROOT_SPAN_NAME = 'url'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._finished: List[Dict] = []
+        self._slowest: List[Dict] = []
+        self.output_path: Optional[Path] = None
+        self.dropped = 0  # 没有输出文件时丢弃的span数
+
+    def start_span(self, name: str, parent: Any = None, **attributes) -> Span:
+        """parent 为 Span、traceparent 字符串或 None（使用当前上下文，没有时开启新的trace）"""
+        if parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, Span):
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+        remote = parse_traceparent(parent) if isinstance(parent, str) else None
+        if remote:
+            # 父span_id全为0表示只指定trace、没有父span（如队列任务的多次尝试共享同一个trace）
+            return Span(name, remote[0], '' if remote[1] == '0' * 16 else remote[1], attributes)
+        return Span(name, os.urandom(16).hex(), '', attributes)
+
+    def end_span(self, span: Span, error: Optional[str] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error:
+            span.error = error[:500]
+        self._record([span.to_otlp()])
+
+    @contextmanager
+    def span(self, name: str, parent: Any = None, **attributes):
+        """在 with 块内把新span设为当前span"""
+        if not Config.ENABLE_TRACING:
+            yield None
+            return
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span, error)
+
+    def _record(self, spans: List[Dict]) -> None:
+        if not Config.ENABLE_TRACING:
+            return
+        with self._lock:
+            self._finished.extend(spans)
+            for span in spans:
+                if span['name'] == self.ROOT_SPAN_NAME:
+                    self._remember_slow(span)
+            flush = self.output_path is not None and len(self._finished) >= Config.TRACE_FLUSH_SPANS
+            excess = len(self._finished) - Config.TRACE_FLUSH_SPANS
+            if self.output_path is None and excess > 0:
+                del self._finished[:excess]
+                self.dropped += excess
+        if flush:
+            self.flush()
+
+    def _remember_slow(self, root: Dict) -> None:
+        """记录最慢的输入行及其中耗时最长的几个span（调用方持有锁）"""
+        duration = (int(root['endTimeUnixNano']) - int(root['startTimeUnixNano'])) / 1e9
+        if len(self._slowest) >= 10 and duration <= self._slowest[-1]['seconds']:
+            return
+        children = [s for s in self._finished if s['traceId'] == root['traceId'] and s is not root
+                    and s['name'] != self.ROOT_SPAN_NAME and int(s['startTimeUnixNano']) >= int(root['startTimeUnixNano'])]
+        children.sort(key=lambda s: int(s['endTimeUnixNano']) - int(s['startTimeUnixNano']), reverse=True)
+        attrs = {a['key']: next(iter(a['value'].values())) for a in root['attributes']}
+        self._slowest.append({
+            'seconds': duration,
+            'trace_id': root['traceId'],
+            'url': attrs.get('url', ''),
+            'top_spans': [(s['name'], (int(s['endTimeUnixNano']) - int(s['startTimeUnixNano'])) / 1e9,
+                           next((a['value']['stringValue'] for a in s['attributes'] if a['key'] == 'host'), ''))
+                          for s in children[:3]],
+        })
+        self._slowest.sort(key=lambda item: item['seconds'], reverse=True)
+        del self._slowest[10:]
+
+    def drain(self) -> List[Dict]:
+        """返回并清空已结束的span（工作进程随结果发回主进程）"""
+        with self._lock:
+            spans, self._finished = self._finished, []
+        return spans
+
+    def merge(self, spans: List[Dict]) -> None:
+        """合并其他进程发回的span"""
+        if spans:
+            self._record(spans)
+
+    def flush(self, path: Optional[Path] = None) -> int:
+        """把缓存的span追加写入 OTLP JSON Lines 文件（每行一个 ExportTraceServiceRequest），返回写出的数量"""
+        path = path or self.output_path
+        spans = self.drain()
+        if not spans or path is None:
+            return 0
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': 'oecd-ai-crawler'}},
+                {'key': 'host.name', 'value': {'stringValue': socket.gethostname()}},
+            ]},
+            'scopeSpans': [{'scope': {'name': 'crawler'}, 'spans': spans}],
+        }]}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(request, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.error(f"❌ 写出追踪数据失败: {e}")
+            return 0
+        return len(spans)
+
+    def slowest(self) -> List[Dict]:
+        with self._lock:
+            return list(self._slowest)
+
+tracer = Tracer()
+
+def submit_in_context(executor, fn: Callable, *args, **kwargs):
+    """向线程池提交任务，并把当前追踪上下文（以及剖析抽样标记）带到工作线程"""
+    return executor.submit(contextvars.copy_context().run, _run_in_task_context, fn, *args, **kwargs)
+
+def _run_in_task_context(fn: Callable, *args, **kwargs):
+    """在工作线程中运行任务；所属URL任务被抽中采样剖析时，运行期间也采样该线程"""
+    if not _profiled_task.get():
+        return fn(*args, **kwargs)
+    with task_profiler.sample_thread():
+        return fn(*args, **kwargs)
+
+def current_trace_id() -> str:
+    span = _current_span.get()
+    return span.trace_id if span is not None else ''
+
+def save_traces() -> None:
+    """运行结束时写出剩余的span，并打印最慢的URL"""
+    if not Config.ENABLE_TRACING:
+        return
+    tracer.flush()
+    print_slowest_traces()
+    if tracer.output_path:
+        print(f"   🧵 追踪数据: {tracer.output_path}")
+
+def print_slowest_traces(limit: int = 5) -> None:
+    """打印最慢的输入行及其中最耗时的阶段，按追踪ID可在日志和追踪文件中找到完整时间线"""
+    slowest = tracer.slowest()[:limit]
+    if not slowest:
+        return
+    print("\n🐢 最慢的URL:")
+    for item in slowest:
+        stages = ", ".join(f"{name}{f'@{host}' if host else ''} {seconds:.1f}s" for name, seconds, host in item['top_spans'])
+        print(f"   {item['seconds']:>7.1f}s  [{item['trace_id'][:16]}] {item['url'][:80]}")
+        if stages:
+            print(f"            ↳ {stages}")
+
+# --- 性能剖析 (Profiling) ---
+class TaskProfiler:
+    """
+    可选的性能剖析（Config.PROFILE_MODE）：
+      'sample'   - 统计采样：后台线程每隔 PROFILE_INTERVAL_MS 读取被剖析线程的调用栈，
+                   按当前阶段（stage_timer）分别累计，输出 collapsed stack 文件（flamegraph.pl / speedscope 可直接读取）
+      'cprofile' - 对抽中的URL任务运行 cProfile（同一时刻只剖析一个任务），每个任务一个 .prof 文件
+    PROFILE_TASK_FRACTION 决定剖析多少比例的URL任务（按规范URL哈希抽样，结果可复现），1.0 表示整个运行；
+    采样模式下，抽中任务通过 submit_in_context 交给其他线程（探测、下载等）的工作也一起采样。
+    每个进程把结果写入 PROFILE_OUTPUT_DIR，运行结束时由 merge_profiles 合并。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[int, List[str]] = {}  # 线程ID -> 阶段栈
+        self._sampled_threads: Dict[int, int] = {}  # 线程ID -> 嵌套计数
+        self._collapsed: Dict[str, Dict[str, int]] = {}
+        self._cprofile_lock = threading.Lock()
+        self._cprofile_count = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def mode(self) -> str:
+        return Config.PROFILE_MODE if Config.PROFILE_MODE in ('sample', 'cprofile') else 'off'
+
+    def should_profile(self, url: str) -> bool:
+        fraction = Config.PROFILE_TASK_FRACTION
+        if self.mode == 'off' or fraction <= 0:
+            return False
+        digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()
+        return int(digest[:8], 16) % 10000 < fraction * 10000
+
+    # --- 阶段标记（由 stage_timer 调用） ---
+    def enter_stage(self, stage: str) -> None:
+        if self._sampler is not None:
+            self._stages.setdefault(threading.get_ident(), []).append(stage)
+
+    def exit_stage(self) -> None:
+        if self._sampler is not None:
+            stack = self._stages.get(threading.get_ident())
+            if stack:
+                stack.pop()
+
+    # --- 统计采样 ---
+    def start_sampler(self) -> None:
+        if self.mode != 'sample' or self._sampler is not None:
+            return
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+        logger.info(f"🔬 采样剖析已启动 (间隔 {Config.PROFILE_INTERVAL_MS}ms, 任务比例 {Config.PROFILE_TASK_FRACTION:.0%})")
+
+    def _sample_loop(self) -> None:
+        interval = max(1, Config.PROFILE_INTERVAL_MS) / 1000
+        whole_run = Config.PROFILE_TASK_FRACTION >= 1
+        own_id = threading.get_ident()
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = [t for t in frames if t != own_id] if whole_run else list(self._sampled_threads)
+                for thread_id in thread_ids:
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    stages = self._stages.get(thread_id)
+                    stage = stages[-1] if stages else '(无阶段)'
+                    key = ';'.join(reversed(stack))
+                    bucket = self._collapsed.setdefault(stage, {})
+                    bucket[key] = bucket.get(key, 0) + 1
+
+    @contextmanager
+    def sample_thread(self):
+        """with 块内采样当前线程（可嵌套）"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._sampled_threads[thread_id] = self._sampled_threads.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._sampled_threads[thread_id] > 1:
+                    self._sampled_threads[thread_id] -= 1
+                else:
+                    del self._sampled_threads[thread_id]
+
+    @contextmanager
+    def profile_task(self, url: str):
+        """剖析一个URL任务（未抽中或未启用时不做任何事）"""
+        if not self.should_profile(url):
+            yield
+            return
+        if self.mode == 'sample':
+            token = _profiled_task.set(True)
+            try:
+                with self.sample_thread():
+                    yield
+            finally:
+                _profiled_task.reset(token)
+            return
+        
+        # cProfile 同一时刻只能有一个活动的剖析器，其他任务不剖析
+        if not self._cprofile_lock.acquire(blocking=False):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+            self._cprofile_count += 1
+            output_dir = Config.PROFILE_OUTPUT_DIR
+            output_dir.mkdir(parents=True, exist_ok=True)
+            name = generate_safe_filename(urlparse(url).netloc + urlparse(url).path, 60)
+            profile.dump_stats(str(output_dir / f"task.{os.getpid()}.{self._cprofile_count:04d}.{name}.prof"))
+        finally:
+            self._cprofile_lock.release()
+
+    def finish(self) -> None:
+        """停止采样并把本进程的 collapsed stack 写入输出目录"""
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+        with self._lock:
+            collapsed, self._collapsed = self._collapsed, {}
+        if not collapsed:
+            return
+        output_dir = Config.PROFILE_OUTPUT_DIR
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for stage, stacks in collapsed.items():
+            path = output_dir / f"stage.{generate_safe_filename(stage)}.{os.getpid()}.collapsed"
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.items():
+                    f.write(f"{stage};{stack} {count}\n")
+
+task_profiler = TaskProfiler()
+
+def clear_profiles(output_dir: Optional[Path] = None) -> None:
+    """删除上一次运行留下的剖析文件，避免被合并进本次结果"""
+    output_dir = output_dir or Config.PROFILE_OUTPUT_DIR
+    if output_dir.exists():
+        for path in list(output_dir.glob("stage.*.collapsed")) + list(output_dir.glob("task.*.prof")):
+            path.unlink(missing_ok=True)
+
+def merge_profiles(output_dir: Optional[Path] = None) -> None:
+    """合并各进程的剖析结果：所有 collapsed 文件 -> merged.collapsed，所有 .prof -> merged.prof"""
+    output_dir = output_dir or Config.PROFILE_OUTPUT_DIR
+    if not output_dir.exists():
+        return
+    collapsed_files = sorted(output_dir.glob("stage.*.collapsed"))
+    if collapsed_files:
+        merged: Dict[str, int] = {}
+        for path in collapsed_files:
+            for line in path.read_text(encoding='utf-8').splitlines():
+                stack, _, count = line.rpartition(' ')
+                if stack and count.isdigit():
+                    merged[stack] = merged.get(stack, 0) + int(count)
+        with open(output_dir / "merged.collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in sorted(merged.items()):
+                f.write(f"{stack} {count}\n")
+        print(f"   🔬 剖析结果: {output_dir / 'merged.collapsed'} (可用 flamegraph.pl 或 speedscope 查看)")
+    
+    prof_files = sorted(output_dir.glob("task.*.prof"))
+    if prof_files:
+        stats = pstats.Stats(str(prof_files[0]))
+        for path in prof_files[1:]:
+            stats.add(str(path))
+        stats.dump_stats(str(output_dir / "merged.prof"))
+        print(f"   🔬 剖析结果: {output_dir / 'merged.prof'} ({len(prof_files)} 个任务，可用 snakeviz 或 pstats 查看)")
+
 # --- 文件格式兼容性处理 (File Handling) ---
-def detect_and_read_file(file_path: Path) -> pd.DataFrame:
-    """智能检测并读取多种格式的文件（CSV/Excel）"""
+CSV_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'iso-8859-1']
+
+def sniff_csv_encoding(file_path: Path, prefix_bytes: int = 1024 * 1024) -> str:
+    """只读取文件开头的一段来判断CSV编码（BOM 优先），不再为每种候选编码重读整个文件"""
+    with open(file_path, 'rb') as f:
+        prefix = f.read(prefix_bytes)
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if len(prefix) == prefix_bytes and b'\n' in prefix:
+        prefix = prefix[:prefix.rindex(b'\n')]  # 截断处可能切开多字节字符
+    for encoding in CSV_ENCODINGS:
+        try:
+            prefix.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+def read_file_header(file_path: Path) -> List[str]:
+    """只读取表头（列名）"""
+    file_ext = file_path.suffix.lower()
+    if file_ext == '.csv':
+        return [str(c).strip() for c in pd.read_csv(file_path, encoding=sniff_csv_encoding(file_path), nrows=0).columns]
+    if file_ext == '.xlsx':
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        return [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+    return [str(c).strip() for c in pd.read_excel(file_path, engine='xlrd', nrows=0).columns]
+
+def iter_file_batches(file_path: Path, batch_size: Optional[int] = None,
+                      columns: Optional[List[str]] = None):
+    """
+    分批流式读取CSV/Excel，每批产出一个DataFrame（行索引在各批之间连续）。
+    CSV 按开头一段判断编码后用 chunksize 严格解码读取，所有列按字符串读取（各批类型一致，ID 不会变成 123.0）；
+    后面的内容无法按该编码解码时（例如开头是ASCII、后面是GBK），换下一个候选编码从头重读，跳过已产出的行；
+    .xlsx 用 openpyxl 只读模式逐行读取；.xls 没有流式读取方式，整表读入后分批产出。
+    columns 指定时只读取这些列（不存在的列忽略）。
+    """
     if not file_path.exists():
         raise FileNotFoundError(f"文件不存在: {file_path}")
-    
+    batch_size = batch_size or Config.INPUT_BATCH_SIZE
     file_ext = file_path.suffix.lower()
     
-    try:
-        if file_ext == '.csv':
-            # 尝试多种编码读取CSV
-            encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'iso-8859-1']
-            for encoding in encodings:
-                try:
-                    # 尝试读取，设置sep=None, engine='python' 尝试自动检测分隔符，但通常逗号是标准
-                    df = pd.read_csv(file_path, encoding=encoding)
-                    logger.info(f"成功读取CSV文件，编码: {encoding}")
-                    return df
-                except (UnicodeDecodeError, pd.errors.ParserError):
+    if file_ext == '.csv':
+        encoding = sniff_csv_encoding(file_path)
+        logger.info(f"CSV编码: {encoding}")
+        usecols = (lambda c: str(c).strip() in columns) if columns else None
+        yielded = 0  # 已产出的行数（行索引连续，换编码重读时按索引跳过）
+        while True:
+            try:
+                for batch in pd.read_csv(file_path, encoding=encoding, dtype=str, usecols=usecols, chunksize=batch_size):
+                    if batch.index[-1] < yielded:
+                        continue
+                    batch = batch[batch.index >= yielded]
+                    yielded += len(batch)
+                    yield batch
+                return
+            except UnicodeDecodeError as e:
+                base = 'utf-8' if encoding == 'utf-8-sig' else encoding
+                remaining = CSV_ENCODINGS[CSV_ENCODINGS.index(base) + 1:]
+                if not remaining:
+                    raise
+                logger.warning(f"⚠️ CSV第 {yielded} 行之后无法按 {encoding} 解码（{e.reason}），改用 {remaining[0]} 重读")
+                encoding = remaining[0]
+    
+    elif file_ext == '.xlsx':
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(next(rows, ()))]
+            keep = [i for i, c in enumerate(header) if not columns or c in columns]
+            start, buffer = 0, []
+            for row in rows:
+                if not any(value is not None for value in row):
                     continue
-            raise Exception("无法识别CSV文件编码或格式")
-            
-        elif file_ext in ['.xlsx', '.xls']:
-            # 读取Excel文件
-            engine = 'openpyxl' if file_ext == '.xlsx' else 'xlrd'
-            df = pd.read_excel(file_path, engine=engine)
-            logger.info(f"成功读取Excel文件: {file_ext}")
-            return df
-        else:
-            raise ValueError(f"不支持的文件格式: {file_ext}")
-            
+                buffer.append([row[i] if i < len(row) else None for i in keep])
+                if len(buffer) >= batch_size:
+                    yield pd.DataFrame(buffer, columns=[header[i] for i in keep], dtype=object,
+                                       index=range(start, start + len(buffer)))
+                    start, buffer = start + len(buffer), []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=[header[i] for i in keep], dtype=object,
+                                   index=range(start, start + len(buffer)))
+        finally:
+            workbook.close()
+    
+    elif file_ext == '.xls':
+        df = pd.read_excel(file_path, engine='xlrd', usecols=(lambda c: str(c).strip() in columns) if columns else None)
+        for start in range(0, len(df), batch_size):
+            yield df.iloc[start:start + batch_size]
+    else:
+        raise ValueError(f"不支持的文件格式: {file_ext}")
+
+def detect_and_read_file(file_path: Path) -> pd.DataFrame:
+    """智能检测并读取多种格式的文件（CSV/Excel），整表读入"""
+    try:
+        batches = list(iter_file_batches(file_path))
+        df = pd.concat(batches) if batches else pd.DataFrame(columns=read_file_header(file_path))
+        logger.info(f"成功读取文件: {file_path.suffix.lower()}")
+        return df
     except Exception as e:
         logger.error(f"❌ 读取文件失败 {file_path}: {e}")
         raise
 
+# 单元格中的URL：以空白、分号、竖线或尖括号/引号分隔（OECD导出中一个单元格常含多个URL）
+URL_IN_CELL_PATTERN = r'https?://[^\s;|<>"\']+'
+
+def url_column_density(df: pd.DataFrame, sample_size: Optional[int] = None) -> pd.Series:
+    """每一列的URL密度：抽样的非空值中包含 http(s):// 的比例（一次向量化计算所有列）"""
+    sample = df.head(sample_size or Config.URL_DETECTION_SAMPLE)
+    stacked = sample.stack()  # 丢弃空值，(行, 列) -> 值
+    if stacked.empty:
+        return pd.Series(0.0, index=df.columns)
+    has_url = stacked.astype(str).str.contains(r'https?://', case=False, regex=True)
+    return has_url.groupby(level=1).mean().reindex(df.columns, fill_value=0.0)
+
 def find_url_column(df: pd.DataFrame) -> Optional[str]:
-    """智能查找包含URL的列名"""
+    """
+    智能查找包含URL的列名：按URL密度给所有列打分。
+    预设的候选列名（按优先级）密度达到 Config.URL_COLUMN_MIN_DENSITY 时优先使用，否则选择密度最高的列；
+    没有任何列达到阈值时退回到存在的候选列名。
+    """
     df.columns = [str(c).strip() for c in df.columns]
+    density = url_column_density(df)
     
-    # 策略1: 匹配预设的候选列名
+    # 策略1: 匹配预设的候选列名（内容中确实有URL）
     for candidate in Config.URL_COLUMN_CANDIDATES:
-        if candidate in df.columns:
-            logger.info(f"找到URL列: {candidate}")
+        if candidate in df.columns and density[candidate] >= Config.URL_COLUMN_MIN_DENSITY:
+            logger.info(f"找到URL列: {candidate} (URL密度 {density[candidate]:.0%})")
             return candidate
     
-    # 策略2: 检查列内容，判断是否包含URL格式
-    for col in df.columns:
-        # 提取前10个非空值进行检查
-        sample_values = df[col].dropna().head(10).astype(str)
-        # 检查是否有任何值以 http:// 或 https:// 开头
-        if not sample_values.empty and sample_values.str.startswith(('http://', 'https://')).any():
-            logger.info(f"通过内容推断URL列: {col}")
-            return col
+    # 策略2: URL密度最高的列
+    if not density.empty and density.max() >= Config.URL_COLUMN_MIN_DENSITY:
+        best = density.idxmax()
+        logger.info(f"通过内容推断URL列: {best} (URL密度 {density[best]:.0%})")
+        return best
     
+    for candidate in Config.URL_COLUMN_CANDIDATES:
+        if candidate in df.columns:
+            logger.warning(f"⚠️ 没有URL密度达标的列，使用候选列名: {candidate}")
+            return candidate
     return None
 
-# --- 文本清理和处理函数 (Text Processing) ---
-def clean_text_for_csv(text: str) -> str:
+def strip_url_trailing_punctuation(url: str) -> str:
+    """
+    去掉从文本中匹配出的URL末尾的句读：'.' 和 ','；')' 只在URL中没有与之配对的 '(' 时去掉
+    （"见 (https://a.gov/x)" 去掉，https://en.wikipedia.org/wiki/Foo_(bar) 保留）。
     """
-    增强版文本清理。
-    移除特殊字符，合并多余空白，并进行CSV转义，限制长度防止Excel单元格溢出。
+    while True:
+        stripped = url.rstrip('.,')
+        if stripped.endswith(')') and stripped.count('(') < stripped.count(')'):
+            stripped = stripped[:-1]
+        if stripped == url:
+            return url
+        url = stripped
+
+def expand_url_cells(df: pd.DataFrame, url_column: str) -> pd.DataFrame:
+    """
+    把URL列中包含多个URL的单元格展开为多行（每个URL一个任务），没有URL的行被丢弃。
+    新增列：来源行（输入文件中的数据行号，从1开始）、URL序号（该单元格中的第几个URL）。
+    """
+    urls = df[url_column].astype(str).str.findall(URL_IN_CELL_PATTERN)
+    urls = urls.map(lambda found: [strip_url_trailing_punctuation(u) for u in found])
+    expanded = df.assign(**{url_column: urls, '来源行': df.index + 1}).explode(url_column)
+    expanded = expanded[expanded[url_column].notna()]
+    return expanded.assign(URL序号=expanded.groupby(level=0).cumcount() + 1)
+
+# --- URL规范化 (URL Canonicalization) ---
+# 目录默认页：/dir/index.html 与 /dir/ 视为同一页面
+INDEX_PAGE_NAMES = {
+    'index.html', 'index.htm', 'index.php', 'index.asp', 'index.aspx', 'index.jsp',
+    'default.html', 'default.htm', 'default.asp', 'default.aspx'
+}
+
+def canonicalize_url(url: str) -> str:
+    """
+    将等价URL规范化为同一个字符串，用于去重和缓存键：
+    http/https 统一为 https，主机名小写，去掉默认端口、片段、跟踪参数（Config.TRACKING_QUERY_PARAMS）、
+    目录默认页和末尾的'/'，其余查询参数按名称排序。
     """
+    if not url or not isinstance(url, str):
+        return ""
+    
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+    
+    host = (parts.hostname or '').lower().rstrip('.')
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    
+    path = re.sub(r'/{2,}', '/', parts.path)
+    segments = path.split('/')
+    if segments and segments[-1].lower() in INDEX_PAGE_NAMES:
+        segments[-1] = ''
+    path = '/'.join(segments).rstrip('/')
+    
+    tracking_params = {name.lower() for name in Config.TRACKING_QUERY_PARAMS}
+    tracking_prefixes = tuple(prefix.lower() for prefix in Config.TRACKING_QUERY_PREFIXES)
+    query_pairs = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in tracking_params and not key.lower().startswith(tracking_prefixes)
+    ]
+    query = urlencode(sorted(query_pairs))
+    
+    return urlunsplit(('https', host, path, query, ''))
+
+# --- 文本清理和处理函数 (Text Processing) ---
+def normalize_extracted_text(text: str) -> str:
+    """规范化提取文本：移除控制字符和特殊字符，合并多余空白。不截断、不转义，文本存储和Parquet保存完整文本。"""
     if not text or not isinstance(text, str):
         return ""
     
     # 移除控制字符和特殊字符，替换为单个空格
     text = re.sub(r'[\n\r\f\v\x0b\x0c\t]+', ' ', text)
     text = re.sub(r'[\x00-\x08\x0e-\x1f\x7f-\x9f]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # CSV转义：将双引号替换为两个双引号
-    text = text.replace('"', '""')
-    
-    # 限制长度 (Excel单元格通常限制在32767字符)
-    if len(text) > 32000:
-        text = text[:32000] + "...[文本被截断]"
-    
+    return re.sub(r'\s+', ' ', text).strip()
+
+def clean_text_for_csv(text: str) -> str:
+    """
+    写入CSV单元格前的清理：规范化后限制长度防止Excel单元格溢出。
+    引号转义由CSV写出时处理，这里不再重复转义。
+    """
+    text = normalize_extracted_text(text)
+    if len(text) > Config.CSV_CELL_MAX_CHARS:
+        text = text[:Config.CSV_CELL_MAX_CHARS] + "...[文本被截断]"
     return text
 
 def contains_ai_governance_keywords(text: str) -> str:
@@ -244,17 +1275,24 @@ def get_file_info_from_response(response: requests.Response) -> Dict:
     }
 
 @retry(stop=stop_after_attempt(Config.MAX_RETRIES), wait=wait_exponential(multiplier=1, min=2, max=10), 
+       retry=retry_if_not_exception_type(BudgetExceeded),
        retry_error_callback=lambda retry_state: (None, f"文档下载最终失败: {retry_state.outcome.exception()}", {}))
+@timed_stage('download')
 def download_document_smart(url: str, session: requests.Session, output_dir: Path, 
-                          url_index: Any, page_info: Dict = None) -> Tuple[Optional[Path], Optional[str], Dict]:
+                          url_index: Any, page_info: Dict = None,
+                          budget: Optional[TaskBudget] = None) -> Tuple[Optional[Path], Optional[str], Dict]:
     """
     智能文档下载，支持多种文档格式，带重试机制。
     url_index 可以是数字或字符串，用于文件名生成。
+    budget 耗尽时抛出 BudgetExceeded（不重试），并删除未下载完的文件。
     """
     if page_info is None:
         page_info = {}
+    if budget is None:
+        budget = TaskBudget()
         
     try:
+        budget.check('文档下载')
         headers = {
             'User-Agent': random.choice(USER_AGENTS),
             'Accept': 'application/pdf,text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -265,14 +1303,14 @@ def download_document_smart(url: str, session: requests.Session, output_dir: Pat
         }
         
         # 使用流式GET请求，避免大文件一次性加载到内存
-        response = session.get(url, headers=headers, timeout=Config.PDF_DOWNLOAD_TIMEOUT, 
+        response = session.get(url, headers=headers, timeout=budget.timeout(Config.PDF_DOWNLOAD_TIMEOUT), 
                              stream=True, allow_redirects=True)
         
         if response.status_code != 200:
             # 尝试处理重定向后的URL
             final_url = response.url
             if final_url != url:
-                 response = session.get(final_url, headers=headers, timeout=Config.PDF_DOWNLOAD_TIMEOUT, 
+                 response = session.get(final_url, headers=headers, timeout=budget.timeout(Config.PDF_DOWNLOAD_TIMEOUT), 
                                      stream=True, allow_redirects=True)
                  if response.status_code != 200:
                     return None, f"HTTP状态码: {response.status_code} (最终URL)", {}
@@ -321,13 +1359,19 @@ def download_document_smart(url: str, session: requests.Session, output_dir: Pat
             file_info['size_bytes'] = file_path.stat().st_size
             return file_path, None, file_info
 
-        # 下载文件
+        # 下载文件（按块计入字节预算，预算耗尽时删除不完整的文件）
         total_size = 0
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    total_size += len(chunk)
+        try:
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        budget.consume_bytes(len(chunk))
+                        f.write(chunk)
+                        total_size += len(chunk)
+        except BudgetExceeded:
+            response.close()
+            file_path.unlink(missing_ok=True)
+            raise
 
         response.close() # 必须关闭连接
         
@@ -357,7 +1401,7 @@ def download_document_smart(url: str, session: requests.Session, output_dir: Pat
         logger.info(f"成功下载文档: {filename} ({file_info['size_bytes']/1024:.1f}KB)")
         return file_path, None, file_info
 
-    except requests.exceptions.Timeout:
+    except (requests.exceptions.Timeout, BudgetExceeded):
         raise
     except requests.exceptions.RequestException as e:
         raise
@@ -365,29 +1409,173 @@ def download_document_smart(url: str, session: requests.Session, output_dir: Pat
         logger.error(f"下载过程中发生未知异常: {str(e)}")
         return None, f"下载失败: {str(e)}", {}
 
-def extract_text_from_document(file_path: Path) -> str:
+# --- 文档链接探测 (Document Probing) ---
+DOCUMENT_EXTENSIONS = ['.pdf', '.doc', '.docx', '.txt', '.rtf']
+# 文件头魔术字节 -> 文档类型
+DOCUMENT_MAGIC_BYTES = [
+    (b'%PDF', 'pdf'),
+    (b'PK\x03\x04', 'document'),  # docx 等 Office Open XML
+    (b'\xd0\xcf\x11\xe0', 'document'),  # 旧版 .doc
+    (b'{\\rtf', 'document'),
+]
+
+def _classify_probe(content_type: str, head_bytes: bytes) -> str:
+    """根据Content-Type和文件头判断链接类型：pdf / document / html / unknown"""
+    for magic, kind in DOCUMENT_MAGIC_BYTES:
+        if head_bytes.startswith(magic):
+            return kind
+    if 'pdf' in content_type:
+        return 'pdf'
+    if any(t in content_type for t in ['msword', 'officedocument', 'rtf', 'text/plain']):
+        return 'document'
+    sniff = head_bytes[:512].lstrip().lower()
+    if 'html' in content_type or sniff.startswith((b'<!doctype html', b'<html')):
+        return 'html'
+    return 'unknown'
+
+@timed_stage('probe')
+def probe_document_url(url: str, session: requests.Session, budget: Optional[TaskBudget] = None) -> Dict:
+    """
+    轻量探测候选文档链接：先发HEAD请求，信息不足时再请求前1KB（Range请求）。
+    返回 {'url', 'final_url', 'status', 'content_type', 'size_bytes', 'kind'}，
+    kind 为 pdf / document / html / unknown / error。
+    """
+    result = {'url': url, 'final_url': url, 'status': 0, 'content_type': '', 'size_bytes': 0, 'kind': 'error'}
+    headers = {'User-Agent': random.choice(USER_AGENTS)}
+    timeout = budget.timeout(Config.PROBE_TIMEOUT) if budget else Config.PROBE_TIMEOUT
+    
+    try:
+        response = session.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        result.update({
+            'final_url': response.url,
+            'status': response.status_code,
+            'content_type': response.headers.get('content-type', '').lower(),
+        })
+        length = response.headers.get('content-length', '')
+        result['size_bytes'] = int(length) if length.isdigit() else 0
+        if response.status_code < 400:
+            result['kind'] = _classify_probe(result['content_type'], b'')
+    except requests.exceptions.RequestException as e:
+        logger.debug(f"HEAD探测失败 {url}: {e}")
+    
+    # HEAD被拒绝或类型不明确时，读取前1KB确认文件头
+    if result['kind'] in ('error', 'unknown'):
+        try:
+            response = session.get(url, headers={**headers, 'Range': 'bytes=0-1023'},
+                                   timeout=timeout, stream=True, allow_redirects=True)
+            head_bytes = next(response.iter_content(chunk_size=1024), b'')
+            response.close()
+            content_type = response.headers.get('content-type', '').lower()
+            size_bytes = result['size_bytes']
+            content_range = response.headers.get('content-range', '')
+            if '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+                size_bytes = int(content_range.rsplit('/', 1)[1])
+            elif response.status_code == 200 and response.headers.get('content-length', '').isdigit():
+                size_bytes = int(response.headers['content-length'])
+            result.update({
+                'final_url': response.url,
+                'status': response.status_code,
+                'content_type': content_type,
+                'size_bytes': size_bytes,
+                'kind': _classify_probe(content_type, head_bytes) if response.status_code < 400 else 'error'
+            })
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"范围请求探测失败 {url}: {e}")
+    
+    return result
+
+def is_downloadable_probe(probe: Dict) -> bool:
+    """探测结果是否值得下载：确实是文档且不超过大小上限"""
+    if probe['size_bytes'] > Config.MAX_PDF_SIZE_MB * 1024 * 1024:
+        return False
+    if probe['kind'] in ('pdf', 'document'):
+        return True
+    # 类型不明或探测出错（很多站点拒绝HEAD/范围请求）但URL带文档扩展名时仍尝试下载，由下载阶段确认
+    return probe['kind'] in ('unknown', 'error') and Path(urlparse(probe['url']).path).suffix.lower() in DOCUMENT_EXTENSIONS
+
+def polite_probe_document_url(url: str, session: requests.Session, budget: Optional[TaskBudget] = None) -> Dict:
+    """遵守按主机礼貌抓取限制（并发数、请求间隔）探测一个链接"""
+    host_politeness.acquire(url)
+    try:
+        return probe_document_url(url, session, budget)
+    finally:
+        host_politeness.release(url)
+
+def probe_documents(docs: List[Dict], session: requests.Session, budget: Optional[TaskBudget] = None) -> List[Dict]:
+    """
+    并发探测候选文档（不同主机并行，同一主机受 HostPoliteness 限制），返回与输入顺序一致的探测结果列表。
+    探测结果缓存在页面缓存库中（Config.ENABLE_PROBE_CACHE，与 ENABLE_PAGE_CACHE 相互独立）。
+    """
+    probe_cache = get_probe_cache()
+    probes: List[Optional[Dict]] = [probe_cache.get_probe(doc['url']) if probe_cache else None for doc in docs]
+    
+    pending = [i for i, probe in enumerate(probes) if probe is None]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, Config.PROBE_THREADS)) as executor:
+            futures = {submit_in_context(executor, polite_probe_document_url, docs[i]['url'], session, budget): i
+                       for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                probes[i] = future.result()
+                # 网络错误不缓存，下次运行重新探测
+                if probe_cache and probes[i]['kind'] != 'error':
+                    probe_cache.put_probe(docs[i]['url'], probes[i])
+    
+    return probes
+
+def select_documents_to_download(sorted_docs: List[Dict], session: requests.Session,
+                                 budget: Optional[TaskBudget] = None) -> List[Dict]:
+    """
+    在下载前过滤候选文档：探测真实类型和大小，丢弃HTML页面和超限文件，
+    确认的PDF优先，其余保持原有优先级，最多返回 PDF_DOWNLOAD_LIMIT 个。
+    """
+    if not Config.ENABLE_DOCUMENT_PROBE:
+        return sorted_docs[:Config.PDF_DOWNLOAD_LIMIT]
+    
+    if budget:
+        budget.check('文档探测')
+    candidates = sorted_docs[:Config.PROBE_CANDIDATE_LIMIT]
+    probes = probe_documents(candidates, session, budget)
+    
+    selected = [(doc, probe) for doc, probe in zip(candidates, probes) if is_downloadable_probe(probe)]
+    selected.sort(key=lambda item: item[1]['kind'] != 'pdf')  # 稳定排序，保留原有优先级
+    
+    skipped = len(candidates) - len(selected)
+    if skipped:
+        logger.info(f"🔎 探测过滤掉 {skipped} 个非文档或超限链接")
+    return [doc for doc, _ in selected[:Config.PDF_DOWNLOAD_LIMIT]]
+
+def extract_text_from_document(file_path: Path, budget: Optional[TaskBudget] = None) -> str:
     """从多种文档格式中提取文本"""
     try:
-        if file_path.suffix.lower() == '.pdf':
-            return extract_pdf_text_robust(file_path)
-        elif file_path.suffix.lower() in ['.html', '.htm']:
-            return extract_html_text(file_path)
-        elif file_path.suffix.lower() == '.xml':
-            return extract_xml_text(file_path)
-        else:
-            # 尝试作为文本文件读取 (处理.doc/.docx需要额外库，此处仅做简单文本读取)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
+        with stage_timer('extraction', method=file_path.suffix.lower().lstrip('.') or 'text'):
+            if file_path.suffix.lower() == '.pdf':
+                return extract_pdf_text_robust(file_path, budget)
+            elif file_path.suffix.lower() in ['.html', '.htm']:
+                return extract_html_text(file_path)
+            elif file_path.suffix.lower() == '.xml':
+                return extract_xml_text(file_path)
+            else:
+                # 尝试作为文本文件读取 (处理.doc/.docx需要额外库，此处仅做简单文本读取)
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    return f.read()
     except Exception as e:
         return f"[ERROR] 文本提取失败: {str(e)}"
 
-def extract_pdf_text_robust(pdf_path: Path) -> str:
-    """增强版PDF文本提取：尝试多种策略"""
+def extract_pdf_text_robust(pdf_path: Path, budget: Optional[TaskBudget] = None) -> str:
+    """增强版PDF文本提取：尝试多种策略。预算耗尽时停止并返回已提取的页面。"""
     try:
         with pdfplumber.open(pdf_path) as pdf:
             texts = []
             
             for page_num, page in enumerate(pdf.pages):
+                if budget:
+                    try:
+                        budget.check('PDF提取')
+                    except BudgetExceeded as e:
+                        texts.append(f"[提取在第 {page_num + 1}/{len(pdf.pages)} 页停止: {e}]")
+                        break
+                
                 page_text = ""
                 
                 # 策略 1: 标准文本提取 (最常用)
@@ -440,13 +1628,10 @@ def extract_html_text(html_path: Path) -> str:
     """从HTML文件提取文本"""
     try:
         with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-        
-        # 移除脚本、样式和导航等非主要内容
-        for element in soup(["script", "style", "nav", "header", "footer", "aside", "form", "button"]):
-            element.decompose()
+            html = f.read()
         
-        return soup.get_text(strip=True, separator=' ')
+        # 移除脚本、样式和导航等非主要内容后提取全文
+        return parse_html_offloaded(html)['full_text']
     except Exception as e:
         return f"[ERROR] HTML文本提取失败: {str(e)}"
 
@@ -459,17 +1644,997 @@ def extract_xml_text(xml_path: Path) -> str:
     except Exception as e:
         return f"[ERROR] XML文本提取失败: {str(e)}"
 
-# --- Selenium和浏览器管理 (Selenium and Browser Management) ---
-def find_chromedriver_path() -> Optional[str]:
-    """自动查找ChromeDriver路径"""
-    for path in Config.CHROMEDRIVER_PATHS:
-        if Path(path).exists() and os.access(path, os.X_OK):
-            logger.info(f"找到ChromeDriver: {path}")
-            return path
-    
-    logger.warning("未找到ChromeDriver，请安装或配置路径")
+# --- 提取缓存 (Extraction Cache) ---
+EXTRACTOR_VERSION = '1'  # 修改提取逻辑后递增，使旧的缓存条目失效
+
+class ExtractionCache:
+    """
+    文档提取文本的持久化缓存（SQLite），键为文件内容的SHA1 + 提取器版本（HTML文件还包括解析后端）。
+    同一文档无论以什么文件名、被哪个URL下载，都只提取一次；重新提取时只处理新增或变化的文件。
+    """
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions (key TEXT PRIMARY KEY, text TEXT, extracted_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM extractions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, text, extracted_at) VALUES (?, ?, ?)",
+                (key, text, time.time())
+            )
+            self._conn.commit()
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """获取全局提取缓存（首次调用时创建），禁用或打开失败时返回None"""
+    global _extraction_cache
+    if not Config.ENABLE_EXTRACTION_CACHE:
+        return None
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            try:
+                Config.EXTRACTION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _extraction_cache = ExtractionCache(Config.EXTRACTION_CACHE_PATH)
+            except Exception as e:
+                logger.warning(f"⚠️ 提取缓存不可用，将直接提取: {e}")
+                Config.ENABLE_EXTRACTION_CACHE = False
+                return None
+        return _extraction_cache
+
+def extraction_cache_key(file_path: Path) -> str:
+    """文件内容哈希 + 提取器版本（HTML还与解析后端有关）"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    suffix = file_path.suffix.lower()
+    backend = resolve_html_backend() if suffix in ('.html', '.htm') else ''
+    return f"{digest.hexdigest()}:{EXTRACTOR_VERSION}:{suffix}:{backend}"
+
+def extract_document_cached(file_path: Path, budget: Optional[TaskBudget] = None) -> str:
+    """带缓存的文档提取。提取失败或因预算耗尽只提取了部分页面时不写入缓存。"""
+    cache = get_extraction_cache()
+    key = None
+    if cache:
+        try:
+            key = extraction_cache_key(file_path)
+            cached = cache.get(key)
+            if cached is not None:
+                logger.info(f"💾 命中提取缓存: {file_path.name}")
+                return cached
+        except OSError as e:
+            logger.debug(f"提取缓存查询失败 {file_path}: {e}")
+    
+    text = extract_text_from_document(file_path, budget)
+    if key and not text.startswith("[ERROR]") and not (budget and budget.exhausted):
+        cache.put(key, text)
+    return text
+
+def _process_pool_worker_init() -> None:
+    """
+    进程池子进程的初始化：子进程只返回文本/解析结果，span无法发回主进程，因此不记录追踪，
+    并丢弃 fork 时从父进程继承的未写出span（否则会重复写入父进程的追踪文件）。
+    """
+    Config.ENABLE_TRACING = False
+    tracer.output_path = None
+    tracer.drain()
+
+def _extraction_worker_init() -> None:
+    """提取进程池的初始化：进程池内不再嵌套创建HTML解析进程池"""
+    _process_pool_worker_init()
+    Config.PARSE_PROCESS_WORKERS = 0
+
+def _timed_extract(file_path: Path) -> Tuple[str, float]:
+    start = time.perf_counter()
+    text = extract_text_from_document(file_path)
+    return text, time.perf_counter() - start
+
+def extract_documents_parallel(paths: List[Path], executor: Optional[ProcessPoolExecutor] = None) -> Dict[Path, Tuple[str, float]]:
+    """
+    批量提取文档文本：先查提取缓存，未命中的交给进程池（executor 为None时在本进程内逐个提取）。
+    返回 {路径: (文本, 提取耗时秒)}，命中缓存的耗时为0。
+    """
+    cache = get_extraction_cache()
+    results: Dict[Path, Tuple[str, float]] = {}
+    misses: Dict[Path, Optional[str]] = {}
+    for path in dict.fromkeys(paths):
+        key = None
+        if cache:
+            try:
+                key = extraction_cache_key(path)
+            except OSError as e:
+                results[path] = (f"[ERROR] 文件读取失败: {e}", 0.0)
+                continue
+            cached = cache.get(key)
+            if cached is not None:
+                results[path] = (cached, 0.0)
+                continue
+        misses[path] = key
+    
+    def store(path: Path, text: str, seconds: float) -> None:
+        results[path] = (text, seconds)
+        if misses[path] and not text.startswith("[ERROR]"):
+            cache.put(misses[path], text)
+    
+    if executor is None:
+        for path in misses:
+            store(path, *_timed_extract(path))
+        return results
+    
+    futures = {executor.submit(_timed_extract, path): path for path in misses}
+    for future in as_completed(futures):
+        path = futures[future]
+        try:
+            store(path, *future.result())
+        except Exception as e:
+            results[path] = (f"[ERROR] 文本提取进程失败: {e}", 0.0)
+    return results
+
+# --- 文本存储 (Sharded Text Store) ---
+class ShardedTextStore:
+    """
+    压缩分片文本存储，代替每行一个 .txt 文件：每条文本单独压缩（zstd，未安装 zstandard 时用 gzip）后
+    追加写入滚动分片文件，SQLite 索引记录 键 -> (分片, 偏移, 长度)，随机读取只需一次 seek。
+    每个进程写自己的分片文件（文件名带进程号），多个工作进程可以同时写入同一个存储目录。
+    同一个键重复写入时索引指向最新的记录，旧记录成为分片中的死数据（compact 时回收）。
+    """
+    
+    def __init__(self, root: Path, codec: Optional[str] = None, shard_max_bytes: Optional[int] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        codec = codec or Config.TEXT_STORE_CODEC
+        if codec == 'auto':
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        self.codec = codec
+        self.shard_max_bytes = shard_max_bytes or Config.TEXT_STORE_SHARD_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS texts (key TEXT PRIMARY KEY, shard TEXT, offset INTEGER, length INTEGER, "
+            "codec TEXT, chars INTEGER, url TEXT, written_at REAL)"
+        )
+        self._conn.commit()
+        self._shard_file = None
+        self._shard_name = None
+        self._shard_seq = 0
+    
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=Config.TEXT_STORE_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=min(Config.TEXT_STORE_LEVEL, 9))
+    
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+    
+    def _writable_shard(self):
+        """当前进程的分片文件，超过大小上限时滚动到新分片"""
+        if self._shard_file is not None and self._shard_file.tell() >= self.shard_max_bytes:
+            self._shard_file.close()
+            self._shard_file = None
+        if self._shard_file is None:
+            while True:
+                self._shard_seq += 1
+                self._shard_name = f"shard-{os.getpid()}-{int(time.time())}-{self._shard_seq:04d}.{self.codec}"
+                if not (self.root / self._shard_name).exists():
+                    break
+            self._shard_file = open(self.root / self._shard_name, 'ab')
+        return self._shard_file
+    
+    def put(self, key: str, text: str, url: str = '') -> None:
+        """追加一条文本；数据刷到磁盘后才写索引，其他进程读到索引时数据一定可读"""
+        data = self._compress(text.encode('utf-8'))
+        with self._lock:
+            shard = self._writable_shard()
+            offset = shard.tell()
+            shard.write(data)
+            shard.flush()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts (key, shard, offset, length, codec, chars, url, written_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, self._shard_name, offset, len(data), self.codec, len(text), url, time.time())
+            )
+            self._conn.commit()
+    
+    def _read(self, shard: str, offset: int, length: int, codec: str) -> str:
+        with open(self.root / shard, 'rb') as f:
+            f.seek(offset)
+            return self._decompress(f.read(length), codec).decode('utf-8')
+    
+    def get(self, key: str) -> Optional[str]:
+        """随机读取一条文本，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT shard, offset, length, codec FROM texts WHERE key = ?", (key,)
+            ).fetchone()
+        return self._read(*row) if row else None
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM texts WHERE key = ?", (key,)).fetchone() is not None
+    
+    def keys(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT key FROM texts ORDER BY key")]
+    
+    def iter_texts(self):
+        """按分片和偏移顺序流式遍历全部文本，产出 (键, 文本)；每个分片只打开一次、顺序读取"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, shard, offset, length, codec FROM texts ORDER BY shard, offset"
+            ).fetchall()
+        current_shard, f = None, None
+        try:
+            for key, shard, offset, length, codec in rows:
+                if shard != current_shard:
+                    if f is not None:
+                        f.close()
+                    current_shard, f = shard, open(self.root / shard, 'rb')
+                f.seek(offset)
+                yield key, self._decompress(f.read(length), codec).decode('utf-8')
+        finally:
+            if f is not None:
+                f.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """记录数、原文字符数、压缩后字节数、分片文件数和总大小（包括死数据）"""
+        with self._lock:
+            records, chars, live_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(chars), 0), COALESCE(SUM(length), 0) FROM texts"
+            ).fetchone()
+        shards = [p for p in self.root.iterdir() if p.name.startswith('shard-')]
+        return {
+            'records': records,
+            'chars': chars,
+            'live_bytes': live_bytes,
+            'shards': len(shards),
+            'shard_bytes': sum(p.stat().st_size for p in shards),
+        }
+    
+    def compact(self) -> int:
+        """把所有有效记录重写到新分片并删除旧分片，回收重复写入留下的死数据；返回删除的分片数。运行时不能有其他写入进程。"""
+        self.close()
+        old_shards = [p for p in self.root.iterdir() if p.name.startswith('shard-')]
+        with self._lock:
+            urls = dict(self._conn.execute("SELECT key, url FROM texts").fetchall())
+        for key, text in self.iter_texts():
+            self.put(key, text, urls.get(key, ''))
+        self.close()
+        for path in old_shards:
+            path.unlink()
+        return len(old_shards)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._shard_file is not None:
+                self._shard_file.close()
+                self._shard_file = None
+
+_text_store: Optional[ShardedTextStore] = None
+_text_store_lock = threading.Lock()
+
+def get_text_store() -> Optional[ShardedTextStore]:
+    """获取全局文本存储（首次调用时创建）；Config.TEXT_STORAGE 为 'files' 时返回None"""
+    global _text_store
+    if Config.TEXT_STORAGE != 'sharded':
+        return None
+    with _text_store_lock:
+        if _text_store is None:
+            _text_store = ShardedTextStore(Config.TEXT_STORE_DIR)
+        return _text_store
+
+def run_text_store_command(action: str, key: Optional[str] = None, directory: Optional[Path] = None) -> None:
+    """texts 子命令：stats / get / export（写回 .txt 文件）/ import（导入已有的 .txt 文件）/ compact"""
+    store = ShardedTextStore(Config.TEXT_STORE_DIR)
+    if action == "stats":
+        stats = store.stats()
+        ratio = stats['chars'] / stats['shard_bytes'] if stats['shard_bytes'] else 0
+        print(f"🗜️ 文本存储: {Config.TEXT_STORE_DIR}")
+        print(f"   记录数: {stats['records']}  分片数: {stats['shards']}")
+        print(f"   原文: {stats['chars'] / 1024 / 1024:.1f}M 字符  分片: {stats['shard_bytes'] / 1024 / 1024:.1f} MB"
+              f"（有效 {stats['live_bytes'] / 1024 / 1024:.1f} MB，压缩比约 {ratio:.1f}x）")
+    elif action == "get":
+        text = store.get(key)
+        if text is None:
+            print(f"⚠️ 不存在: {key}")
+        else:
+            print(text)
+    elif action == "export":
+        directory = Path(directory or Config.SAVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        count = 0
+        for name, text in store.iter_texts():
+            (directory / name).write_text(text, encoding='utf-8')
+            count += 1
+        print(f"📤 已导出 {count} 个文本文件到: {directory}")
+    elif action == "import":
+        directory = Path(directory or Config.SAVE_DIR)
+        count = 0
+        for path in sorted(directory.glob('*.txt')):
+            store.put(path.name, path.read_text(encoding='utf-8'))
+            count += 1
+        store.close()
+        print(f"📥 已导入 {count} 个文本文件: {directory} -> {Config.TEXT_STORE_DIR}")
+    elif action == "compact":
+        removed = store.compact()
+        print(f"🧹 已重写有效记录并删除 {removed} 个旧分片")
+
+# --- 全文检索索引 (Full-text Search Index) ---
+class SearchIndex:
+    """
+    提取文本的全文检索索引（SQLite FTS5）。每行一条记录，键为文本文件名，附带国家、政策ID、URL 和文本的SHA1；
+    保存文本时增量更新（save_row_text），文本哈希未变的行不重复索引，不需要单独的建索引步骤。
+    """
+    
+    def __init__(self, db_path: Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, key TEXT UNIQUE, country TEXT, "
+            "policy_id TEXT, url TEXT, text_hash TEXT, chars INTEGER, indexed_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(text, tokenize='unicode61 remove_diacritics 2')"
+        )
+        self._conn.commit()
+    
+    def add(self, key: str, text: str, url: str = '', row_dict: Optional[Dict] = None) -> bool:
+        """索引一行文本（同一个键覆盖旧记录）；文本哈希未变时跳过，返回是否写入"""
+        row_dict = row_dict or {}
+        text_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            existing = self._conn.execute("SELECT id, text_hash FROM entries WHERE key = ?", (key,)).fetchone()
+            if existing and existing[1] == text_hash:
+                return False
+            with self._conn:
+                if existing:
+                    self._conn.execute("DELETE FROM entries_fts WHERE rowid = ?", (existing[0],))
+                    self._conn.execute("DELETE FROM entries WHERE id = ?", (existing[0],))
+                cursor = self._conn.execute(
+                    "INSERT INTO entries (key, country, policy_id, url, text_hash, chars, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, str(row_dict.get('Country', '')), str(row_dict.get('Policy initiative ID', '')),
+                     url, text_hash, len(text), time.time())
+                )
+                self._conn.execute("INSERT INTO entries_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, text))
+        return True
+    
+    def search(self, query: str, limit: int = 20, country: Optional[str] = None) -> List[Dict]:
+        """
+        按相关度（bm25）返回匹配的行，每条包含元数据和命中片段。
+        query 使用 FTS5 查询语法（AND / OR / NOT / "短语" / 前缀*），语法无效时按普通短语检索。
+        """
+        sql = ("SELECT e.key, e.country, e.policy_id, e.url, e.chars, "
+               "snippet(entries_fts, 0, '[', ']', ' … ', 16), bm25(entries_fts) "
+               "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid WHERE entries_fts MATCH ?")
+        if country:
+            sql += " AND e.country = ?"
+        sql += " ORDER BY bm25(entries_fts) LIMIT ?"
+        
+        def run(match: str):
+            params = [match] + ([country] if country else []) + [limit]
+            with self._lock:
+                return self._conn.execute(sql, params).fetchall()
+        try:
+            rows = run(query)
+        except sqlite3.OperationalError:
+            rows = run('"' + query.replace('"', '""') + '"')
+        return [
+            {'key': key, 'country': row_country, 'policy_id': policy_id, 'url': url, 'chars': chars,
+             'snippet': snippet, 'score': -score}
+            for key, row_country, policy_id, url, chars, snippet, score in rows
+        ]
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+def get_search_index() -> Optional[SearchIndex]:
+    """获取全局检索索引（首次调用时创建），禁用或打开失败（例如SQLite未编译FTS5）时返回None"""
+    global _search_index
+    if not Config.ENABLE_SEARCH_INDEX:
+        return None
+    with _search_index_lock:
+        if _search_index is None:
+            try:
+                Config.SEARCH_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _search_index = SearchIndex(Config.SEARCH_INDEX_PATH)
+            except Exception as e:
+                logger.warning(f"⚠️ 全文检索索引不可用，将不再更新索引: {e}")
+                Config.ENABLE_SEARCH_INDEX = False
+                return None
+        return _search_index
+
+def run_search_command(query: Optional[str], limit: int = 20, country: Optional[str] = None,
+                       rebuild: bool = False) -> None:
+    """search 子命令：检索索引并打印结果；rebuild=True 时先按输入文件补建索引（用于启用索引之前已保存的文本）"""
+    index = get_search_index()
+    if index is None:
+        print("❌ 全文检索索引不可用（Config.ENABLE_SEARCH_INDEX 或 SQLite FTS5 支持）")
+        return
+    if rebuild:
+        loaded = load_input_rows()
+        if loaded is None:
+            return
+        df, url_column = loaded
+        added = 0
+        for idx, row in df.iterrows():
+            row_dict = row.to_dict()
+            key = f"{row_filename_base(row_dict, row_dict.get('编号', idx))}.txt"
+            text = load_row_text(key)
+            if text is not None:
+                added += index.add(key, text, row_dict[url_column], row_dict)
+        print(f"🔎 已补建索引 {added} 条，索引共 {index.count()} 条")
+    if not query:
+        return
+    
+    start = time.perf_counter()
+    results = index.search(query, limit, country)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"🔎 \"{query}\": {len(results)} 条结果（{elapsed_ms:.1f} ms，索引共 {index.count()} 条）")
+    for i, result in enumerate(results, 1):
+        print(f"{i:>3}. [{result['score']:.3g}] {result['country']} {result['policy_id']}  {result['key']}  ({result['chars']} 字符)")
+        print(f"     {result['url']}")
+        print(f"     {result['snippet']}")
+
+# --- 近似重复文档检测 (Near-duplicate Detection) ---
+MINHASH_PRIME = (1 << 61) - 1
+MINHASH_MAX = (1 << 32) - 1
+
+class NearDuplicateIndex:
+    """
+    近似重复文档检测：对文档文本的词 n-gram 计算 MinHash 签名，用 LSH 分桶（SQLite）查找候选，
+    估计的 Jaccard 相似度达到阈值时归入已有聚类，否则新建聚类。
+    同一文本（内容哈希相同）只计算一次签名；occurrences 表记录每个文档出现在哪些行，用于去重统计。
+    """
+    
+    def __init__(self, db_path: Path, threshold: Optional[float] = None, num_perm: Optional[int] = None,
+                 bands: Optional[int] = None):
+        self.threshold = threshold or Config.NEAR_DUP_THRESHOLD
+        self.num_perm = num_perm or Config.NEAR_DUP_NUM_PERM
+        self.bands = bands or Config.NEAR_DUP_BANDS
+        self.rows_per_band = self.num_perm // self.bands
+        rng = random.Random(1)  # 固定种子：签名跨进程、跨运行可比较
+        # 置换 (a*h + b) mod p：a 取满61位，乘法在 uint64 上回绕，各置换的最小值才彼此独立
+        self._a = np.array([rng.randrange(1, MINHASH_PRIME) for _ in range(self.num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.randrange(0, MINHASH_PRIME) for _ in range(self.num_perm)], dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents (doc_key TEXT PRIMARY KEY, cluster TEXT, first_row TEXT, url TEXT, "
+            "signature BLOB, chars INTEGER, created_at REAL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER, bucket TEXT, doc_key TEXT)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS bands_bucket ON bands (band, bucket)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS occurrences (doc_key TEXT, row_key TEXT, PRIMARY KEY (doc_key, row_key))"
+        )
+    
+    def signature(self, text: str) -> np.ndarray:
+        """词 n-gram（Config.NEAR_DUP_SHINGLE_WORDS 个词）的 MinHash 签名；分块计算，内存与文档长度无关"""
+        words = re.findall(r'\w+', text.lower())
+        n = Config.NEAR_DUP_SHINGLE_WORDS
+        shingles = {' '.join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        signature = np.full(self.num_perm, MINHASH_MAX, dtype=np.uint64)
+        for start in range(0, len(hashes), 8192):
+            block = ((np.outer(self._a, hashes[start:start + 8192]) + self._b[:, None]) % MINHASH_PRIME) & MINHASH_MAX
+            signature = np.minimum(signature, block.min(axis=1))
+        return signature
+    
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, str]]:
+        return [(band, hashlib.sha1(signature[band * self.rows_per_band:(band + 1) * self.rows_per_band].tobytes()).hexdigest()[:16])
+                for band in range(self.bands)]
+    
+    def assign(self, text: str, row_key: str, url: str = '') -> Tuple[str, str]:
+        """
+        为一个文档分配聚类，返回 (聚类ID, 聚类首次出现的行)。聚类首次出现的行不是 row_key 时，该文档是其他行文档的近似重复。
+        查找和写入在同一个 IMMEDIATE 事务中，多个进程并发分配时不会为同一组文档建立多个聚类。
+        """
+        doc_key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            known = self._conn.execute("SELECT 1 FROM documents WHERE doc_key = ?", (doc_key,)).fetchone()
+        signature = None if known else self.signature(text)  # 签名在锁外计算
+        
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT cluster, first_row FROM documents WHERE doc_key = ?", (doc_key,)).fetchone()
+                if row is None:
+                    if signature is None:
+                        signature = self.signature(text)
+                    buckets = self._buckets(signature)
+                    candidates = []
+                    for band, bucket in buckets:
+                        candidates.extend(r[0] for r in self._conn.execute(
+                            "SELECT doc_key FROM bands WHERE band = ? AND bucket = ?", (band, bucket)))
+                    best, best_similarity = None, self.threshold
+                    for candidate in list(dict.fromkeys(candidates))[:Config.NEAR_DUP_MAX_CANDIDATES]:
+                        cluster, first_row, blob = self._conn.execute(
+                            "SELECT cluster, first_row, signature FROM documents WHERE doc_key = ?", (candidate,)).fetchone()
+                        similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint64) == signature))
+                        if similarity >= best_similarity:
+                            best, best_similarity = (cluster, first_row), similarity
+                    row = best or (doc_key[:16], row_key)
+                    self._conn.execute(
+                        "INSERT INTO documents (doc_key, cluster, first_row, url, signature, chars, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (doc_key, row[0], row[1], url, signature.tobytes(), len(text), time.time())
+                    )
+                    self._conn.executemany("INSERT INTO bands (band, bucket, doc_key) VALUES (?, ?, ?)",
+                                           [(band, bucket, doc_key) for band, bucket in buckets])
+                self._conn.execute("INSERT OR IGNORE INTO occurrences (doc_key, row_key) VALUES (?, ?)", (doc_key, row_key))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0], row[1]
+    
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        """去重统计：文档出现次数、不同文本数、聚类数，以及最大的几个聚类"""
+        with self._lock:
+            occurrences, rows = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT row_key) FROM occurrences").fetchone()
+            documents, clusters = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT cluster) FROM documents").fetchone()
+            largest = self._conn.execute(
+                "SELECT d.cluster, COUNT(DISTINCT o.row_key) AS row_count, COUNT(DISTINCT d.doc_key), MIN(d.url) "
+                "FROM documents d JOIN occurrences o ON o.doc_key = d.doc_key "
+                "GROUP BY d.cluster HAVING row_count > 1 ORDER BY row_count DESC LIMIT ?", (top,)
+            ).fetchall()
+        return {
+            'occurrences': occurrences,
+            'rows': rows,
+            'distinct_texts': documents,
+            'clusters': clusters,
+            'largest_clusters': [{'cluster': c, 'rows': r, 'variants': v, 'url': u} for c, r, v, u in largest],
+        }
+
+_near_duplicate_index: Optional[NearDuplicateIndex] = None
+_near_duplicate_index_lock = threading.Lock()
+
+def get_near_duplicate_index() -> Optional[NearDuplicateIndex]:
+    """获取全局近似重复索引（首次调用时创建），禁用或打开失败时返回None"""
+    global _near_duplicate_index
+    if not Config.ENABLE_NEAR_DUP_DETECTION:
+        return None
+    with _near_duplicate_index_lock:
+        if _near_duplicate_index is None:
+            try:
+                Config.NEAR_DUP_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _near_duplicate_index = NearDuplicateIndex(Config.NEAR_DUP_INDEX_PATH)
+            except Exception as e:
+                logger.warning(f"⚠️ 近似重复检测不可用: {e}")
+                Config.ENABLE_NEAR_DUP_DETECTION = False
+                return None
+        return _near_duplicate_index
+
+def dedupe_document_texts(doc_texts: List[str], processing_info: Dict) -> List[str]:
+    """
+    在组合一行的文档文本之前检测近似重复（行以规范URL标识）：
+    同一行内互为近似重复的文档只保留第一个（例如同一份报告的HTML版和PDF版）；
+    与其他行文档近似重复的文档计入 processing_info['near_duplicate_documents']，
+    Config.SKIP_NEAR_DUPLICATE_DOCUMENTS 为True时用一行引用代替全文，不再保存、索引和评分其全文。
+    """
+    index = get_near_duplicate_index()
+    if index is None or not doc_texts:
+        return doc_texts
+    row_key = canonicalize_url(processing_info.get('url', ''))
+    kept, clusters = [], []
+    duplicates = skipped = 0
+    for text in doc_texts:
+        try:
+            cluster, first_row = index.assign(text, row_key, processing_info.get('url', ''))
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"⚠️ 近似重复检测失败，保留文档: {e}")
+            kept.append(text)
+            continue
+        if cluster in clusters:
+            logger.info(f"🧬 跳过同一行内的近似重复文档 (聚类 {cluster})")
+            continue
+        clusters.append(cluster)
+        if first_row != row_key:
+            duplicates += 1
+            if Config.SKIP_NEAR_DUPLICATE_DOCUMENTS:
+                skipped += 1
+                kept.append(f"[近似重复文档] 与 {first_row} 的文档相同或近似（聚类 {cluster}），全文未保存")
+                continue
+        kept.append(text)
+    
+    processing_info['document_clusters'] = clusters
+    processing_info['near_duplicate_documents'] = duplicates
+    if skipped:
+        processing_info['near_duplicate_skipped'] = skipped
+    if duplicates:
+        logger.info(f"🧬 {duplicates} 个文档与其他行的文档近似重复" + (f"，{skipped} 个已跳过全文" if skipped else ""))
+    return kept
+
+def run_duplicates_command(top: int = 10) -> None:
+    """duplicates 子命令：打印去重统计和最大的近似重复聚类"""
+    index = get_near_duplicate_index()
+    if index is None:
+        print("❌ 近似重复检测未启用（Config.ENABLE_NEAR_DUP_DETECTION）")
+        return
+    stats = index.stats(top)
+    print(f"🧬 近似重复统计: {Config.NEAR_DUP_INDEX_PATH}")
+    print(f"   文档出现次数: {stats['occurrences']}（{stats['rows']} 行）")
+    print(f"   不同文本: {stats['distinct_texts']}  去重后文档（聚类）: {stats['clusters']}")
+    for cluster in stats['largest_clusters']:
+        print(f"   {cluster['cluster']}  {cluster['rows']:>5} 行  {cluster['variants']:>3} 个变体  {cluster['url']}")
+
+# --- HTML解析后端 (HTML Parsing Backends) ---
+# 所有后端返回相同结构：
+#   links         - 页面中全部 <a href> 链接 [{'href', 'text', 'title'}]
+#   content_links - 移除脚本/导航/页眉页脚等元素后剩余的链接（用于发现AI子页面）
+#   main_text     - 主要内容区域的文本（按 CONTENT_SELECTORS 顺序查找）
+#   full_text     - 移除上述元素后整个文档的文本
+BOILERPLATE_TAGS = ["script", "style", "nav", "header", "footer", "aside", "form", "button", "img"]
+CONTENT_SELECTORS = [
+    'article', 'main', '.main-content', '.content', '.policy-content',
+    '#main-content', '#content', '.document-content', '.text-content',
+    '.post-content', '.entry-content', 'body'
+]
+
+def _pick_main_content(select_one: Callable[[str], Any], strings_of: Callable[[Any], List[str]]) -> str:
+    """按选择器顺序查找第一个内容足够长的区域；都不够长时使用最后一个（body）"""
+    main_strings: List[str] = []
+    for selector in CONTENT_SELECTORS:
+        node = select_one(selector)
+        main_strings = strings_of(node) if node is not None else []
+        if sum(len(s) for s in main_strings) > Config.MIN_CONTENT_LENGTH:
+            break
+    return ' '.join(main_strings)
+
+def _parse_with_bs4(html: str) -> Dict:
+    """BeautifulSoup + html.parser 后端（纯Python，最慢，但没有额外依赖）"""
+    soup = BeautifulSoup(html, "html.parser")
+    
+    def links_of(root) -> List[Dict]:
+        return [{'href': a['href'], 'text': a.get_text(strip=True), 'title': a.get('title', '')}
+                for a in root.find_all('a', href=True)]
+    
+    links = links_of(soup)
+    h1 = soup.find('h1')
+    heading = h1.get_text(' ', strip=True) if h1 else ''
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    
+    return {
+        'links': links,
+        'heading': heading,
+        'content_links': links_of(soup),
+        'main_text': _pick_main_content(soup.select_one, lambda node: list(node.stripped_strings)),
+        'full_text': soup.get_text(strip=True, separator=' ')
+    }
+
+def _lxml_select_one(root, selector: str):
+    """lxml 的简单选择器支持（标签、.class、#id），避免依赖 cssselect"""
+    if selector.startswith('.'):
+        xpath = f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    elif selector.startswith('#'):
+        xpath = f"//*[@id='{selector[1:]}']"
+    else:
+        xpath = f"//{selector}"
+    found = root.xpath(xpath)
+    return found[0] if found else None
+
+def _parse_with_lxml(html: str) -> Dict:
+    """lxml 后端（C实现，比 html.parser 快一个数量级）"""
+    root = lxml_html.fromstring(html or "<html></html>")
+    
+    def strings_of(node) -> List[str]:
+        return [s.strip() for s in node.itertext() if s.strip()]
+    
+    def links_of(node) -> List[Dict]:
+        return [{'href': a.get('href'), 'text': ''.join(strings_of(a)), 'title': a.get('title', '')}
+                for a in node.iter('a') if a.get('href')]
+    
+    # 注释和处理指令不计入文本（与BeautifulSoup的get_text一致）
+    lxml_etree.strip_elements(root, lxml_etree.Comment, lxml_etree.ProcessingInstruction, with_tail=False)
+    links = links_of(root)
+    h1 = next(root.iter('h1'), None)
+    heading = ' '.join(strings_of(h1)) if h1 is not None else ''
+    for element in list(root.iter(*BOILERPLATE_TAGS)):
+        if element is root:
+            continue
+        element.drop_tree()  # 保留元素后面的尾部文本
+    
+    return {
+        'links': links,
+        'heading': heading,
+        'content_links': links_of(root),
+        'main_text': _pick_main_content(lambda selector: _lxml_select_one(root, selector), strings_of),
+        'full_text': ' '.join(strings_of(root))
+    }
+
+def _parse_with_selectolax(html: str) -> Dict:
+    """selectolax (lexbor) 后端，通常是最快的选择"""
+    tree = SelectolaxHTMLParser(html or "")
+    
+    def strings_of(node) -> List[str]:
+        text = node.text(deep=True, separator='\n', strip=True)
+        return [s for s in text.split('\n') if s]
+    
+    def links_of() -> List[Dict]:
+        return [{'href': a.attributes.get('href'), 'text': a.text(deep=True, separator='', strip=True),
+                 'title': a.attributes.get('title') or ''}
+                for a in tree.css('a[href]') if a.attributes.get('href')]
+    
+    links = links_of()
+    h1 = tree.css_first('h1')
+    heading = ' '.join(strings_of(h1)) if h1 is not None else ''
+    tree.strip_tags(BOILERPLATE_TAGS)
+    root = tree.root
+    
+    return {
+        'links': links,
+        'heading': heading,
+        'content_links': links_of(),
+        'main_text': _pick_main_content(tree.css_first, strings_of),
+        'full_text': ' '.join(strings_of(root)) if root is not None else ''
+    }
+
+HTML_PARSER_BACKENDS = {
+    'selectolax': _parse_with_selectolax,
+    'lxml': _parse_with_lxml,
+    'bs4': _parse_with_bs4,
+}
+
+def available_html_backends() -> List[str]:
+    """返回当前环境可用的解析后端（按速度从快到慢）"""
+    available = []
+    if SelectolaxHTMLParser is not None:
+        available.append('selectolax')
+    if lxml_html is not None:
+        available.append('lxml')
+    available.append('bs4')
+    return available
+
+def resolve_html_backend(name: Optional[str] = None) -> str:
+    """确定要使用的解析后端；'auto' 或不可用时选择最快的可用后端"""
+    name = name or Config.HTML_PARSER_BACKEND
+    available = available_html_backends()
+    if name in available:
+        return name
+    if name != 'auto':
+        logger.warning(f"⚠️ HTML解析后端 {name} 不可用，改用 {available[0]}")
+    return available[0]
+
+def parse_html_document(html: str, backend: Optional[str] = None) -> Dict:
+    """使用指定（或自动选择的）后端解析HTML"""
+    return HTML_PARSER_BACKENDS[resolve_html_backend(backend)](html)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """获取全局进程池（首次调用时创建），用于CPU密集型的解析任务，绕开GIL"""
+    global _process_pool
+    if Config.PARSE_PROCESS_WORKERS <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=Config.PARSE_PROCESS_WORKERS,
+                                                initializer=_process_pool_worker_init)
+        return _process_pool
+
+def shutdown_process_pool() -> None:
+    """关闭全局进程池"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=True, cancel_futures=True)
+            _process_pool = None
+
+def recycle_process_pool(pool: ProcessPoolExecutor) -> None:
+    """替换内存超限的进程池：新任务使用新建的进程池，旧进程池在后台处理完已提交的任务后关闭"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not pool:
+            return  # 已被替换或关闭
+        _process_pool = None
+    threading.Thread(target=pool.shutdown, kwargs={'wait': True}, daemon=True).start()
+
+def parse_html_offloaded(html: str) -> Dict:
+    """
+    解析HTML：大页面交给进程池处理，小页面直接在当前线程解析（避免序列化开销）。
+    进程池不可用时回退到本地解析。
+    """
+    pool = get_process_pool() if len(html) >= Config.PARSE_OFFLOAD_MIN_BYTES else None
+    if pool is not None:
+        try:
+            return pool.submit(parse_html_document, html, resolve_html_backend()).result()
+        except Exception as e:
+            logger.debug(f"进程池解析失败，改为本地解析: {e}")
+    return parse_html_document(html)
+
+# --- 页面缓存 (Page Cache) ---
+class PageCache:
+    """
+    持久化的页面发现缓存（SQLite），跨URL、跨线程、跨运行共享。
+    每个页面URL对应：主要内容文本、发现的文档链接、AI相关子链接、h1标题。
+    同一国家的多行数据往往指向相同的部委首页，命中缓存即可跳过浏览器渲染。
+    """
+    def __init__(self, db_path: Path, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, page_text TEXT, doc_links TEXT, ai_links TEXT, fetched_at REAL, heading TEXT)"
+        )
+        if 'heading' not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN heading TEXT")  # 旧版本的缓存库没有标题列
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes (url TEXT PRIMARY KEY, result TEXT, probed_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """读取未过期的缓存条目，未命中返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_text, doc_links, ai_links, fetched_at, heading FROM pages WHERE url = ?",
+                (canonicalize_url(url),)
+            ).fetchone()
+        if not row or time.time() - row[3] > self.ttl_seconds:
+            return None
+        return {
+            'page_text': row[0],
+            'doc_links': json.loads(row[1]),
+            'ai_links': json.loads(row[2]),
+            'fetched_at': row[3],
+            'heading': row[4] or ''
+        }
+
+    def put(self, url: str, page_text: str, doc_links: List[Dict], ai_links: List[Dict], heading: str = '') -> None:
+        """写入（或覆盖）缓存条目"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, page_text, doc_links, ai_links, fetched_at, heading)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (canonicalize_url(url), page_text, json.dumps(doc_links, ensure_ascii=False),
+                 json.dumps(ai_links, ensure_ascii=False), time.time(), heading)
+            )
+            self._conn.commit()
+
+    def get_probe(self, url: str) -> Optional[Dict]:
+        """读取未过期的文档探测结果"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, probed_at FROM probes WHERE url = ?", (canonicalize_url(url),)
+            ).fetchone()
+        if not row or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put_probe(self, url: str, result: Dict) -> None:
+        """写入文档探测结果"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes (url, result, probed_at) VALUES (?, ?, ?)",
+                (canonicalize_url(url), json.dumps(result, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """删除过期条目，返回删除数量"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,))
+            purged = cursor.rowcount
+            cursor = self._conn.execute("DELETE FROM probes WHERE probed_at < ?", (cutoff,))
+            self._conn.commit()
+            return purged + cursor.rowcount
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+def get_page_cache() -> Optional[PageCache]:
+    """获取全局页面缓存（首次调用时创建），禁用或打开失败时返回None"""
+    if not Config.ENABLE_PAGE_CACHE:
+        return None
+    return _open_page_cache()
+
+def get_probe_cache() -> Optional[PageCache]:
+    """文档探测结果缓存：与页面缓存同一个库，由 Config.ENABLE_PROBE_CACHE 单独开关"""
+    if not Config.ENABLE_PROBE_CACHE:
+        return None
+    return _open_page_cache()
+
+def _open_page_cache() -> Optional[PageCache]:
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            try:
+                Config.PAGE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                _page_cache = PageCache(Config.PAGE_CACHE_PATH, Config.PAGE_CACHE_TTL_HOURS * 3600)
+                purged = _page_cache.purge_expired()
+                if purged:
+                    logger.info(f"🧹 清理过期页面缓存: {purged} 条")
+            except Exception as e:
+                logger.warning(f"⚠️ 页面缓存不可用，将直接渲染页面、不缓存探测结果: {e}")
+                Config.ENABLE_PAGE_CACHE = Config.ENABLE_PROBE_CACHE = False
+                return None
+        return _page_cache
+
+# --- 站点适配器 (Site Adapters) ---
+_site_adapters: Optional[List] = None
+_site_adapters_lock = threading.Lock()
+
+def get_site_adapters() -> List:
+    """加载 Config.SITE_ADAPTERS 中启用的插件（首次调用时加载），禁用或包不可用时返回空列表"""
+    global _site_adapters
+    if not Config.ENABLE_SITE_ADAPTERS:
+        return []
+    with _site_adapters_lock:
+        if _site_adapters is None:
+            try:
+                site_adapters = importlib.import_module('site_adapters')
+                _site_adapters = site_adapters.load_adapters(Config.SITE_ADAPTERS, Config.SITE_ADAPTER_EXTRA_DOMAINS)
+                logger.info(f"🔌 已加载站点适配器: {', '.join(a.name for a in _site_adapters) or '-'}")
+            except ImportError as e:
+                logger.warning(f"⚠️ 站点适配器不可用，所有URL使用浏览器: {e}")
+                _site_adapters = []
+        return _site_adapters
+
+def fetch_with_site_adapter(url: str, session: requests.Session, budget: TaskBudget) -> Optional[Dict]:
+    """
+    用匹配URL的站点适配器直接获取页面文本和文档列表（一次HTTP请求，不启动浏览器）。
+    返回适配器的结果（附带 'adapter' 名称）；没有匹配的适配器、适配器返回 None 或出错时返回 None，由调用方回退到浏览器。
+    """
+    for adapter in get_site_adapters():
+        if not adapter.matches(url):
+            continue
+        budget.check('站点适配器')
+        result = None
+        host_politeness.acquire(url)
+        try:
+            with stage_timer('site_adapter', url, method=adapter.name):
+                result = adapter.fetch(url, session, budget.timeout(Config.SITE_ADAPTER_TIMEOUT))
+        except Exception as e:
+            logger.warning(f"⚠️ 站点适配器 {adapter.name} 失败，回退到浏览器: {e}")
+        finally:
+            host_politeness.release(url)
+        if result is not None:
+            budget.consume_bytes(result.get('bytes', 0))
+            result['adapter'] = adapter.name
+            logger.info(f"🔌 站点适配器 {adapter.name}: {len(result.get('page_texts', []))} 个页面文本, "
+                        f"{len(result.get('documents', []))} 个文档链接")
+            return result
+    return None
+
+# --- Selenium和浏览器管理 (Selenium and Browser Management) ---
+def find_chromedriver_path() -> Optional[str]:
+    """自动查找ChromeDriver路径"""
+    for path in Config.CHROMEDRIVER_PATHS:
+        if Path(path).exists() and os.access(path, os.X_OK):
+            logger.info(f"找到ChromeDriver: {path}")
+            return path
+    
+    logger.warning("未找到ChromeDriver，请安装或配置路径")
     return None
 
+@timed_stage('driver_startup')
 def init_chrome_driver_stealth() -> Optional[webdriver.Chrome]:
     """初始化隐身版Chrome Driver，完全无头模式，包含反检测配置"""
     chromedriver_path = find_chromedriver_path()
@@ -530,50 +2695,155 @@ def init_chrome_driver_stealth() -> Optional[webdriver.Chrome]:
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
         logger.info("✅ 隐身Chrome浏览器初始化成功")
+        memory_watchdog.track_driver(driver)
         return driver
         
     except Exception as e:
         logger.error(f"❌ Chrome浏览器初始化失败: {e}")
         return None
 
+class DriverPool:
+    """
+    进程内的浏览器复用池。多进程模式下每个工作进程持有一个，同一个Chrome在多个URL之间复用，
+    省去每个URL重新启动浏览器的开销；使用次数达到上限或重置失败时关闭并重建。
+    """
+    def __init__(self, max_uses: int):
+        self.max_uses = max(1, max_uses)
+        self._lock = threading.Lock()
+        self._idle: List[webdriver.Chrome] = []
+        self._uses: Dict[int, int] = {}
+
+    def acquire(self) -> Optional[webdriver.Chrome]:
+        """取出一个空闲浏览器，没有时新建"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        with driver_lock:
+            driver = init_chrome_driver_stealth()
+        if driver:
+            with self._lock:
+                self._uses[id(driver)] = 0
+        return driver
+
+    def release(self, driver: webdriver.Chrome) -> None:
+        """归还浏览器：清理标签页和cookies后放回池中"""
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        if memory_watchdog.should_recycle(driver):
+            memory_watchdog.count_recycle('driver')
+            self._discard(driver)
+            return
+        if uses >= self.max_uses or not self._reset(driver):
+            self._discard(driver)
+            return
+        with self._lock:
+            self._idle.append(driver)
+
+    @staticmethod
+    def _reset(driver: webdriver.Chrome) -> bool:
+        """关闭多余标签页、清空cookies并回到空白页，避免上一个URL的状态影响下一个"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ 浏览器重置失败，将重建: {e}")
+            return False
+
+    def _discard(self, driver: webdriver.Chrome) -> None:
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        memory_watchdog.untrack_driver(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭浏览器失败: {e}")
+
+    def close(self) -> None:
+        """关闭池中所有浏览器"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
+
+active_driver_pool: Optional[DriverPool] = None # 多进程模式下由工作进程设置；为None时每个URL单独启动浏览器
+
+# 各种弹窗的处理规则（XPATH 以 // 开头，其余为 CSS Selector），按顺序尝试，每个页面最多点击一个
+POPUP_HANDLERS = [
+    # Cookie 同意/接受 按钮
+    {
+        'name': 'Cookie同意',
+        'selectors': [
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
+            ".cookie-accept", "#cookie-accept", ".accept-cookies", "#accept-cookies", 
+            ".cookie-banner button", ".cookie-consent button", ".gdpr-accept", ".consent-accept"
+        ]
+    },
+    # 关闭弹窗 (X 按钮) 或 “稍后”/“不，谢谢”
+    {
+        'name': '关闭/跳过',
+        'selectors': [
+            "//button[contains(@class, 'close')]", "//span[contains(@class, 'close')]",
+            "//button[@aria-label='Close']", ".modal-close", ".popup-close", ".dialog-close",
+            "[aria-label='Close']", "[data-dismiss='modal']",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'no thanks')]",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'skip')]",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'later')]",
+            "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'not now')]",
+            ".newsletter-dismiss", ".subscription-close", ".newsletter-close"
+        ]
+    },
+]
+
+# 标签页是否已加载完成（新标签页在导航开始前是 readyState 为 complete 的 about:blank）
+TAB_READY_SCRIPT = "return document.readyState === 'complete' && location.href !== 'about:blank';"
+
+# 在页面内一次性执行的弹窗处理和滚动（多标签页渲染使用，不在每个选择器上阻塞等待）：
+# 点击第一个可见的弹窗按钮（规则同 POPUP_HANDLERS），再滚动到页面底部触发懒加载，返回点击的规则名称或 null
+DISMISS_POPUPS_AND_SCROLL_SCRIPT = """
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+let clicked = null;
+outer: for (const handler of arguments[0]) {
+    for (const selector of handler.selectors) {
+        let elements = [];
+        try {
+            if (selector.startsWith('//')) {
+                const found = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                for (let i = 0; i < found.snapshotLength; i++) elements.push(found.snapshotItem(i));
+            } else {
+                elements = Array.from(document.querySelectorAll(selector));
+            }
+        } catch (e) {
+            continue;
+        }
+        for (const el of elements) {
+            if (visible(el) && !el.disabled) {
+                try { el.click(); clicked = handler.name; break outer; } catch (e) {}
+            }
+        }
+    }
+}
+window.scrollTo(0, document.body ? document.body.scrollHeight : 0);
+return clicked;
+"""
+
 def handle_comprehensive_popups(driver: webdriver.Chrome) -> bool:
     """全面处理各种弹窗：cookies、隐私、订阅、广告等"""
     handled_popup = False
     attempt_count = 0
     
-    # 定义各种弹窗处理规则（使用XPATH和CSS Selector）
-    popup_handlers = [
-        # Cookie 同意/接受 按钮
-        {
-            'name': 'Cookie同意',
-            'selectors': [
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'allow')]",
-                ".cookie-accept", "#cookie-accept", ".accept-cookies", "#accept-cookies", 
-                ".cookie-banner button", ".cookie-consent button", ".gdpr-accept", ".consent-accept"
-            ]
-        },
-        # 关闭弹窗 (X 按钮) 或 “稍后”/“不，谢谢”
-        {
-            'name': '关闭/跳过',
-            'selectors': [
-                "//button[contains(@class, 'close')]", "//span[contains(@class, 'close')]",
-                "//button[@aria-label='Close']", ".modal-close", ".popup-close", ".dialog-close",
-                "[aria-label='Close']", "[data-dismiss='modal']",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'no thanks')]",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'skip')]",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'later')]",
-                "//button[contains(translate(text(), 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'not now')]",
-                ".newsletter-dismiss", ".subscription-close", ".newsletter-close"
-            ]
-        },
-    ]
-    
     while attempt_count < Config.MAX_POPUP_ATTEMPTS and not handled_popup:
         attempt_count += 1
         
-        for handler in popup_handlers:
+        for handler in POPUP_HANDLERS:
             for selector in handler['selectors']:
                 try:
                     # 使用较短的超时时间来快速检测弹窗
@@ -603,7 +2873,7 @@ def handle_comprehensive_popups(driver: webdriver.Chrome) -> bool:
                                 time.sleep(1)
                                 break
                                 
-                            except ElementClickInterceptedException:
+                            except selenium_exceptions.ElementClickInterceptedException:
                                 # 如果点击被拦截，尝试JS点击
                                 try:
                                     driver.execute_script("arguments[0].click();", element)
@@ -621,7 +2891,7 @@ def handle_comprehensive_popups(driver: webdriver.Chrome) -> bool:
                         if handled_popup:
                             break
                             
-                except TimeoutException:
+                except selenium_exceptions.TimeoutException:
                     continue
                 except Exception as e:
                     logger.debug(f"弹窗处理异常: {e}")
@@ -647,15 +2917,15 @@ def handle_comprehensive_popups(driver: webdriver.Chrome) -> bool:
     
     return handled_popup
 
-def find_ai_related_links(soup: BeautifulSoup, base_url: str) -> List[Dict]:
-    """智能发现AI相关的子页面链接，用于智能导航"""
+def find_ai_related_links(links: List[Dict], base_url: str) -> List[Dict]:
+    """智能发现AI相关的子页面链接，用于智能导航。links 为解析后端返回的链接列表。"""
     ai_links = []
     
-    # 查找所有链接
-    for link in soup.find_all('a', href=True):
-        href = link.get('href', '')
-        text = link.get_text(strip=True).lower()
-        title = link.get('title', '').lower()
+    # 遍历所有链接
+    for link in links:
+        href = link.get('href') or ''
+        text = link.get('text', '').lower()
+        title = (link.get('title') or '').lower()
         
         if not href or href.startswith('#'):
             continue
@@ -688,8 +2958,8 @@ def find_ai_related_links(soup: BeautifulSoup, base_url: str) -> List[Dict]:
                  
             ai_links.append({
                 'url': full_url,
-                'text': link.get_text(strip=True)[:100],
-                'title': link.get('title', '')[:100],
+                'text': link.get('text', '')[:100],
+                'title': (link.get('title') or '')[:100],
                 'relevance_score': relevance_score,
                 'matched_keywords': matched_keywords
             })
@@ -700,8 +2970,8 @@ def find_ai_related_links(soup: BeautifulSoup, base_url: str) -> List[Dict]:
     unique_links = []
     
     for link in ai_links:
-        # 移除URL末尾的'/'差异
-        normalized_url = link['url'].rstrip('/')
+        # 规范化URL，合并等价链接
+        normalized_url = canonicalize_url(link['url'])
         if normalized_url not in seen_urls:
             seen_urls.add(normalized_url)
             unique_links.append(link)
@@ -709,118 +2979,245 @@ def find_ai_related_links(soup: BeautifulSoup, base_url: str) -> List[Dict]:
     # 限制返回数量
     return unique_links[:Config.MAX_AI_LINKS_PER_PAGE]
 
-def smart_navigate_and_extract(driver: webdriver.Chrome, url: str, max_depth: int) -> Tuple[List[str], List[Dict], List[str]]:
-    """智能导航和提取：自动跳转AI相关子页面"""
+def analyze_page_source(html: str, current_url: str) -> Tuple[List[Dict], str, List[Dict], str]:
+    """
+    解析渲染后的页面源码（大页面交给进程池）。
+    返回 (文档链接列表, 主要内容文本, 正文链接列表, h1标题)，正文链接用于后续发现AI相关子链接。
+    """
+    parsed = parse_html_offloaded(html)
+    
+    # 查找文档链接
+    doc_links = []
+    for link in parsed['links']:
+        href = link['href']
+        link_text = link['text'].lower()
+        
+        # 检查是否为文档链接
+        if any(ext in href.lower() for ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']) or \
+           any(keyword in href.lower() for keyword in ['download', 'document', 'file', 'attachment']) or \
+           any(keyword in link_text for keyword in ['download', 'pdf', 'document', 'read more']):
+            
+            full_doc_url = urljoin(current_url, href)
+            doc_links.append({
+                'url': full_doc_url,
+                'text': link['text'],
+                'type': 'document'
+            })
+    
+    return doc_links, parsed['main_text'], parsed['content_links'], parsed['heading']
+
+def render_pages_in_tabs(driver: webdriver.Chrome, urls: List[str], log=logger.info,
+                         budget: Optional[TaskBudget] = None) -> List[Tuple[str, Optional[str]]]:
+    """
+    在同一个浏览器实例的多个标签页中并行渲染一组页面。
+    页面通过 window.location 异步开始加载，因此同一批次内的页面是同时渲染的；
+    随后轮流检查各标签页，加载完成的立即用一段页面内脚本关闭弹窗并滚动（不逐页等待），
+    全部就绪后共用一次 TAB_SETTLE_SECONDS 等待动态内容，再读取源码。一层的耗时约为最慢页面的加载时间加一次等待。
+    每批次标签页数受 NAVIGATION_TABS 限制，并遵守按主机的礼貌抓取限制。
+    返回与输入顺序一致的 (url, page_source) 列表，失败的页面 page_source 为 None。
+    budget 耗尽时不再打开新的批次（已渲染的页面照常返回），等待超时不超过剩余时间。
+    """
+    page_sources: Dict[str, Optional[str]] = {u: None for u in urls}
+    pending = list(urls)
+    home_handle = driver.current_window_handle
+    
+    while pending:
+        if budget:
+            try:
+                budget.check('页面渲染')
+            except BudgetExceeded as e:
+                log(f"⏱️ 跳过 {len(pending)} 个未渲染页面: {e}")
+                break
+        opened = []  # [(handle, url)]
+        deferred = []
+        
+        # 1. 打开一批标签页，页面在后台同时加载
+        for current_url in pending:
+            if len(opened) >= max(1, Config.NAVIGATION_TABS):
+                deferred.append(current_url)
+                continue
+            # 本批第一个页面可阻塞等待主机配额，其余页面拿不到配额就推迟到下一批（避免互相等待）
+            if not host_politeness.acquire(current_url, blocking=not opened):
+                deferred.append(current_url)
+                continue
+            try:
+                driver.switch_to.new_window('tab')
+                driver.execute_script("window.location.href = arguments[0];", current_url)
+                opened.append((driver.current_window_handle, current_url))
+            except selenium_exceptions.WebDriverException as e:
+                host_politeness.release(current_url)
+                log(f"⚠️ 打开标签页失败 {current_url}: {e}")
+        
+        if opened:
+            log(f"🗂️ 并行渲染 {len(opened)} 个页面")
+        
+        # 2. 轮流检查各标签页（共用一个截止时间，不在单个页面上阻塞等待）：
+        #    加载完成的标签页立即在页面内一次性关闭弹窗并滚动到底部，不做逐页的等待
+        timeout = budget.timeout(Config.PAGE_LOAD_TIMEOUT) if budget else Config.PAGE_LOAD_TIMEOUT
+        deadline = time.time() + timeout
+        batch_start = time.perf_counter()
+        waiting = list(opened)
+        ready = []
+        try:
+            while waiting:
+                for tab in list(waiting):
+                    handle, current_url = tab
+                    try:
+                        driver.switch_to.window(handle)
+                        if not driver.execute_script(TAB_READY_SCRIPT):
+                            continue
+                        stage_metrics.observe('page_load', time.perf_counter() - batch_start, _host_label(current_url), 'tab')
+                        with stage_timer('popup_handling', current_url, method='tab'):
+                            clicked = driver.execute_script(DISMISS_POPUPS_AND_SCROLL_SCRIPT, POPUP_HANDLERS)
+                        if clicked:
+                            logger.info(f"✅ 成功处理{clicked}弹窗 (标签页)")
+                        ready.append(tab)
+                    except selenium_exceptions.WebDriverException as e:
+                        log(f"⚠️ 浏览器操作失败 {current_url}: {e}")
+                    waiting.remove(tab)
+                if waiting:
+                    if time.time() >= deadline:
+                        for _, current_url in waiting:
+                            log(f"⚠️ 页面加载超时: {current_url}")
+                        break
+                    time.sleep(Config.TAB_POLL_INTERVAL)
+            
+            # 3. 所有标签页共用一次等待，让滚动触发的动态内容加载完成，然后读取源码
+            if ready:
+                with stage_timer('scroll_readiness', method='tabs'):
+                    time.sleep(min(Config.TAB_SETTLE_SECONDS, max(0, deadline - time.time())))
+            for handle, current_url in ready:
+                try:
+                    driver.switch_to.window(handle)
+                    page_sources[current_url] = driver.page_source
+                except selenium_exceptions.WebDriverException as e:
+                    log(f"⚠️ 读取页面源码失败 {current_url}: {e}")
+        finally:
+            for handle, current_url in opened:
+                try:
+                    driver.switch_to.window(handle)
+                    driver.close()  # 关闭标签页
+                except selenium_exceptions.WebDriverException:
+                    pass
+                host_politeness.release(current_url)
+        
+        try:
+            driver.switch_to.window(home_handle)
+        except selenium_exceptions.WebDriverException as e:
+            log(f"⚠️ 切换回主标签页失败: {e}")
+            break
+        
+        pending = deferred
+    
+    return [(u, page_sources[u]) for u in urls]
+
+def smart_navigate_and_extract(get_driver: Callable[[], webdriver.Chrome], url: str, max_depth: int,
+                               budget: Optional[TaskBudget] = None,
+                               page_headings: Optional[Dict[str, str]] = None) -> Tuple[List[str], List[Dict], List[str]]:
+    """
+    智能导航和提取：自动跳转AI相关子页面。
+    按层（广度优先）推进，同一层的兄弟页面在多个标签页中并行渲染，
+    因此导航耗时大致按层数而不是页面数增长。
+    get_driver 在第一次需要渲染页面时才被调用；全部命中页面缓存时不会启动浏览器。
+    budget 耗尽时停止导航，返回已经提取到的部分结果。
+    传入 page_headings 时记录每个页面的 h1 标题（页面URL -> 标题）。
+    """
     extracted_texts = []
     visited_urls = set()
     documents_info = []
     navigation_log = []
+    page_cache = get_page_cache()
     
     def log_and_append(message):
         logger.info(message)
         navigation_log.append(message)
 
-    def extract_from_page(current_url: str, depth: int = 0) -> None:
-        """递归提取子函数"""
-        # 阻止条件：达到最大深度、已访问过
-        if depth > max_depth or current_url.rstrip('/') in visited_urls:
-            return
+    frontier = [url]
+    depth = 0
+    
+    # 逐层处理：达到最大深度或没有新页面时停止
+    while frontier and depth <= max_depth:
+        level_pages = []  # [(url, 页面数据)]，页面数据为None表示需要渲染
+        for current_url in frontier:
+            if canonicalize_url(current_url) in visited_urls:
+                continue
+            visited_urls.add(canonicalize_url(current_url))
+            log_and_append(f"🔍 正在分析页面 (深度 {depth}): {current_url}")
             
-        visited_urls.add(current_url.rstrip('/'))
-        log_and_append(f"🔍 正在分析页面 (深度 {depth}): {current_url}")
+            cached = page_cache.get(current_url) if page_cache else None
+            if cached:
+                log_and_append(f"💾 命中页面缓存: {current_url}")
+            level_pages.append((current_url, cached))
         
-        try:
-            # 导航到页面
-            driver.get(current_url)
-            time.sleep(random.uniform(2, 3)) # 导航后等待
-            
-            # 处理弹窗和动态加载
-            handle_page_interactions(driver, current_url)
-            
-            # 等待页面完全加载
-            WebDriverWait(driver, 10).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
-            
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            # 1. 查找文档链接
-            doc_links = []
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                link_text = a_tag.get_text(strip=True).lower()
-                
-                # 检查是否为文档链接
-                if any(ext in href.lower() for ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']) or \
-                   any(keyword in href.lower() for keyword in ['download', 'document', 'file', 'attachment']) or \
-                   any(keyword in link_text for keyword in ['download', 'pdf', 'document', 'read more']):
-                    
-                    full_doc_url = urljoin(current_url, href)
-                    doc_links.append({
-                        'url': full_doc_url,
-                        'text': a_tag.get_text(strip=True),
-                        'type': 'document'
-                    })
-            
-            documents_info.extend(doc_links)
-            
-            # 2. 提取当前页面的文本内容
-            # 移除不需要的元素
-            for element in soup(["script", "style", "nav", "header", "footer", "aside", 
-                               "form", "button", "img", ".navigation", ".menu", ".sidebar"]):
-                if element:
-                    element.decompose()
-            
-            # 寻找主要内容区域
-            main_content = None
-            content_selectors = [
-                'article', 'main', '.main-content', '.content', '.policy-content',
-                '#main-content', '#content', '.document-content', '.text-content',
-                '.post-content', '.entry-content', 'body'
-            ]
-            
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content and len(main_content.get_text(strip=True)) > Config.MIN_CONTENT_LENGTH:
-                    break
+        # 只渲染未命中缓存的页面
+        to_render = [u for u, cached in level_pages if cached is None]
+        rendered = {}
+        if to_render:
+            for current_url, html in render_pages_in_tabs(get_driver(), to_render, log_and_append, budget):
+                if html is None:
+                    continue
+                try:
+                    with stage_timer('link_discovery', current_url, method=resolve_html_backend()):
+                        doc_links, page_text, content_links, heading = analyze_page_source(html, current_url)
+                        ai_links = find_ai_related_links(content_links, current_url)
+                    page_data = {
+                        'page_text': page_text,
+                        'doc_links': doc_links,
+                        'ai_links': ai_links,
+                        'fetched_at': time.time(),
+                        'heading': heading
+                    }
+                    rendered[current_url] = page_data
+                    if page_cache:
+                        with stage_timer('persistence', current_url, method='page_cache'):
+                            page_cache.put(current_url, page_text, doc_links, ai_links, heading)
+                except Exception as e:
+                    log_and_append(f"⚠️ 页面处理失败 {current_url}: {e}")
+        
+        next_frontier = []
+        for current_url, cached in level_pages:
+            page_data = cached or rendered.get(current_url)
+            if not page_data:
+                continue
             
-            page_text = ""
-            if main_content:
-                page_text = main_content.get_text(strip=True, separator=' ')
+            documents_info.extend(page_data['doc_links'])
+            page_text = page_data['page_text']
+            if page_headings is not None and page_data.get('heading'):
+                page_headings[current_url] = page_data['heading']
             
             # 只保存有足够内容的页面
             if len(page_text) > Config.MIN_CONTENT_LENGTH:
                 formatted_text = (
                     f"[页面URL]: {current_url}\n"
                     f"[提取深度]: {depth}\n"
-                    f"[提取时间]: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                    f"[提取时间]: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(page_data['fetched_at']))}\n\n"
                     f"{page_text}"
                 )
                 extracted_texts.append(formatted_text)
                 log_and_append(f"✅ 从页面提取文本: {len(page_text)} 字符")
             
-            # 3. 递归导航到AI相关子链接
+            # 收集下一层的AI相关子链接
             if depth < max_depth:
-                ai_links = find_ai_related_links(soup, current_url)
+                ai_links = page_data['ai_links']
                 log_and_append(f"🔗 发现 {len(ai_links)} 个AI相关子链接")
                 
                 # 访问前N个最相关的子链接
                 for ai_link in ai_links:
-                    normalized_sub_url = ai_link['url'].rstrip('/')
+                    normalized_sub_url = canonicalize_url(ai_link['url'])
                     if normalized_sub_url not in visited_urls:
                         log_and_append(f"🎯 跳转到AI相关页面 (得分{ai_link['relevance_score']}): {ai_link['text'][:50]}...")
-                        time.sleep(random.uniform(2, 4))  # 随机延迟
-                        extract_from_page(ai_link['url'], depth + 1)
-                        
-        except TimeoutException:
-            log_and_append(f"⚠️ 页面加载超时: {current_url}")
-        except WebDriverException as e:
-            log_and_append(f"⚠️ 浏览器操作失败 {current_url}: {e}")
-        except Exception as e:
-            log_and_append(f"⚠️ 页面处理失败 {current_url}: {e}")
-    
-    # 开始递归提取
-    extract_from_page(url, 0)
+                        next_frontier.append(ai_link['url'])
+        
+        frontier = next_frontier
+        depth += 1
+        
+        # 预算耗尽时保留已提取的页面，不再进入下一层
+        if budget and frontier:
+            try:
+                budget.check('智能导航')
+            except BudgetExceeded as e:
+                log_and_append(f"⏱️ 导航在深度 {depth} 前停止: {e}")
+                break
     
     return extracted_texts, documents_info, navigation_log
 
@@ -828,35 +3225,63 @@ def handle_page_interactions(driver: webdriver.Chrome, url: str) -> None:
     """处理页面交互：cookies、弹窗、滚动等"""
     try:
         # 1. 使用综合弹窗处理函数
-        handle_comprehensive_popups(driver)
+        with stage_timer('popup_handling', url):
+            handle_comprehensive_popups(driver)
         
-        # 2. 滚动页面以触发动态加载
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3);")
-        time.sleep(1)
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight*2/3);")
-        time.sleep(1)
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        
-        # 3. 尝试等待动态内容加载（如JavaScript渲染）
-        WebDriverWait(driver, 5).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
+        with stage_timer('scroll_readiness', url):
+            # 2. 滚动页面以触发动态加载
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3);")
+            time.sleep(1)
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight*2/3);")
+            time.sleep(1)
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(2)
+            
+            # 3. 尝试等待动态内容加载（如JavaScript渲染）
+            WebDriverWait(driver, 5).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
         
     except Exception as e:
         logger.debug(f"页面交互处理异常: {e}")
 
-# --- 核心处理函数 (Main Processing Logic) ---
-def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -> Tuple[str, int, Dict]:
+class LazyBrowser:
     """
-    综合URL处理函数。
-    1. 检查是否为直接PDF。
-    2. 启动智能导航（Selenium）递归提取页面内容和文档链接。
-    3. 下载并提取发现的文档文本。
-    4. 回退到传统网页文本提取（如果前两步失败）。
+    按需启动的浏览器：第一次调用 get() 时才初始化（多进程模式下从本进程的 DriverPool 取出），
+    页面全部命中缓存时不会启动Chrome。close() 归还浏览器池或直接关闭。
     """
-    logger.info(f"🌐 开始综合处理URL: {url}")
-    
+    def __init__(self):
+        self.driver: Optional[webdriver.Chrome] = None
+
+    def get(self) -> webdriver.Chrome:
+        if self.driver is None:
+            if active_driver_pool is not None:
+                self.driver = active_driver_pool.acquire() # 多进程模式：复用本进程的浏览器
+            else:
+                with driver_lock: # 使用锁保护，防止多线程同时初始化浏览器
+                    self.driver = init_chrome_driver_stealth()
+            
+            if not self.driver:
+                raise Exception("无法初始化浏览器驱动")
+        return self.driver
+
+    def cookies(self) -> List[Dict]:
+        """浏览器会话的cookies（没有启动浏览器时为空）"""
+        return self.driver.get_cookies() if self.driver else []
+
+    def close(self) -> None:
+        driver, self.driver = self.driver, None
+        if driver and active_driver_pool is not None:
+            active_driver_pool.release(driver) # 归还浏览器，由池决定复用还是重建
+        elif driver:
+            memory_watchdog.untrack_driver(driver)
+            try:
+                driver.quit() # 确保关闭浏览器实例
+            except Exception as e:
+                logger.warning(f"关闭浏览器失败: {e}")
+
+def new_download_session() -> requests.Session:
+    """文档探测和下载使用的requests会话"""
     session = requests.Session()
     session.headers.update({
         'User-Agent': random.choice(USER_AGENTS),
@@ -864,6 +3289,105 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
         'DNT': '1',
         'Connection': 'keep-alive'
     })
+    return session
+
+def apply_browser_cookies(session: requests.Session, cookies: List[Dict]) -> None:
+    """把浏览器cookies复制到requests会话，下载文档时带上同意弹窗等会话状态"""
+    for cookie in cookies:
+        try:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
+        except Exception as e:
+            logger.debug(f"设置Cookie失败: {e}")
+
+def build_page_info(url: str, url_index: Any, row_data: Optional[Dict], page_heading: Optional[str] = None) -> Dict:
+    """
+    下载文档时用于文件名和元数据的页面信息。
+    站点配置可以让国家来自URL（Config.PAGE_INFO_COUNTRY_URL_PATTERN）、政策标题来自落地页的 h1 标题
+    （Config.PAGE_INFO_TITLE_FROM_HEADING，page_heading 为空时仍使用输入行）。
+    """
+    country = row_data.get('Country', 'unknown') if row_data else 'unknown'
+    if Config.PAGE_INFO_COUNTRY_URL_PATTERN:
+        match = re.search(Config.PAGE_INFO_COUNTRY_URL_PATTERN, url, re.I)
+        if match:
+            country = match.group(1)
+    policy_title = str(row_data.get('Policy initiative ID', f"policy_{url_index}")) if row_data else f"policy_{url_index}"
+    if Config.PAGE_INFO_TITLE_FROM_HEADING and page_heading:
+        policy_title = page_heading
+    return {
+        'country': country,
+        'policy_title': policy_title,
+        'source_url': url
+    }
+
+def rank_discovered_documents(discovered_docs: List[Dict]) -> List[Dict]:
+    """按规范URL去重后排序：PDF优先，链接文字中AI关键词多的优先"""
+    unique_docs = {canonicalize_url(d['url']): d for d in discovered_docs}.values()
+    return sorted(unique_docs, key=lambda x: (
+        'pdf' in x.get('url', '').lower(),
+        len([kw for kw in Config.AI_GOVERNANCE_KEYWORDS if kw.lower() in x.get('text', '').lower()])
+    ), reverse=True)
+
+def combine_content_blocks(doc_texts: List[str], page_texts: List[str], processing_info: Dict) -> str:
+    """组合所有提取的内容（文档优先，其次是页面），并记录处理方法（内容来自站点适配器时以 site_adapter 开头）"""
+    all_texts = []
+    doc_texts = dedupe_document_texts(doc_texts, processing_info)
+    source = 'site_adapter' if processing_info.get('site_adapter') else 'smart_navigation'
+    
+    # 添加文档内容（优先级最高）
+    if doc_texts:
+        all_texts.extend([f"=== 文档内容 {i+1} ===\n{text}" for i, text in enumerate(doc_texts)])
+        processing_info['method'] = f'{source}_with_docs'
+    
+    # 添加页面内容
+    if page_texts:
+        all_texts.extend([f"=== 页面内容 {i+1} ===\n{text}" for i, text in enumerate(page_texts)])
+        if not doc_texts:  # 如果没有文档，则标记为页面内容
+            processing_info['method'] = f'{source}_pages'
+    
+    if all_texts:
+        processing_info['success'] = True
+        logger.info(f"✅ 智能导航成功: 提取了{len(all_texts)}个内容块")
+    return "\n\n--- 内容分隔符 ---\n\n".join(all_texts)
+
+def direct_document_text(text: str, processing_info: Dict) -> str:
+    """直接文档链接的内容块（同样经过近似重复检测）"""
+    return f"=== 文档内容 1 ===\n{dedupe_document_texts([text], processing_info)[0]}"
+
+def finalize_extracted_text(extracted_text: str, url: str, processing_info: Dict) -> str:
+    """最终检查：没有内容记为失败，内容过少记为警告，然后规范化文本"""
+    if not extracted_text or extracted_text.startswith("[ERROR]"):
+        if not extracted_text:
+            extracted_text = f"[ERROR] 无法从URL提取任何有效内容: {url}"
+        processing_info['success'] = False
+        processing_info['method'] = 'failed'
+    elif not extracted_text.startswith("[ERROR]"):
+        # 检查内容质量（只剩近似重复文档引用的内容不算过少）
+        if len(extracted_text.strip()) < 100 and not processing_info.get('near_duplicate_skipped'):
+            extracted_text = f"[WARNING] 提取内容过少 ({len(extracted_text)} 字符): {extracted_text}"
+            processing_info['success'] = False
+            processing_info['method'] = 'low_content'
+        else:
+            processing_info['success'] = True
+    
+    return normalize_extracted_text(extracted_text)
+
+# --- 核心处理函数 (Main Processing Logic) ---
+def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None,
+                              budget: Optional[TaskBudget] = None) -> Tuple[str, int, Dict]:
+    """
+    综合URL处理函数。
+    1. 检查是否为直接PDF。
+    2. 已知站点用站点适配器直接请求数据接口；否则启动智能导航（Selenium）递归提取页面内容和文档链接。
+    3. 下载并提取发现的文档文本。
+    4. 回退到传统网页文本提取（如果前两步失败）。
+    所有阶段共享同一个 TaskBudget；预算耗尽时停止后续阶段，已提取的内容作为部分结果返回，
+    processing_info['budget_exhausted'] 记录原因。
+    """
+    logger.info(f"🌐 开始综合处理URL: {url}")
+    if budget is None:
+        budget = TaskBudget.from_config()
+    
+    session = new_download_session()
     
     extracted_text = ""
     pdf_docs_count = 0
@@ -877,22 +3401,19 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
     }
     
     # 提取页面信息（用于文件名和元数据）
-    page_info = {
-        'country': row_data.get('Country', 'unknown') if row_data else 'unknown',
-        'policy_title': str(row_data.get('Policy initiative ID', f"policy_{url_index}")) if row_data else f"policy_{url_index}",
-        'source_url': url
-    }
+    page_info = build_page_info(url, url_index, row_data)
     
-    # 尝试 1: 检查是否为直接PDF链接
-    if is_valid_pdf_url(url):
+    # 尝试 1: 检查是否为直接PDF链接（探测确认不是HTML页面后再下载）
+    if is_valid_pdf_url(url) and (not Config.ENABLE_DOCUMENT_PROBE or
+                                  is_downloadable_probe(probe_documents([{'url': url}], session, budget)[0])):
         logger.info("🔍 检测到可能的直接PDF链接，尝试直接下载")
         # 直接PDF下载使用重试机制
         try:
-            doc_path, error, file_info = download_document_smart(url, session, Config.PDF_SAVE_DIR, url_index, page_info)
+            doc_path, error, file_info = download_document_smart(url, session, Config.PDF_SAVE_DIR, url_index, page_info, budget)
             if doc_path:
-                text = extract_text_from_document(doc_path)
+                text = extract_document_cached(doc_path, budget)
                 if not text.startswith("[ERROR]") and len(text.strip()) > 100:
-                    extracted_text = f"=== 文档内容 1 ===\n{text}"
+                    extracted_text = direct_document_text(text, processing_info)
                     pdf_docs_count = 1
                     processing_info.update({
                         'method': 'direct_pdf',
@@ -900,8 +3421,10 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
                         'success': True,
                         'file_info': file_info
                     })
+                    if budget.exhausted:
+                        processing_info['budget_exhausted'] = budget.exhausted_reason
                     logger.info("✅ 直接PDF下载和提取成功")
-                    return clean_text_for_csv(extracted_text), pdf_docs_count, processing_info
+                    return normalize_extracted_text(extracted_text), pdf_docs_count, processing_info
                 else:
                     logger.warning(f"⚠️ 直接PDF内容提取问题: {error or '内容过少'}")
             else:
@@ -909,86 +3432,88 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
         except RetryError as e:
             logger.error(f"❌ 直接PDF下载重试失败: {e.last_attempt.exception()}")
             pass # 继续尝试下一个方法
+        except BudgetExceeded as e:
+            logger.warning(f"⏱️ 直接PDF下载因预算耗尽中止: {e}")
 
     # 尝试 2: 使用智能导航处理网页
-    driver = None
+    browser = LazyBrowser()  # 按需初始化浏览器：页面全部命中缓存时不启动Chrome
+    
+    page_texts = []
+    discovered_docs = []
+    navigation_log = []
+    successful_texts = []
+    page_headings = {}
+    
     try:
-        with driver_lock: # 使用锁保护，防止多线程同时初始化浏览器
-            driver = init_chrome_driver_stealth()
-        
-        if not driver:
-            raise Exception("无法初始化浏览器驱动")
-        
-        logger.info("🤖 启动智能导航模式")
-        
-        page_texts = []
-        discovered_docs = []
-        navigation_log = []
+        budget.check('智能导航')
         
+        # 已知站点先尝试适配器（直接请求数据接口），失败时再使用浏览器
+        adapter_result = fetch_with_site_adapter(url, session, budget)
+        if adapter_result is not None:
+            page_texts, discovered_docs = adapter_result['page_texts'], adapter_result['documents']
+            page_headings[url] = adapter_result.get('heading', '')
+            processing_info['site_adapter'] = adapter_result['adapter']
         # 根据配置决定是否使用智能导航
-        if Config.ENABLE_SMART_NAVIGATION:
-            page_texts, discovered_docs, navigation_log = smart_navigate_and_extract(
-                driver, url, max_depth=Config.MAX_NAVIGATION_DEPTH
-            )
+        elif Config.ENABLE_SMART_NAVIGATION:
+            logger.info("🤖 启动智能导航模式")
+            with stage_timer('navigation', url):
+                page_texts, discovered_docs, navigation_log = smart_navigate_and_extract(
+                    browser.get, url, max_depth=Config.MAX_NAVIGATION_DEPTH, budget=budget,
+                    page_headings=page_headings
+                )
         else:
             # 传统单页处理
-            driver.get(url)
-            handle_page_interactions(driver, url)
+            logger.info("🤖 启动单页处理模式")
+            with stage_timer('page_load', url, method='direct'):
+                browser.get().get(url)
+            handle_page_interactions(browser.driver, url)
             
             # 即使禁用智能导航，也尝试提取当前页面的文档链接
-            soup = BeautifulSoup(driver.page_source, "html.parser")
+            parsed = parse_html_offloaded(browser.driver.page_source)
+            page_headings[url] = parsed['heading']
             doc_links = []
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
+            for link in parsed['links']:
+                href = link['href']
                 if any(ext in href.lower() for ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']):
-                    doc_links.append({'url': urljoin(url, href), 'text': a_tag.get_text(strip=True), 'type': 'document'})
+                    doc_links.append({'url': urljoin(url, href), 'text': link['text'], 'type': 'document'})
             discovered_docs.extend(doc_links)
         
-        # 保存cookies到session，供requests下载文档使用
-        cookies = driver.get_cookies()
-        for cookie in cookies:
-            try:
-                session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'))
-            except Exception as e:
-                logger.debug(f"设置Cookie失败: {e}")
-                
+        # 保存cookies到session，供requests下载文档使用（全部命中缓存时没有浏览器会话）
+        apply_browser_cookies(session, browser.cookies())
+        page_info = build_page_info(url, url_index, row_data, page_headings.get(url))
         
         processing_info.update({
             'pages_visited': len(page_texts),
             'ai_links_found': len([d for d in discovered_docs if 'ai' in d.get('text', '').lower()]),
             # 修正：只计算唯一的文档URL
-            'documents_found': len(set([d['url'] for d in discovered_docs]))
+            'documents_found': len(set([canonicalize_url(d['url']) for d in discovered_docs]))
         })
         
-        logger.info(f"📊 智能导航结果: 访问了{len(page_texts)}个页面, 发现{len(discovered_docs)}个文档")
+        logger.info(f"📊 {'站点适配器' if adapter_result else '智能导航'}结果: 访问了{len(page_texts)}个页面, 发现{len(discovered_docs)}个文档")
         
         # 下载发现的文档
-        successful_texts = []
         if discovered_docs:
-            # 去重和过滤无效链接
-            unique_docs = {d['url']:d for d in discovered_docs}.values()
+            # 去重和过滤无效链接，排序：PDF优先，AI关键词多的优先
+            sorted_docs = rank_discovered_documents(discovered_docs)
             
-            logger.info(f"📄 开始下载 {len(unique_docs)} 个发现的文档...")
+            logger.info(f"📄 开始下载 {len(sorted_docs)} 个发现的文档...")
             
-            # 排序：PDF优先，AI关键词多的优先
-            sorted_docs = sorted(unique_docs, key=lambda x: (
-                'pdf' in x.get('url', '').lower(),
-                len([kw for kw in Config.AI_GOVERNANCE_KEYWORDS if kw.lower() in x.get('text', '').lower()])
-            ), reverse=True)
+            # 探测候选链接，只下载确认的文档
+            docs_to_download = select_documents_to_download(sorted_docs, session, budget)
             
             # 使用线程池并发下载
             with ThreadPoolExecutor(max_workers=Config.MAX_THREADS) as executor:
                 futures = [
-                    executor.submit(download_document_smart, doc['url'], session, Config.PDF_SAVE_DIR, 
-                                  f"{url_index}_{i}", page_info)
-                    for i, doc in enumerate(sorted_docs[:Config.PDF_DOWNLOAD_LIMIT])
+                    submit_in_context(executor, download_document_smart, doc['url'], session, Config.PDF_SAVE_DIR, 
+                                      f"{url_index}_{i}", page_info, budget)
+                    for i, doc in enumerate(docs_to_download)
                 ]
                 
                 for i, future in enumerate(as_completed(futures)):
                     try:
                         doc_path, error, file_info = future.result()
                         if doc_path:
-                            text = extract_text_from_document(doc_path)
+                            text = extract_document_cached(doc_path, budget)
                             if not text.startswith("[ERROR]") and len(text.strip()) > 100:
                                 successful_texts.append(text)
                                 pdf_docs_count += 1
@@ -997,60 +3522,25 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
                                 logger.warning(f"⚠️ 文档内容提取问题: {error or '内容过少'}")
                         else:
                             logger.warning(f"❌ 文档下载失败: {error}")
+                    except BudgetExceeded as e:
+                        logger.warning(f"⏱️ 文档下载因预算耗尽中止: {e}")
                     except Exception as e:
                          logger.error(f"❌ 文档下载并发任务失败: {e}")
         
         # 组合所有提取的内容
-        all_texts = []
-        
-        # 添加文档内容（优先级最高）
-        if successful_texts:
-            all_texts.extend([f"=== 文档内容 {i+1} ===\n{text}" for i, text in enumerate(successful_texts)])
-            processing_info['method'] = 'smart_navigation_with_docs'
-        
-        # 添加页面内容
-        if page_texts:
-            all_texts.extend([f"=== 页面内容 {i+1} ===\n{text}" for i, text in enumerate(page_texts)])
-            if not successful_texts:  # 如果没有文档，则标记为页面内容
-                processing_info['method'] = 'smart_navigation_pages'
-        
-        if all_texts:
-            extracted_text = "\n\n--- 内容分隔符 ---\n\n".join(all_texts)
-            processing_info['success'] = True
-            logger.info(f"✅ 智能导航成功: 提取了{len(all_texts)}个内容块")
+        extracted_text = combine_content_blocks(successful_texts, page_texts, processing_info)
         
         # 尝试 3: 如果智能导航没有结果，回退到传统网页文本提取 (仅针对首页)
-        if not extracted_text and not Config.ENABLE_SMART_NAVIGATION:
+        if not extracted_text and not Config.ENABLE_SMART_NAVIGATION and adapter_result is None and not budget.exhausted:
             logger.info("📝 回退到传统网页文本提取...")
             
             # 如果之前没有访问过首页，现在访问
             if not page_texts:
-                driver.get(url)
-                handle_comprehensive_popups(driver)
-            
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            # 移除不需要的元素
-            for element in soup(["script", "style", "nav", "header", "footer", "aside", 
-                               "form", "button", "img", ".navigation", ".menu", ".sidebar"]):
-                if element:
-                    element.decompose()
-            
-            # 寻找主要内容区域
-            main_content = None
-            content_selectors = [
-                'article', 'main', '.main-content', '.content', '.policy-content',
-                '#main-content', '#content', '.document-content', '.text-content', 'body'
-            ]
+                browser.get().get(url)
+                handle_comprehensive_popups(browser.driver)
             
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content:
-                    break
-            
-            webpage_text = ""
-            if main_content:
-                webpage_text = main_content.get_text(strip=True, separator=' ')
+            # 移除不需要的元素后提取主要内容区域
+            webpage_text = parse_html_offloaded(browser.driver.page_source)['main_text']
             
             # 清理和格式化网页文本
             if len(webpage_text.strip()) > 200: # 只有内容足够多才使用
@@ -1066,6 +3556,11 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
                     'success': True
                 })
                 logger.info("✅ 回退网页文本提取成功")
+    
+    except BudgetExceeded as e:
+        # 预算耗尽：保留已经提取到的页面和文档内容
+        logger.warning(f"⏱️ URL处理因预算耗尽提前结束，保留部分结果: {e}")
+        extracted_text = combine_content_blocks(successful_texts, page_texts, processing_info)
             
     except Exception as e:
         logger.error(f"❌ URL处理失败: {str(e)}", exc_info=True)
@@ -1073,29 +3568,13 @@ def process_url_comprehensive(url: str, url_index: int, row_data: Dict = None) -
         processing_info['error'] = str(e)
         
     finally:
-        if driver:
-            try:
-                driver.quit() # 确保关闭浏览器实例
-            except Exception as e:
-                logger.warning(f"关闭浏览器失败: {e}")
+        browser.close()
     
-    # 最终检查和处理
-    if not extracted_text or extracted_text.startswith("[ERROR]"):
-        if not extracted_text:
-            extracted_text = f"[ERROR] 无法从URL提取任何有效内容: {url}"
-        processing_info['success'] = False
-        processing_info['method'] = 'failed'
-    elif not extracted_text.startswith("[ERROR]"):
-        # 检查内容质量
-        if len(extracted_text.strip()) < 100:
-            extracted_text = f"[WARNING] 提取内容过少 ({len(extracted_text)} 字符): {extracted_text}"
-            processing_info['success'] = False
-            processing_info['method'] = 'low_content'
-        else:
-            processing_info['success'] = True
+    if budget.exhausted:
+        processing_info['budget_exhausted'] = budget.exhausted_reason
     
-    # 清理文本，避免CSV问题
-    final_cleaned_text = clean_text_for_csv(extracted_text)
+    # 最终检查和处理
+    final_cleaned_text = finalize_extracted_text(extracted_text, url, processing_info)
     
     return final_cleaned_text, pdf_docs_count, processing_info
 
@@ -1115,52 +3594,388 @@ def generate_safe_filename(text: str, max_length: int = 50) -> str:
     
     return safe_text if safe_text else "unknown"
 
-def save_processing_results(results: List[Dict], output_path: Path) -> None:
-    """保存处理结果到CSV文件"""
+# 处理结果新增列（按输出顺序），原始输入列排在这些列之前
+RESULT_COLUMNS = [
+    "提取文本", "AI治理相关性", "文件名", "处理状态", 
+    "PDF文档数", "处理时间(秒)", "文本长度", "处理方法",
+    "访问页面数", "发现文档数", "AI链接数", "规范URL", "结果复用自", "预算耗尽", "追踪ID",
+    "近似重复文档数", "文档聚类"
+]
+
+def fan_out_result(result: Dict, duplicate_rows: List[Dict]) -> List[Dict]:
+    """
+    将一个唯一URL的处理结果分发给指向同一规范URL的其他输入行：
+    保留各行自己的原始列，复用处理结果列，并记录结果来源的编号。
+    """
+    source_id = result.get('编号', '')
+    fanned_out = []
+    for row_dict in duplicate_rows:
+        record = {**row_dict}
+        for col in RESULT_COLUMNS:
+            if col in result:
+                record[col] = result[col]
+        record["结果复用自"] = source_id
+        fanned_out.append(record)
+    return fanned_out
+
+# Parquet 中结果列的类型；原始输入列一律保存为字符串（编号除外）
+def _result_column_types() -> Dict[str, Any]:
+    category = pa.dictionary(pa.int32(), pa.string())
+    return {  # 编号可能是整数、字符串（'P-001'）或展开任务的 '3-2'，按字符串保存
+        "提取文本": pa.large_string(), "完整文本": pa.large_string(),
+        "处理状态": category, "处理方法": category, "AI治理相关性": category,
+        "PDF文档数": pa.int32(), "访问页面数": pa.int32(), "发现文档数": pa.int32(), "AI链接数": pa.int32(),
+        "近似重复文档数": pa.int32(),
+        "文本长度": pa.int64(), "处理时间(秒)": pa.float64(),
+    }
+
+def result_full_text(record: Dict) -> str:
+    """结果记录对应的完整文本：成功的记录从文本存储读取，其余记录就是提取文本列本身"""
+    if str(record.get("处理状态", "")).startswith("成功") and record.get("文件名"):
+        text = load_row_text(str(record["文件名"]))
+        if text is not None:
+            return text
+    return str(record.get("提取文本", "") or "")
+
+class ResultsParquetWriter:
+    """
+    按行组增量写出结果Parquet：处理状态、方法等低基数列用字典编码，计数和耗时为数值列，
+    "完整文本" 列（large_string）保存未截断的提取文本。
+    列结构在第一个行组写出时确定：原始输入列在前、RESULT_COLUMNS 在后；之后的记录缺少的列写为空值，
+    之后的记录出现新列时扩展列结构（已写出的行组按新结构重写一遍，新列为空值），不丢弃数据。
+    写出失败（类型转换错误、磁盘已满等）时记录错误到 failed、删除临时文件并停止写出，
+    write/close 不抛出异常，调用方据此改写CSV，抓取本身不受影响。
+    """
+    
+    def __init__(self, path: Path, row_group_size: Optional[int] = None):
+        self.path = Path(path)
+        self.row_group_size = row_group_size or Config.PARQUET_ROW_GROUP_SIZE
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._schema = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.failed: Optional[str] = None
+    
+    def _build_schema(self, records: List[Dict], known: Optional[List[str]] = None):
+        """known 为已有的输入列（扩展列结构时保持原顺序），新出现的输入列接在其后"""
+        types = _result_column_types()
+        columns: List[str] = list(known or [])
+        for record in records:
+            columns.extend(str(col) for col in record if str(col) not in columns and col not in RESULT_COLUMNS + ["完整文本"])
+        columns.extend(RESULT_COLUMNS + ["完整文本"])
+        return pa.schema([pa.field(col, types.get(col, pa.string())) for col in columns])
+    
+    def _widen_schema(self) -> None:
+        """缓冲中的记录有新列：按扩展后的列结构重写已写出的行组，新列为空值"""
+        known = [field.name for field in self._schema if field.name not in RESULT_COLUMNS + ["完整文本"]]
+        schema = self._build_schema(self._buffer, known)
+        if len(schema) == len(self._schema):
+            return
+        logger.info(f"📐 结果出现新列，扩展Parquet列结构: {[n for n in schema.names if n not in self._schema.names]}")
+        self._writer.close()
+        old_path = self._tmp_path.with_name(self._tmp_path.name + '.old')
+        os.replace(self._tmp_path, old_path)
+        try:
+            self._writer = pq.ParquetWriter(str(self._tmp_path), schema, compression='zstd')
+            old_file = pq.ParquetFile(str(old_path))
+            for i in range(old_file.num_row_groups):
+                table = old_file.read_row_group(i)
+                self._writer.write_table(pa.table(
+                    {field.name: table.column(field.name) if field.name in table.column_names
+                     else pa.nulls(table.num_rows, field.type) for field in schema}, schema=schema))
+        finally:
+            old_path.unlink(missing_ok=True)
+        self._schema = schema
+    
+    @staticmethod
+    def _convert(value: Any, field) -> Any:
+        if value is None or (isinstance(value, float) and value != value) or value == '':
+            return None
+        if pa.types.is_integer(field.type):
+            return int(value)
+        if pa.types.is_floating(field.type):
+            return float(value)
+        return str(value)
+    
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._schema is None:
+            self._schema = self._build_schema(self._buffer)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(str(self._tmp_path), self._schema, compression='zstd')
+        elif any(str(col) not in self._schema.names for record in self._buffer for col in record):
+            self._widen_schema()
+        columns = {field.name: [] for field in self._schema}
+        for record in self._buffer:
+            record = {**record, "完整文本": result_full_text(record)}
+            record = {str(col): value for col, value in record.items()}
+            for field in self._schema:
+                columns[field.name].append(self._convert(record.get(field.name), field))
+        with stage_timer('persistence', method='results_parquet'):
+            self._writer.write_table(pa.table(columns, schema=self._schema))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+    
+    def _abandon(self, error: Exception) -> None:
+        """写出失败：放弃Parquet输出（丢弃缓冲、关闭并删除临时文件），之后的写入和关闭都不再操作"""
+        self.failed = f"{type(error).__name__}: {error}"
+        logger.error(f"❌ Parquet结果写出失败，停止写出Parquet: {self.failed}", exc_info=True)
+        self._buffer = []
+        writer, self._writer = self._writer, None
+        try:
+            if writer is not None:
+                writer.close()
+        except Exception:
+            pass
+        self._tmp_path.unlink(missing_ok=True)
+    
+    def write(self, record: Dict) -> None:
+        """追加一条结果记录，攒满一个行组后写出（线程安全）"""
+        with self._lock:
+            if self.failed:
+                return
+            self._buffer.append(record)
+            if len(self._buffer) >= self.row_group_size:
+                try:
+                    self._flush()
+                except Exception as e:
+                    self._abandon(e)
+    
+    def close(self) -> None:
+        """写出剩余记录并关闭文件（先写临时文件，关闭时原子替换）；写出失败后调用不做任何操作"""
+        with self._lock:
+            if self.failed:
+                return
+            try:
+                self._flush()
+                if self._writer is not None:
+                    self._writer.close()
+                    os.replace(self._tmp_path, self.path)
+                    self._writer = None
+                    logger.info(f"✅ Parquet结果已保存到: {self.path} ({self.rows_written} 行)")
+            except Exception as e:
+                self._abandon(e)
+    
+    def __enter__(self) -> "ResultsParquetWriter":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def parquet_output_path(output_path: Path) -> Path:
+    """结果CSV路径对应的Parquet路径"""
+    return Path(output_path).with_suffix('.parquet')
+
+def open_parquet_results_writer(output_path: Path) -> Optional[ResultsParquetWriter]:
+    """按 Config.RESULTS_FORMATS 打开Parquet结果写出器；未配置Parquet或未安装 pyarrow 时返回None"""
+    if 'parquet' not in Config.RESULTS_FORMATS and Path(output_path).suffix != '.parquet':
+        return None
+    if pa is None:
+        logger.warning("⚠️ 未安装 pyarrow，跳过Parquet结果输出（pip install pyarrow）")
+        return None
+    return ResultsParquetWriter(parquet_output_path(output_path))
+
+class ResultsCsvWriter:
+    """
+    边处理边追加写出结果CSV（utf-8-sig，提取文本列按 Excel 单元格上限截断），内存中只保留一批记录。
+    列顺序与 save_results_csv 相同：原始输入列在前、RESULT_COLUMNS 在后；
+    之后的记录出现新列时按新表头重写已写出的行（分块复制，新列为空值），不丢弃数据。
+    先写临时文件，close 时原子替换；discard 丢弃临时文件（只在Parquet写出失败时才需要CSV的场合）。
+    写出失败时记录错误到 failed 并停止写出，write/close 不抛出异常。
+    """
+    
+    def __init__(self, path: Path, flush_rows: Optional[int] = None):
+        self.path = Path(path)
+        self.flush_rows = flush_rows or Config.CSV_FLUSH_ROWS
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+        self._columns: Optional[List[str]] = None
+        self._lock = threading.Lock()
+        self._tmp_path = self.path.with_name(self.path.name + '.tmp')
+        self.failed: Optional[str] = None
+    
+    def _build_columns(self, records: List[Dict], known: Optional[List[str]] = None) -> List[str]:
+        columns: List[str] = list(known or [])
+        for record in records:
+            columns.extend(col for col in record if col not in columns and col not in RESULT_COLUMNS)
+        return columns + RESULT_COLUMNS
+    
+    def _frame(self, records: List[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(records).reindex(columns=self._columns)
+        df["提取文本"] = df["提取文本"].map(lambda text: clean_text_for_csv(text) if isinstance(text, str) else text)
+        return df
+    
+    def _widen_columns(self) -> None:
+        """缓冲中的记录有新列：按新表头重写已写出的行"""
+        known = [col for col in self._columns if col not in RESULT_COLUMNS]
+        columns = self._build_columns(self._buffer, known)
+        if len(columns) == len(self._columns):
+            return
+        logger.info(f"📐 结果出现新列，重写CSV表头: {[c for c in columns if c not in self._columns]}")
+        old_path = self._tmp_path.with_name(self._tmp_path.name + '.old')
+        os.replace(self._tmp_path, old_path)
+        try:
+            with open(self._tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+                for chunk in pd.read_csv(old_path, encoding='utf-8-sig', dtype=str, keep_default_na=False,
+                                         chunksize=self.flush_rows):
+                    chunk.reindex(columns=columns).to_csv(f, index=False, header=False)
+        finally:
+            old_path.unlink(missing_ok=True)
+        self._columns = columns
+    
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._columns is None:
+            self._columns = self._build_columns(self._buffer)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            header = True
+        else:
+            if any(col not in self._columns for record in self._buffer for col in record):
+                self._widen_columns()
+            header = False
+        with stage_timer('persistence', method='results_csv'), \
+                open(self._tmp_path, 'w' if header else 'a', encoding='utf-8-sig', newline='') as f:
+            self._frame(self._buffer).to_csv(f, index=False, header=header)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+    
+    def _abandon(self, error: Exception) -> None:
+        self.failed = f"{type(error).__name__}: {error}"
+        logger.error(f"❌ CSV结果写出失败，停止写出CSV: {self.failed}", exc_info=True)
+        self._buffer = []
+        self._tmp_path.unlink(missing_ok=True)
+    
+    def write(self, record: Dict) -> None:
+        """追加一条结果记录，攒满一批后写出（线程安全）"""
+        with self._lock:
+            if self.failed:
+                return
+            self._buffer.append(record)
+            if len(self._buffer) >= self.flush_rows:
+                try:
+                    self._flush()
+                except Exception as e:
+                    self._abandon(e)
+    
+    def close(self) -> None:
+        """写出剩余记录，把临时文件替换为结果CSV；写出失败或已丢弃后调用不做任何操作"""
+        with self._lock:
+            if self.failed:
+                return
+            try:
+                self._flush()
+                if self._tmp_path.exists():
+                    os.replace(self._tmp_path, self.path)
+                    logger.info(f"✅ 结果已保存到: {self.path} ({self.rows_written} 行)")
+            except Exception as e:
+                self._abandon(e)
+    
+    def discard(self) -> None:
+        """不保存CSV：删除已写出的临时文件"""
+        with self._lock:
+            self.failed = self.failed or "discarded"
+            self._buffer = []
+            self._tmp_path.unlink(missing_ok=True)
+    
+    def __enter__(self) -> "ResultsCsvWriter":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def save_processing_results(results: List[Dict], output_path: Path, formats: Optional[List[str]] = None) -> None:
+    """
+    保存处理结果。formats 默认为 Config.RESULTS_FORMATS：'parquet' 写到 output_path 同名的 .parquet 文件，
+    'csv' 写到 output_path。output_path 以 .parquet 结尾时只写Parquet。
+    """
+    formats = Config.RESULTS_FORMATS if formats is None else formats
+    if Path(output_path).suffix == '.parquet':
+        formats = ['parquet']
     try:
-        df = pd.DataFrame(results)
-        
-        # 定义新增和重要列的顺序
-        new_columns = [
-            "提取文本", "AI治理相关性", "文件名", "处理状态", 
-            "PDF文档数", "处理时间(秒)", "文本长度", "处理方法",
-            "访问页面数", "发现文档数", "AI链接数"
-        ]
-        
-        # 确保所有新增列都存在
-        for col in new_columns:
-            if col not in df.columns:
-                df[col] = ''
-        
-        # 将原始列和新增列合并，并保持顺序
-        original_columns = [col for col in df.columns if col not in new_columns]
-        # 移除重复列并排序
-        final_columns = []
-        for col in original_columns + new_columns:
-            if col not in final_columns:
-                final_columns.append(col)
-                
-        df = df[final_columns]
-        
-        # 保存到CSV (使用 utf-8-sig 编码以避免Excel打开乱码)
-        df.to_csv(output_path, index=False, encoding="utf-8-sig")
-        logger.info(f"✅ 结果已保存到: {output_path}")
-        
+        if 'parquet' in formats:
+            writer = open_parquet_results_writer(output_path)
+            if writer is not None:
+                with writer:
+                    for record in results:
+                        writer.write(record)
+            if (writer is None or writer.failed) and 'csv' not in formats:
+                formats = ['csv']  # Parquet不可用或写出失败时改写CSV
+        if 'csv' in formats:
+            save_results_csv(results, Path(output_path).with_suffix('.csv'))
     except Exception as e:
         logger.error(f"❌ 保存结果失败: {e}", exc_info=True)
         raise
 
-def print_summary_statistics(results: List[Dict], total_time: float) -> None:
-    """打印处理统计信息"""
-    total_count = len(results)
-    # 成功处理的定义：提取文本不以 [ERROR] 开头
-    success_count = sum(1 for r in results if not r.get('提取文本', '').startswith('[ERROR]'))
-    pdf_count = sum(r.get('PDF文档数', 0) for r in results)
-    ai_relevant_count = sum(1 for r in results if '相关' in r.get('AI治理相关性', ''))
+def save_results_csv(results: List[Dict], output_path: Path) -> None:
+    """保存处理结果到CSV文件（提取文本列按 Excel 单元格上限截断）"""
+    df = pd.DataFrame(results)
+    
+    # 新增和重要列的顺序
+    new_columns = RESULT_COLUMNS
+    
+    # 确保所有新增列都存在
+    for col in new_columns:
+        if col not in df.columns:
+            df[col] = ''
+    
+    # 将原始列和新增列合并，并保持顺序
+    original_columns = [col for col in df.columns if col not in new_columns]
+    # 移除重复列并排序
+    final_columns = []
+    for col in original_columns + new_columns:
+        if col not in final_columns:
+            final_columns.append(col)
+            
+    df = df[final_columns]
+    df["提取文本"] = df["提取文本"].map(lambda text: clean_text_for_csv(text) if isinstance(text, str) else text)
+    
+    # 保存到CSV (使用 utf-8-sig 编码以避免Excel打开乱码)
+    with stage_timer('persistence', method='results_csv'):
+        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    logger.info(f"✅ 结果已保存到: {output_path}")
+
+class ResultStats:
+    """结果记录的统计计数（边处理边累加，不保留记录本身）"""
+    def __init__(self):
+        self.total_count = 0
+        self.success_count = 0
+        self.pdf_count = 0
+        self.ai_relevant_count = 0
+        self.text_count = 0
+        self.text_length = 0
+        self._lock = threading.Lock()
     
-    # 计算平均文本长度（只计算成功提取的文本）
-    successful_results = [r for r in results if r.get('文本长度', 0) > 0]
-    avg_text_length = sum(r.get('文本长度', 0) for r in successful_results) / len(successful_results) if successful_results else 0
+    def add(self, record: Dict) -> None:
+        with self._lock:
+            self.total_count += 1
+            # 成功处理的定义：提取文本不以 [ERROR] 开头
+            if not str(record.get('提取文本', '')).startswith('[ERROR]'):
+                self.success_count += 1
+            self.pdf_count += record.get('PDF文档数', 0) or 0
+            if '相关' in str(record.get('AI治理相关性', '')):
+                self.ai_relevant_count += 1
+            # 平均文本长度只计算成功提取的文本
+            if (record.get('文本长度', 0) or 0) > 0:
+                self.text_count += 1
+                self.text_length += record['文本长度']
+
+def print_summary_statistics(results: Any, total_time: float) -> None:
+    """打印处理统计信息（results 为结果记录列表或 ResultStats）"""
+    stats = results
+    if not isinstance(results, ResultStats):
+        stats = ResultStats()
+        for record in results:
+            stats.add(record)
+    if not stats.total_count:
+        return
+    total_count, success_count = stats.total_count, stats.success_count
+    pdf_count, ai_relevant_count = stats.pdf_count, stats.ai_relevant_count
+    avg_text_length = stats.text_length / stats.text_count if stats.text_count else 0
     
     print("\n" + "=" * 80)
     print("📊 处理统计报告")
@@ -1176,181 +3991,1151 @@ def print_summary_statistics(results: List[Dict], total_time: float) -> None:
     print("=" * 80)
 
 # --- 主执行函数 (Main Execution) ---
-def main_worker(df: pd.DataFrame, url_column: str, total_urls: int, start_time: float) -> List[Dict]:
-    """主逻辑的工作函数，用于线程池"""
+def process_single_url(idx_original: int, row_dict: Dict, url_column: str, total_urls: int,
+                       traceparent: Optional[str] = None) -> Optional[Dict]:
+    """
+    处理单个输入行的封装函数，返回结果记录。
+    独立于线程池，可在单线程（调试）、多线程（生产）或队列工作进程中使用。
+    每个输入行是一个trace的根span（traceparent 指定时作为其子span，用于跨进程/队列传递）。
+    """
+    url = row_dict[url_column]
+    with tracer.span(Tracer.ROOT_SPAN_NAME, parent=traceparent, url=url,
+                     row=str(row_task_id(row_dict, idx_original))) as span, task_profiler.profile_task(url):
+        result = _process_single_url(idx_original, row_dict, url_column, total_urls)
+        if span is not None and result:
+            span.set_attribute('status', result['处理状态'])
+            span.set_attribute('method', result['处理方法'])
+            span.set_attribute('documents', int(result['PDF文档数']))
+        return result
+
+def _process_single_url(idx_original: int, row_dict: Dict, url_column: str, total_urls: int) -> Optional[Dict]:
+    url = row_dict[url_column]
     
-    # 将处理逻辑封装到一个函数，以便于在单线程（调试）或多线程（生产）中使用
-    def process_single_url(idx_original: int, row: pd.Series) -> Optional[Dict]:
-        """处理单个URL的封装函数"""
-        url = row[url_column]
-        row_dict = row.to_dict()
-        
-        # 使用'编号'作为主要索引，或使用DataFrame的index
-        idx = row_dict.get('编号', idx_original)
-        
-        # 生成文件名基础
-        if 'Country' in row_dict and 'Policy initiative ID' in row_dict:
-            country = generate_safe_filename(str(row_dict.get('Country', 'unknown')))
-            policy_id = generate_safe_filename(str(row_dict.get('Policy initiative ID', 'unknown')))
-            filename_base = f"{country}-{policy_id}"
-        else:
-            filename_base = f"{idx:04d}"
-        
-        filename_txt = f"{filename_base}.txt"
-        
-        logger.info(f"\n--- [{idx_original + 1}/{total_urls}] 处理: {filename_base} ---")
-        logger.info(f"🔗 URL: {url}")
-        
-        processing_start = time.time()
-        
-        # 核心处理
-        extracted_text, pdf_docs_count, processing_info = process_url_comprehensive(
-            url, idx, row_dict
-        )
-        
-        processing_time = time.time() - processing_start
+    # 使用任务编号（'编号'，多URL单元格加URL序号）作为主要索引，或使用DataFrame的index
+    idx = row_task_id(row_dict, idx_original)
+    
+    # 生成文件名基础
+    filename_base = row_filename_base(row_dict, idx)
+    filename_txt = f"{filename_base}.txt"
+    
+    logger.info(f"\n--- [{idx_original + 1}/{total_urls or '?'}] 处理: {filename_base} ---")
+    logger.info(f"🔗 URL: {url}")
+    
+    processing_start = time.time()
+    
+    # 核心处理
+    extracted_text, pdf_docs_count, processing_info = process_url_comprehensive(
+        url, idx, row_dict
+    )
+    
+    processing_time = time.time() - processing_start
+    stage_metrics.observe('url_total', processing_time, _host_label(url), processing_info.get('method', 'unknown'))
+    
+    # 分析结果并收集
+    result_record = build_result_record(row_dict, url, filename_txt, extracted_text, pdf_docs_count,
+                                        processing_info, processing_time)
+    
+    # 随机延迟，避免被反爬
+    delay = random.uniform(Config.RANDOM_DELAY_MIN, Config.RANDOM_DELAY_MAX)
+    logger.info(f"😴 休息 {delay:.1f} 秒...")
+    time.sleep(delay)
+    
+    return result_record
+
+def row_url_number(row_dict: Dict) -> int:
+    """任务在多URL单元格中的序号（没有展开的行为1）"""
+    url_number = row_dict.get('URL序号', 1)
+    return int(url_number) if pd.notna(url_number) else 1
+
+def row_task_id(row_dict: Dict, idx: Any) -> Any:
+    """
+    任务编号：输入行的编号；多URL单元格展开出的第2个及以后的URL为 "<编号>-<URL序号>"。
+    同一单元格展开的任务共享输入行的编号，任务编号用于文本文件名和文档下载文件名，保证它们互不覆盖。
+    """
+    number = row_dict.get('编号', idx)
+    if isinstance(number, float) and number.is_integer():
+        number = int(number)
+    elif isinstance(number, str):
+        number = generate_safe_filename(number)  # 编号可能含有路径分隔符等字符
+    url_number = row_url_number(row_dict)
+    return f"{number}-{url_number}" if url_number > 1 else number
+
+def row_filename_base(row_dict: Dict, idx: Any) -> str:
+    """
+    输入行对应的文本文件名（不含扩展名）：国家-政策ID，缺少这两列时使用任务编号。
+    多URL单元格展开出的第2个及以后的URL加上 -url<序号> 后缀，避免与同一行的第一个URL重名。
+    """
+    if 'Country' in row_dict and 'Policy initiative ID' in row_dict:
+        country = generate_safe_filename(str(row_dict.get('Country', 'unknown')))
+        policy_id = generate_safe_filename(str(row_dict.get('Policy initiative ID', 'unknown')))
+        base = f"{country}-{policy_id}"
+        if row_url_number(row_dict) > 1:
+            base += f"-url{row_url_number(row_dict)}"
+        return base
+    task_id = row_task_id(row_dict, idx)
+    return task_id if isinstance(task_id, str) else f"{task_id:04d}"
+
+def save_row_text(filename_txt: str, text: str, url: str = '', row_dict: Optional[Dict] = None) -> None:
+    """
+    保存一行的提取文本：写入分片文本存储（键为文件名），或 Config.TEXT_STORAGE='files' 时写入 SAVE_DIR。
+    同时更新全文检索索引（row_dict 提供国家、政策ID等元数据）。
+    """
+    store = get_text_store()
+    if store is not None:
+        with stage_timer('persistence', url, method='text_store'):
+            store.put(filename_txt, text, url)
+    else:
+        text_file_path = Config.SAVE_DIR / filename_txt
+        with stage_timer('persistence', url, method='text_file'), open(text_file_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    logger.info(f"💾 文本已保存: {filename_txt}")
+    
+    index = get_search_index()
+    if index is not None:
+        try:
+            with stage_timer('persistence', url, method='search_index'):
+                index.add(filename_txt, text, url, row_dict)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 全文检索索引更新失败 {filename_txt}: {e}")
+
+def load_row_text(filename_txt: str) -> Optional[str]:
+    """读取一行的提取文本：先查分片文本存储，再查 SAVE_DIR 中的文本文件（兼容迁移前写出的文件）；都没有时返回None"""
+    store = get_text_store()
+    if store is not None:
+        text = store.get(filename_txt)
+        if text is not None:
+            return text
+    text_file_path = Config.SAVE_DIR / filename_txt
+    return text_file_path.read_text(encoding="utf-8") if text_file_path.exists() else None
+
+def build_result_record(row_dict: Dict, url: str, filename_txt: str, extracted_text: str, pdf_docs_count: int,
+                        processing_info: Dict, processing_time: float, save_text: bool = True) -> Dict:
+    """
+    根据提取结果生成结果记录：判断处理状态、分析AI相关性。
+    save_text=True 时用 save_row_text 保存成功提取的文本（分阶段流水线中文本已由 extract 阶段保存）。
+    """
+    if extracted_text.startswith("[ERROR]"):
+        status = "失败"
+        ai_relevance = "处理失败"
+        display_text = extracted_text
+        text_length = 0
+        logger.error(f"❌ 处理失败: {extracted_text}")
         
-        # 分析结果
-        if extracted_text.startswith("[ERROR]"):
-            status = "失败"
-            ai_relevance = "处理失败"
-            display_text = extracted_text
-            text_length = 0
-            logger.error(f"❌ 处理失败: {extracted_text}")
-            
-        elif extracted_text.startswith("[WARNING]"):
-            status = "警告"
-            ai_relevance = "内容过少"
-            display_text = extracted_text
-            text_length = len(extracted_text)
-            logger.warning(f"⚠️ 处理警告: {extracted_text}")
+    elif extracted_text.startswith("[WARNING]"):
+        status = "警告"
+        ai_relevance = "内容过少"
+        display_text = extracted_text
+        text_length = len(extracted_text)
+        logger.warning(f"⚠️ 处理警告: {extracted_text}")
 
-        else:
-            status = f"成功-{processing_info.get('method', 'unknown')}"
-            if pdf_docs_count > 0:
-                status += f"-{pdf_docs_count}文档"
-            
-            # 保存文本文件
+    else:
+        status = f"成功-{processing_info.get('method', 'unknown')}"
+        if pdf_docs_count > 0:
+            status += f"-{pdf_docs_count}文档"
+        if processing_info.get('budget_exhausted'):
+            status += "-部分结果"
+        
+        # 保存文本
+        if save_text:
             try:
-                text_file_path = Config.SAVE_DIR / filename_txt
-                with open(text_file_path, "w", encoding="utf-8") as f:
-                    f.write(extracted_text)
-                logger.info(f"💾 文本已保存: {filename_txt}")
-                
+                save_row_text(filename_txt, extracted_text, url, row_dict)
             except Exception as e:
                 logger.error(f"❌ 文本保存失败: {e}")
                 extracted_text = f"[ERROR] 文本保存失败: {e}"
                 status = "失败-保存异常"
-            
-            # 分析AI相关性
-            ai_relevance = contains_ai_governance_keywords(extracted_text)
-            text_length = len(extracted_text)
-            
-            # 决定显示内容
-            if text_length < 1000:  # 短文本直接显示
-                display_text = extracted_text
-            else:  # 长文本只显示文件引用
-                display_text = f"文本内容已保存到文件: {filename_txt} (长度: {text_length} 字符)"
-            
-            logger.info(f"✅ 处理成功 (方法: {processing_info.get('method', 'unknown')})")
-            logger.info(f"📄 文档数: {pdf_docs_count}, 📏 长度: {text_length}, 🤖 相关性: {ai_relevance}")
-
-        # 收集结果
-        result_record = {
-            **row_dict,
-            "提取文本": display_text,
-            "AI治理相关性": ai_relevance,
-            "文件名": filename_txt,
-            "处理状态": status,
-            "PDF文档数": pdf_docs_count,
-            "处理时间(秒)": round(processing_time, 1),
-            "文本长度": text_length,
-            "处理方法": processing_info.get('method', 'unknown'),
-            "访问页面数": processing_info.get('pages_visited', 0),
-            "发现文档数": processing_info.get('documents_found', 0),
-            "AI链接数": processing_info.get('ai_links_found', 0)
-        }
         
-        # 随机延迟，避免被反爬
-        delay = random.uniform(Config.RANDOM_DELAY_MIN, Config.RANDOM_DELAY_MAX)
-        logger.info(f"😴 休息 {delay:.1f} 秒...")
-        time.sleep(delay)
+        # 分析AI相关性
+        ai_relevance = contains_ai_governance_keywords(extracted_text)
+        text_length = len(extracted_text)
         
-        return result_record
-
+        # 决定显示内容
+        if text_length < 1000:  # 短文本直接显示
+            display_text = extracted_text
+        else:  # 长文本只显示文件引用
+            display_text = f"文本内容已保存到文件: {filename_txt} (长度: {text_length} 字符)"
+        
+        logger.info(f"✅ 处理成功 (方法: {processing_info.get('method', 'unknown')})")
+        logger.info(f"📄 文档数: {pdf_docs_count}, 📏 长度: {text_length}, 🤖 相关性: {ai_relevance}")
+
+    return {
+        **row_dict,
+        "提取文本": display_text,
+        "AI治理相关性": ai_relevance,
+        "文件名": filename_txt,
+        "处理状态": status,
+        "PDF文档数": pdf_docs_count,
+        "处理时间(秒)": round(processing_time, 1),
+        "文本长度": text_length,
+        "处理方法": processing_info.get('method', 'unknown'),
+        "访问页面数": processing_info.get('pages_visited', 0),
+        "发现文档数": processing_info.get('documents_found', 0),
+        "AI链接数": processing_info.get('ai_links_found', 0),
+        "规范URL": row_dict.get('规范URL', canonicalize_url(url)),
+        "结果复用自": "",
+        "预算耗尽": processing_info.get('budget_exhausted', ''),
+        "追踪ID": current_trace_id(),
+        "近似重复文档数": processing_info.get('near_duplicate_documents', 0),
+        "文档聚类": ",".join(processing_info.get('document_clusters', []))
+    }
+
+def split_duplicate_rows(df: pd.DataFrame, url_column: str) -> Tuple[pd.DataFrame, Dict[str, List[Dict]]]:
+    """
+    按规范URL去重：返回 (每个唯一URL的第一行, 规范URL -> 其余重复行列表)。
+    每个唯一URL只抓取一次，结果再用 fan_out_result 分发给重复行。
+    """
+    if '规范URL' not in df.columns:
+        df = df.assign(**{'规范URL': df[url_column].map(canonicalize_url)})
+    duplicate_mask = df['规范URL'].duplicated(keep='first')
+    duplicate_rows: Dict[str, List[Dict]] = {}
+    for _, row in df[duplicate_mask].iterrows():
+        duplicate_rows.setdefault(row['规范URL'], []).append(row.to_dict())
+    
+    df_unique = df[~duplicate_mask]
+    if duplicate_mask.any():
+        logger.info(f"🔁 {int(duplicate_mask.sum())} 行与其他行指向同一URL，只抓取 {len(df_unique)} 个唯一URL")
+        print(f"🔁 {int(duplicate_mask.sum())} 行与其他行指向同一URL，只抓取 {len(df_unique)} 个唯一URL")
+    return df_unique, duplicate_rows
+
+def build_failure_record(row_dict: Dict, idx: Any, error: Any, elapsed: float) -> Dict:
+    """任务异常时的失败记录"""
+    return {
+        **row_dict, 
+        "提取文本": f"[ERROR] 并发任务异常: {error}",
+        "AI治理相关性": "处理失败",
+        "文件名": f"{row_filename_base(row_dict, idx)}.txt",
+        "处理状态": "失败-任务异常",
+        "PDF文档数": 0,
+        "处理时间(秒)": round(elapsed, 1),
+        "文本长度": 0
+    }
+
+class CompletedResults:
+    """
+    已完成的唯一URL -> 精简结果记录（编号 + RESULT_COLUMNS），供流式输入中之后才读到的重复行复用。
+    保存在临时SQLite数据库中（连接关闭后自动删除），内存占用不随输入行数增长。
+    """
+    def __init__(self):
+        self._conn = sqlite3.connect('', check_same_thread=False)
+        self._conn.execute("CREATE TABLE results (canonical TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        self._lock = threading.Lock()
+    
+    def get(self, canonical: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM results WHERE canonical = ?", (canonical,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, canonical: str, record: Dict) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?)",
+                               (canonical, json.dumps(record, ensure_ascii=False, default=_json_default)))
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def main_worker(df, url_column: str, total_urls: Optional[int], start_time: float,
+                on_record: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    主逻辑的工作函数：Config.WORKER_PROCESSES > 0 时使用多进程模式，否则使用线程池。
+    df 可以是一个DataFrame，也可以是DataFrame批次的迭代器（iter_input_rows）：任务随读随派发，
+    同时在途的任务数有上限，百万行输入也能立即开始抓取（此时 total_urls 可以为None）。
+    on_record 为None时返回全部结果记录；指定时每条结果记录（包括重复行的记录）产生后只交给 on_record
+    （用于边处理边写出结果），不在内存中保留，返回空列表。
+    已完成URL的精简记录保存在临时SQLite中（CompletedResults），内存中只有在途任务及其重复行，
+    因此配合 on_record 时内存有界（.xls 输入除外：iter_file_batches 只能整表读入）。
+    """
+    
     all_results: List[Dict] = []
     
-    # 使用线程池并发处理URL
-    with ThreadPoolExecutor(max_workers=Config.MAX_THREADS) as executor:
-        # 提交所有任务
-        future_to_url = {
-            executor.submit(process_single_url, idx, row): (idx, row[url_column]) 
-            for idx, row in df.iterrows()
-        }
+    def add_records(records: List[Dict]) -> None:
+        if on_record is None:
+            all_results.extend(records)
+            return
+        for record in records:
+            try:
+                on_record(record)
+            except Exception as e:  # 流式写出失败不影响抓取
+                logger.error(f"❌ 结果记录回调失败: {e}", exc_info=True)
+    
+    batches = [df] if isinstance(df, pd.DataFrame) else df
+    if isinstance(df, pd.DataFrame):
+        total_urls = int(df[url_column].map(canonicalize_url).nunique()) if '规范URL' not in df.columns else int(df['规范URL'].nunique())
+    
+    # 按规范URL去重：每个唯一URL只抓取一次，结果再分发给所有指向它的行。
+    # 流式输入时重复行可能在结果产生之后才读到，这时直接复用已完成的结果。
+    canonical_of: Dict[Any, str] = {}  # 在途任务 idx -> 规范URL
+    in_flight_rows: Dict[Any, Dict] = {}
+    duplicate_rows: Dict[str, List[Dict]] = {}
+    finished = CompletedResults()  # 规范URL -> 已完成的结果记录
+    reused_count = 0
+    
+    def iter_tasks():
+        nonlocal reused_count
+        for batch in batches:
+            if '规范URL' not in batch.columns:
+                batch = batch.assign(**{'规范URL': batch[url_column].map(canonicalize_url)})
+            for idx, row in batch.iterrows():
+                row_dict = row.to_dict()
+                canonical = row_dict['规范URL']
+                reused = None if canonical in duplicate_rows else finished.get(canonical)
+                if canonical in duplicate_rows or reused is not None:
+                    reused_count += 1
+                if reused is not None:
+                    add_records(fan_out_result(reused, [row_dict]))
+                elif canonical in duplicate_rows:
+                    duplicate_rows[canonical].append(row_dict)
+                else:
+                    duplicate_rows[canonical] = []
+                    canonical_of[idx] = canonical
+                    in_flight_rows[idx] = row_dict
+                    yield idx, row_dict
+    
+    success_count = 0
+    total_pdf_count = 0
+    completed = 0
+    
+    def finish_task(idx, record: Dict) -> None:
+        canonical = canonical_of.pop(idx)
+        in_flight_rows.pop(idx, None)
+        add_records([record] + fan_out_result(record, duplicate_rows.pop(canonical, [])))
+        finished.put(canonical, {col: record[col] for col in ['编号'] + RESULT_COLUMNS if col in record})
+    
+    def record_result(idx, result: Optional[Dict]) -> None:
+        """收集结果并报告进度"""
+        nonlocal success_count, total_pdf_count, completed
+        completed += 1
+        if not result:
+            canonical_of.pop(idx, None)
+            in_flight_rows.pop(idx, None)
+            return
+        finish_task(idx, result)
         
-        success_count = 0
-        total_pdf_count = 0
+        # 更新进度信息
+        if not result.get('提取文本', '').startswith('[ERROR]'):
+            success_count += 1
+        total_pdf_count += result.get('PDF文档数', 0)
         
-        # 收集结果并报告进度
-        for i, future in enumerate(as_completed(future_to_url)):
-            idx, url = future_to_url[future]
-            
+        # 打印进度报告
+        print(f"\n--- 📊 进度报告 ---")
+        if total_urls:
+            progress = completed / total_urls * 100
+            elapsed_time = time.time() - start_time
+            remaining_time = (elapsed_time / completed) * (total_urls - completed) / 60
+            print(f"📊 总体进度: {progress:.1f}% ({completed}/{total_urls}) | 成功: {success_count} | PDF总数: {total_pdf_count}")
+            if remaining_time > 0:
+                print(f"⏱️  预计剩余时间: {remaining_time:.1f} 分钟")
+            logger.info(f"📊 总体进度: {progress:.1f}% | 成功: {success_count} | PDF总数: {total_pdf_count}")
+        else:
+            rate = completed / max(time.time() - start_time, 1e-6) * 60
+            print(f"📊 已完成: {completed} | 成功: {success_count} | PDF总数: {total_pdf_count} | {rate:.1f} 个/分钟")
+            logger.info(f"📊 已完成: {completed} | 成功: {success_count} | PDF总数: {total_pdf_count}")
+    
+    def record_failure(idx, error) -> None:
+        """添加一个失败记录到结果列表（同一URL的重复行也记为失败）"""
+        nonlocal completed
+        completed += 1
+        finish_task(idx, build_failure_record(in_flight_rows[idx], idx, error, time.time() - start_time))
+    
+    if Config.WORKER_PROCESSES > 0:
+        # 多进程模式：每个进程独占一个浏览器，崩溃或内存超限的进程自动重启
+        supervisor = ProcessSupervisor(Config.WORKER_PROCESSES)
+        try:
+            supervisor.run(iter_tasks(), url_column, total_urls,
+                           on_result=record_result, on_failure=record_failure)
+        finally:
+            finished.close()
+        report_reused_rows(reused_count)
+        return all_results
+    
+    # 使用线程池并发处理URL：只保持有限数量的任务在途，完成一个再从输入中取一个
+    with ThreadPoolExecutor(max_workers=Config.MAX_THREADS) as executor, closing(finished):
+        tasks = iter_tasks()
+        future_to_url = {}
+        
+        def submit_next() -> bool:
+            task = next(tasks, None)
+            if task is None:
+                return False
+            idx, row_dict = task
+            future = executor.submit(process_single_url, idx, row_dict, url_column, total_urls)
+            future_to_url[future] = (idx, row_dict[url_column])
+            return True
+        
+        for _ in range(Config.MAX_THREADS * Config.SCHEDULER_QUEUE_FACTOR):
+            if not submit_next():
+                break
+        while future_to_url:
+            done, _ = wait(future_to_url, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx, url = future_to_url.pop(future)
+                try:
+                    record_result(idx, future.result())
+                except Exception as e:
+                    logger.error(f"❌ URL {url} 的并发任务失败: {e}", exc_info=True)
+                    record_failure(idx, e)
+                submit_next()
+    
+    report_reused_rows(reused_count)
+    return all_results
+
+def report_reused_rows(reused_count: int) -> None:
+    if reused_count:
+        logger.info(f"🔁 {reused_count} 行与其他行指向同一URL，复用了已抓取的结果")
+        print(f"🔁 {reused_count} 行与其他行指向同一URL，复用了已抓取的结果")
+
+# --- 多进程工作模式 (Supervised Worker Processes) ---
+def process_tree_rss_mb(pid: int) -> float:
+    """进程及其所有子进程（chromedriver、Chrome渲染进程）的常驻内存（MB），无法获取时返回0"""
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc] + proc.children(recursive=True)
+        except psutil.Error:
+            return 0.0
+        total = 0
+        for p in procs:
             try:
-                result = future.result()
-                if result:
-                    all_results.append(result)
-                    
-                    # 更新进度信息
-                    if not result.get('提取文本', '').startswith('[ERROR]'):
-                        success_count += 1
-                    total_pdf_count += result.get('PDF文档数', 0)
-                    
-                    # 打印进度报告
-                    progress = (i + 1) / total_urls * 100
-                    elapsed_time = time.time() - start_time
-                    remaining_time = (elapsed_time / (i + 1)) * (total_urls - i - 1) / 60
-                    
-                    print(f"\n--- 📊 进度报告 ---")
-                    print(f"📊 总体进度: {progress:.1f}% ({i+1}/{total_urls}) | 成功: {success_count} | PDF总数: {total_pdf_count}")
-                    if remaining_time > 0:
-                        print(f"⏱️  预计剩余时间: {remaining_time:.1f} 分钟")
-                    logger.info(f"📊 总体进度: {progress:.1f}% | 成功: {success_count} | PDF总数: {total_pdf_count}")
-                    
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+    
+    # 回退：Linux /proc
+    total_kb, stack, seen = 0, [pid], set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for children_file in Path(f"/proc/{current}/task").glob("*/children"):
+                stack.extend(int(child) for child in children_file.read_text().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+def config_snapshot() -> Dict[str, Any]:
+    """当前 Config 的所有设置，传给子进程（spawn 模式下子进程会重新导入模块，运行时的修改需要显式传递）"""
+    return {name: value for name, value in vars(Config).items() if name.isupper()}
+
+def apply_config_snapshot(snapshot: Dict[str, Any]) -> None:
+    for name, value in snapshot.items():
+        setattr(Config, name, value)
+
+def process_rss_mb(pid: int) -> float:
+    """单个进程（不含子进程）的常驻内存（MB），无法获取时返回0"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / 1024 / 1024
+        except psutil.Error:
+            return 0.0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+# --- 内存看门狗 (Memory Watchdog) ---
+class MemoryWatchdog:
+    """
+    后台线程定期采样内存：本Python进程、每个 chromedriver+Chrome 进程树、HTML解析进程池和
+    已登记的文档提取进程池的每个进程，多进程模式下由主管报告各工作进程（含其Chrome）的内存。
+    结果以 Prometheus gauge 形式出现在 /metrics。
+    超过上限时：浏览器在当前URL结束后回收（DriverPool 不再复用），解析进程池整体重建，
+    提取进程池在当前批次结束后由调用方重建（见 refresh_extraction_pool），
+    Python进程超过告警阈值时记录警告，启用 TRACEMALLOC_TOP_N 时同时写出分配最多的代码位置。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._drivers: Dict[int, Tuple[int, str]] = {}  # id(driver) -> (chromedriver PID, 标签)
+        self._pools: Dict[int, Tuple[ProcessPoolExecutor, str]] = {}  # id(进程池) -> (进程池, 类型)
+        self._recycle: set = set()  # 超过上限、应在归还时回收的浏览器 id(driver) 或提取进程池 id(executor)
+        self._gauges: Dict[Tuple[str, str], float] = {}
+        self._recycles: Dict[str, int] = {}
+        self._driver_count = 0
+        self._last_tracemalloc_dump = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # --- 登记被监控的对象 ---
+    def track_driver(self, driver) -> None:
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            return  # 无法取得 chromedriver 进程（远程或已退出的浏览器）
+        with self._lock:
+            self._driver_count += 1
+            self._drivers[id(driver)] = (pid, f"driver-{os.getpid()}-{self._driver_count}")
+
+    def untrack_driver(self, driver) -> None:
+        with self._lock:
+            entry = self._drivers.pop(id(driver), None)
+            self._recycle.discard(id(driver))
+            if entry:
+                self._gauges.pop(('chrome', entry[1]), None)
+
+    def track_pool(self, executor: ProcessPoolExecutor, kind: str) -> None:
+        with self._lock:
+            self._pools[id(executor)] = (executor, kind)
+
+    def untrack_pool(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            entry = self._pools.pop(id(executor), None)
+            self._recycle.discard(id(executor))
+            if entry and not any(kind == entry[1] for _, kind in self._pools.values()):
+                for key in [k for k in self._gauges if k[0] == entry[1]]:
+                    del self._gauges[key]
+
+    def should_recycle(self, obj) -> bool:
+        """浏览器或已登记的进程池是否因内存超限需要回收"""
+        with self._lock:
+            return id(obj) in self._recycle
+
+    def set_gauge(self, kind: str, name: str, rss_mb: float) -> None:
+        with self._lock:
+            self._gauges[(kind, name)] = rss_mb
+
+    def remove_gauge(self, kind: str, name: str) -> None:
+        with self._lock:
+            self._gauges.pop((kind, name), None)
+
+    def count_recycle(self, kind: str) -> None:
+        with self._lock:
+            self._recycles[kind] = self._recycles.get(kind, 0) + 1
+
+    # --- 采样 ---
+    def sample(self) -> None:
+        """采样一次并执行回收动作"""
+        python_mb = process_rss_mb(os.getpid())
+        self.set_gauge('python', str(os.getpid()), python_mb)
+        if Config.PYTHON_MAX_RSS_MB and python_mb > Config.PYTHON_MAX_RSS_MB:
+            logger.warning(f"🧠 Python进程内存 {python_mb:.0f}MB 超过告警阈值 {Config.PYTHON_MAX_RSS_MB}MB")
+            self.dump_tracemalloc()
+        
+        with self._lock:
+            drivers = list(self._drivers.items())
+        for driver_id, (pid, label) in drivers:
+            rss = process_tree_rss_mb(pid)
+            with self._lock:
+                if driver_id not in self._drivers:
+                    continue  # 采样期间已关闭
+                self._gauges[('chrome', label)] = rss
+                over_limit = Config.DRIVER_MAX_RSS_MB and rss > Config.DRIVER_MAX_RSS_MB and driver_id not in self._recycle
+                if over_limit:
+                    self._recycle.add(driver_id)
+            if over_limit:
+                logger.warning(f"🧠 浏览器 {label} 内存 {rss:.0f}MB 超过上限，当前URL结束后回收")
+        
+        pool = _process_pool
+        processes = dict(getattr(pool, '_processes', None) or {}) if pool is not None else {}
+        with self._lock:
+            for key in [k for k in self._gauges if k[0] == 'parse_worker']:
+                del self._gauges[key]
+        for pid in processes:
+            rss = process_rss_mb(pid)
+            self.set_gauge('parse_worker', str(pid), rss)
+            if Config.PARSE_WORKER_MAX_RSS_MB and rss > Config.PARSE_WORKER_MAX_RSS_MB:
+                logger.warning(f"🧠 解析进程 {pid} 内存 {rss:.0f}MB 超过上限，重建解析进程池")
+                recycle_process_pool(pool)
+                self.count_recycle('parse_pool')
+                break
+        
+        with self._lock:
+            pools = list(self._pools.items())
+            for key in [k for k in self._gauges if k[0] in {kind for _, (_, kind) in pools}]:
+                del self._gauges[key]
+        for pool_id, (executor, kind) in pools:
+            for pid in list(getattr(executor, '_processes', None) or {}):
+                rss = process_rss_mb(pid)
+                self.set_gauge(kind, str(pid), rss)
+                with self._lock:
+                    over_limit = (Config.EXTRACT_WORKER_MAX_RSS_MB and rss > Config.EXTRACT_WORKER_MAX_RSS_MB
+                                  and pool_id in self._pools and pool_id not in self._recycle)
+                    if over_limit:
+                        self._recycle.add(pool_id)
+                if over_limit:
+                    logger.warning(f"🧠 提取进程 {pid} 内存 {rss:.0f}MB 超过上限，当前批次结束后重建提取进程池")
+
+    def dump_tracemalloc(self) -> None:
+        """把分配最多的代码位置写入日志（每10分钟最多一次）"""
+        if not Config.TRACEMALLOC_TOP_N or not tracemalloc.is_tracing():
+            return
+        if time.time() - self._last_tracemalloc_dump < 600:
+            return
+        self._last_tracemalloc_dump = time.time()
+        stats = tracemalloc.take_snapshot().statistics('lineno')[:Config.TRACEMALLOC_TOP_N]
+        lines = [f"   {stat.size / 1024 / 1024:8.1f}MB {stat.count:>9} 块  {stat.traceback}" for stat in stats]
+        logger.warning("🧠 tracemalloc 分配最多的位置:\n" + "\n".join(lines))
+
+    def _run(self) -> None:
+        while not self._stop.wait(Config.MEMORY_WATCHDOG_INTERVAL):
+            try:
+                self.sample()
             except Exception as e:
-                logger.error(f"❌ URL {url} 的并发任务失败: {e}", exc_info=True)
-                # 添加一个失败记录到结果列表
-                all_results.append({
-                    **df.iloc[idx].to_dict(), 
-                    "提取文本": f"[ERROR] 并发任务异常: {e}",
-                    "AI治理相关性": "处理失败",
-                    "文件名": f"{df.iloc[idx].get('编号', idx):04d}.txt",
-                    "处理状态": "失败-任务异常",
-                    "PDF文档数": 0,
-                    "处理时间(秒)": round(time.time() - start_time, 1),
-                    "文本长度": 0
-                })
+                logger.warning(f"⚠️ 内存采样失败: {e}")
+
+    def start(self) -> None:
+        if Config.MEMORY_WATCHDOG_INTERVAL <= 0 or self._thread is not None:
+            return
+        if Config.TRACEMALLOC_TOP_N and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='memory-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def to_prometheus(self) -> str:
+        with self._lock:
+            gauges = sorted(self._gauges.items())
+            recycles = sorted(self._recycles.items())
+        lines = ['# HELP crawler_memory_rss_mb Resident memory of crawler processes (MB)', '# TYPE crawler_memory_rss_mb gauge']
+        lines += [f'crawler_memory_rss_mb{{kind="{kind}",name="{name}"}} {value:.1f}' for (kind, name), value in gauges]
+        lines += ['# HELP crawler_memory_recycles_total Drivers, workers or pools recycled for memory', '# TYPE crawler_memory_recycles_total counter']
+        lines += [f'crawler_memory_recycles_total{{kind="{kind}"}} {count}' for kind, count in recycles]
+        return '\n'.join(lines) + '\n'
+
+memory_watchdog = MemoryWatchdog()
+
+def _supervised_worker_main(worker_name: str, conn, config: Dict[str, Any]) -> None:
+    """
+    工作进程入口：独占一个浏览器池，逐个接收任务并通过管道返回结果。
+    收到 None 时退出。
+    """
+    global active_driver_pool
+    apply_config_snapshot(config)
+    # 工作进程本身已经提供了并行度，不再为HTML解析额外创建进程池
+    Config.PARSE_PROCESS_WORKERS = 0
+    active_driver_pool = DriverPool(Config.DRIVER_MAX_USES)
+    task_profiler.start_sampler()
+    memory_watchdog.start()
+    logger.info(f"👷 工作进程 {worker_name} 启动 (PID {os.getpid()})")
+    try:
+        conn.send(('ready', os.getpid()))
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            idx, row_dict, url_column, total_urls, traceparent = task
+            try:
+                result = process_single_url(idx, row_dict, url_column, total_urls, traceparent)
+                conn.send(('result', idx, result, stage_metrics.drain(), tracer.drain()))
+            except Exception as e:
+                logger.error(f"❌ 工作进程 {worker_name} 任务失败: {e}", exc_info=True)
+                conn.send(('error', idx, str(e), stage_metrics.drain(), tracer.drain()))
+    except (EOFError, KeyboardInterrupt):
+        pass  # 主进程已退出或用户中断
+    finally:
+        active_driver_pool.close()
+        memory_watchdog.stop()
+        task_profiler.finish()
+        conn.close()
+
+class _WorkerHandle:
+    """主进程中对一个工作进程的记录"""
+    def __init__(self, name: str, process, conn):
+        self.name = name
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.task: Optional[Tuple] = None
+        self.task_span: Optional[Span] = None
+        self.task_started = 0.0
+        self.tasks_done = 0
+        self.retiring = False
+
+class ProcessSupervisor:
+    """
+    多进程工作模式的主管：启动N个工作进程（每个进程独占一个浏览器），
+    通过各自的管道分发任务、收集结果。崩溃、卡死或内存超限的进程被终止并重启，
+    其正在处理的任务重新分配（最多 QUEUE_MAX_ATTEMPTS 次），不影响其他进程。
+    注意：礼貌抓取限制（HostPoliteness）按进程生效，同一主机的总并发约为 进程数 × PER_HOST_MAX_CONCURRENCY。
+    """
+    def __init__(self, processes: int):
+        self.processes = max(1, processes)
+        self._ctx = multiprocessing.get_context('spawn')  # Chrome/线程与 fork 不兼容
+        self._config = config_snapshot()
+        self._workers: Dict[int, _WorkerHandle] = {}
+        self._generation = 0
+        self._startup_failures = 0
+        self._task_timeout = (Config.URL_TIME_BUDGET_SECONDS + Config.WORKER_TASK_GRACE_SECONDS
+                              if Config.URL_TIME_BUDGET_SECONDS else None)
+
+    def _start_worker(self, slot: int) -> None:
+        self._generation += 1
+        name = f"worker-{slot}.{self._generation}"
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_supervised_worker_main, args=(name, child_conn, self._config), name=name)
+        process.start()
+        child_conn.close()
+        self._workers[slot] = _WorkerHandle(name, process, parent_conn)
+
+    def _stop_worker(self, slot: int, graceful: bool) -> None:
+        worker = self._workers.pop(slot)
+        if graceful and worker.process.is_alive():
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.process.join(timeout=30)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        worker.conn.close()
+
+    def run(self, tasks, url_column: str, total_urls: Optional[int],
+            on_result: Callable[[Any, Dict], None], on_failure: Callable[[Any, Any], None]) -> None:
+        """
+        处理所有任务 (idx, row_dict)，tasks 可以是列表或迭代器（只在有空闲进程时才取下一个任务）。
+        每完成一个调用 on_result(idx, record)；任务最终失败（进程多次崩溃或抛出异常）时调用 on_failure(idx, error)。
+        """
+        task_iter = iter(tasks)
+        pending: List[Tuple] = []  # 待重新分配的任务
+        
+        def has_pending() -> bool:
+            if not pending:
+                task = next(task_iter, None)
+                if task is not None:
+                    pending.append(task)
+            return bool(pending)
+        attempts: Dict[Any, int] = {}
+        trace_parents: Dict[Any, str] = {}  # 同一任务的多次尝试挂在第一次尝试的span下
+        print(f"👷 启动 {self.processes} 个工作进程（每个进程一个浏览器）")
+        for slot in range(self.processes):
+            self._start_worker(slot)
+        
+        def requeue_or_fail(task: Tuple, reason: str) -> None:
+            idx = task[0]
+            if attempts.get(idx, 0) < Config.QUEUE_MAX_ATTEMPTS:
+                logger.warning(f"🔁 任务 {idx} 重新分配: {reason}")
+                pending.append(task)
+            else:
+                on_failure(idx, reason)
+        
+        try:
+            while has_pending() or any(w.task for w in self._workers.values()):
+                # 分配任务给空闲进程
+                for slot, worker in list(self._workers.items()):
+                    if worker.ready and worker.task is None and not worker.retiring and has_pending():
+                        task = pending.pop()
+                        attempts[task[0]] = attempts.get(task[0], 0) + 1
+                        span = tracer.start_span('supervised_task', parent=trace_parents.get(task[0], ''),
+                                                 worker=worker.name, attempt=attempts[task[0]])
+                        trace_parents.setdefault(task[0], span.traceparent)
+                        try:
+                            worker.conn.send((task[0], task[1], url_column, total_urls, span.traceparent))
+                        except (OSError, ValueError) as e:
+                            # 进程在发出 ready 之后退出（OOM、Chrome崩溃）：重新分配任务并重启该进程，不影响整个运行
+                            reason = f"任务发送失败 ({e!r})"
+                            logger.error(f"💥 {worker.name} {reason}，重启该进程")
+                            tracer.end_span(span, reason)
+                            self._stop_worker(slot, graceful=False)
+                            requeue_or_fail(task, reason)
+                            self._start_worker(slot)
+                            continue
+                        worker.task, worker.task_span, worker.task_started = task, span, time.time()
                 
-    return all_results
+                # 等待任意进程发来消息或退出
+                by_handle = {}
+                for slot, worker in self._workers.items():
+                    by_handle[worker.conn] = slot
+                    by_handle[worker.process.sentinel] = slot
+                for ready in mp_connection.wait(list(by_handle), timeout=5):
+                    slot = by_handle[ready]
+                    worker = self._workers.get(slot)
+                    if worker is None or ready is not worker.conn:
+                        continue  # 进程退出由下面的健康检查处理
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        continue
+                    if message[0] == 'ready':
+                        worker.ready = True
+                        self._startup_failures = 0
+                    elif worker.task is not None and message[1] == worker.task[0]:
+                        stage_metrics.merge(message[3])  # 工作进程的阶段耗时增量
+                        tracer.merge(message[4])
+                        tracer.end_span(worker.task_span, None if message[0] == 'result' else message[2])
+                        worker.task, worker.task_span, task_idx = None, None, message[1]
+                        worker.tasks_done += 1
+                        if message[0] == 'result':
+                            on_result(task_idx, message[2])
+                        else:
+                            on_failure(task_idx, message[2])
+                        if worker.tasks_done >= Config.WORKER_MAX_TASKS:
+                            worker.retiring = True
+                
+                # 健康检查：崩溃、卡死、内存超限、到达任务数上限
+                for slot in list(self._workers):
+                    worker = self._workers[slot]
+                    reason = None
+                    if not worker.process.is_alive():
+                        reason = f"进程崩溃 (退出码 {worker.process.exitcode})"
+                    elif worker.task and self._task_timeout and time.time() - worker.task_started > self._task_timeout:
+                        reason = f"任务超时 ({self._task_timeout:.0f}秒)"
+                    else:
+                        rss = process_tree_rss_mb(worker.process.pid)
+                        memory_watchdog.set_gauge('worker', f"worker-{slot}", rss)
+                        if Config.WORKER_MAX_RSS_MB and rss > Config.WORKER_MAX_RSS_MB and not worker.retiring:
+                            logger.warning(f"🧠 {worker.name} 内存 {rss:.0f}MB 超过上限，处理完当前任务后重启")
+                            memory_watchdog.count_recycle('worker')
+                            worker.retiring = True
+                    
+                    if reason and not worker.ready:
+                        self._startup_failures += 1
+                        if self._startup_failures >= 3:
+                            raise RuntimeError(f"工作进程连续 {self._startup_failures} 次启动失败: {reason}")
+                    if reason:
+                        logger.error(f"💥 {worker.name} {reason}，重启该进程")
+                        print(f"💥 {worker.name} {reason}，重启该进程")
+                        task = worker.task
+                        if worker.task_span is not None:
+                            tracer.end_span(worker.task_span, reason)
+                        self._stop_worker(slot, graceful=False)
+                        if task:
+                            requeue_or_fail(task, reason)
+                        self._start_worker(slot)
+                    elif worker.retiring and worker.task is None:
+                        logger.info(f"♻️ 回收工作进程 {worker.name} (已处理 {worker.tasks_done} 个任务)")
+                        self._stop_worker(slot, graceful=True)
+                        if has_pending():
+                            self._start_worker(slot)
+        finally:
+            for slot in list(self._workers):
+                self._stop_worker(slot, graceful=True)
 
-def main():
-    """主程序入口"""
-    start_time = time.time()
+# --- 分布式工作队列 (Lease-based Work Queue) ---
+class WorkQueue(ABC):
+    """
+    工作队列接口。多个进程/主机上的工作进程从同一个队列租用任务：
+    租约到期未续约（心跳）的任务会被重新放回队列，处理结果写入同一个结果日志。
+    complete/fail 只对仍由该工作进程持有租约的任务生效，租约被收回后迟到的结果被丢弃。
+    可以实现其他后端（如Redis、数据库服务）替换默认的 SQLiteWorkQueue。
+    """
+    @abstractmethod
+    def enqueue(self, tasks: List[Dict]) -> int:
+        """添加任务（task_id 重复的任务被忽略），返回新增数量"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Dict]:
+        """
+        租用一个待处理任务，返回 {'task_id', 'payload', 'attempts'}，没有可用任务时返回None。
+        租约过期的任务放回队列；已达到 max_attempts 次的（反复让工作进程崩溃或卡死的任务）标记为失败并写入失败记录。
+        """
+
+    @abstractmethod
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """续约；租约已被收回时返回False"""
+
+    @abstractmethod
+    def complete(self, task_id: str, worker_id: str, records: List[Dict]) -> bool:
+        """标记任务完成并写入结果记录；租约已不属于该工作进程时不做任何修改，返回False"""
+
+    @abstractmethod
+    def fail(self, task_id: str, worker_id: str, error: str, max_attempts: int,
+             records: Optional[List[Dict]] = None) -> bool:
+        """
+        任务失败：未达到最大尝试次数时放回队列并返回True；
+        否则标记为失败并写入 records（失败记录），返回False。租约已不属于该工作进程时不做任何修改，返回False。
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数量"""
+
+    @abstractmethod
+    def iter_results(self):
+        """遍历结果日志中的所有记录"""
+
+def _json_default(value: Any) -> Any:
+    """JSON序列化辅助：numpy/pandas 标量转换为Python原生类型，其余转为字符串"""
+    if hasattr(value, 'item'):
+        try:
+            return value.item()
+        except (TypeError, ValueError):
+            pass
+    return str(value)
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    基于SQLite的工作队列，数据库文件可放在共享磁盘上供多台机器使用。
+    租用通过 BEGIN IMMEDIATE 事务保证原子性；过期租约在每次租用时回收。
+    注意：网络文件系统上的SQLite锁依赖其锁实现，NFS需要启用文件锁。
+    """
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, timeout=60, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=60000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+            " worker_id TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+            " last_error TEXT, updated_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " task_id TEXT NOT NULL, seq INTEGER NOT NULL, worker_id TEXT, record TEXT NOT NULL, finished_at REAL,"
+            " PRIMARY KEY (task_id, seq))"
+        )
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """在 BEGIN IMMEDIATE 事务中执行（同一时刻只有一个写者）"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self._conn)
+                self._conn.execute("COMMIT")
+                return value
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, tasks: List[Dict]) -> int:
+        now = time.time()
+        rows = [(t['task_id'], json.dumps(t['payload'], ensure_ascii=False, default=_json_default), now) for t in tasks]
+        
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO tasks (task_id, payload, updated_at) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def lease(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Dict]:
+        def take(conn):
+            now = time.time()
+            # 回收过期租约（工作进程崩溃或失联）
+            expired = conn.execute(
+                "SELECT task_id, payload, attempts, worker_id FROM tasks WHERE status = 'leased' AND lease_expires < ?", (now,)
+            ).fetchall()
+            for task_id, payload, attempts, lost_worker in expired:
+                if attempts < max_attempts:
+                    conn.execute("UPDATE tasks SET status = 'pending', worker_id = NULL, updated_at = ? WHERE task_id = ?",
+                                 (now, task_id))
+                    continue
+                error = f"租约过期 {attempts} 次（工作进程 {lost_worker} 崩溃或卡死）"
+                logger.warning(f"⚠️ 任务 {task_id} {error}，不再重试")
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', lease_expires = NULL, last_error = ?, updated_at = ? WHERE task_id = ?",
+                    (error, now, task_id)
+                )
+                self._write_results(conn, task_id, lost_worker, build_queue_failure_records(json.loads(payload), error), now)
+            row = conn.execute(
+                "SELECT task_id, payload, attempts FROM tasks WHERE status = 'pending' ORDER BY rowid LIMIT 1"
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1,"
+                " updated_at = ? WHERE task_id = ?", (worker_id, now + lease_seconds, now, row[0])
+            )
+            return {'task_id': row[0], 'payload': json.loads(row[1]), 'attempts': row[2] + 1}
+        return self._transaction(take)
+
+    def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        def renew(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ?"
+                " WHERE task_id = ? AND worker_id = ? AND status = 'leased'",
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+            return cursor.rowcount > 0
+        return self._transaction(renew)
+
+    @staticmethod
+    def _write_results(conn: sqlite3.Connection, task_id: str, worker_id: str, records: List[Dict], now: float) -> None:
+        conn.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+        conn.executemany(
+            "INSERT INTO results (task_id, seq, worker_id, record, finished_at) VALUES (?, ?, ?, ?, ?)",
+            [(task_id, i, worker_id, json.dumps(r, ensure_ascii=False, default=_json_default), now) for i, r in enumerate(records)]
+        )
+
+    def complete(self, task_id: str, worker_id: str, records: List[Dict]) -> bool:
+        def finish(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL, updated_at = ?"
+                " WHERE task_id = ? AND worker_id = ? AND status = 'leased'", (now, task_id, worker_id)
+            )
+            if cursor.rowcount == 0:
+                return False  # 租约已被收回（可能已由其他工作进程完成），不覆盖它的结果
+            self._write_results(conn, task_id, worker_id, records, now)
+            return True
+        return self._transaction(finish)
+
+    def fail(self, task_id: str, worker_id: str, error: str, max_attempts: int,
+             records: Optional[List[Dict]] = None) -> bool:
+        def mark(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT attempts FROM tasks WHERE task_id = ? AND worker_id = ? AND status = 'leased'", (task_id, worker_id)
+            ).fetchone()
+            if not row:
+                return False  # 租约已被收回
+            requeue = row[0] < max_attempts
+            conn.execute(
+                "UPDATE tasks SET status = ?, worker_id = ?, lease_expires = NULL, last_error = ?, updated_at = ?"
+                " WHERE task_id = ? AND worker_id = ? AND status = 'leased'",
+                ('pending' if requeue else 'failed', None if requeue else worker_id, error[:2000], now, task_id, worker_id)
+            )
+            if not requeue and records:
+                self._write_results(conn, task_id, worker_id, records, now)
+            return requeue
+        return self._transaction(mark)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in ['pending', 'leased', 'done', 'failed']}
+
+    def iter_results(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM results ORDER BY task_id, seq").fetchall()
+        for (record,) in rows:
+            yield json.loads(record)
+
+def open_work_queue(path: Optional[Path] = None) -> WorkQueue:
+    """打开工作队列（目前为SQLite后端）"""
+    path = Path(path or Config.QUEUE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return SQLiteWorkQueue(path)
+
+def shard_of(url: str, shard_count: int) -> int:
+    """按规范URL的哈希确定分片号（与进程和机器无关，结果确定）"""
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) % shard_count
+
+def select_shard(df: pd.DataFrame, url_column: str, shard_index: int, shard_count: int) -> pd.DataFrame:
+    """只保留属于指定分片的行（同一规范URL的所有行总在同一分片）"""
+    mask = df[url_column].map(lambda u: shard_of(u, shard_count) == shard_index)
+    return df[mask]
+
+def build_queue_tasks(df: pd.DataFrame, url_column: str) -> List[Dict]:
+    """每个唯一URL一个任务，重复行随任务一起入队，便于工作进程直接分发结果"""
+    df_unique, duplicate_rows = split_duplicate_rows(df, url_column)
+    tasks = []
+    for idx, row in df_unique.iterrows():
+        row_dict = row.to_dict()
+        tasks.append({
+            'task_id': row_dict['规范URL'],
+            'payload': {
+                'idx': idx,
+                'url_column': url_column,
+                'row': row_dict,
+                'duplicates': duplicate_rows.get(row_dict['规范URL'], []),
+                'traceparent': f"00-{os.urandom(16).hex()}-{'0' * 16}-01"  # 所有尝试共享同一个trace
+            }
+        })
+    return tasks
+
+def build_queue_failure_records(payload: Dict, error: Any, elapsed: float = 0) -> List[Dict]:
+    """队列任务最终失败时的结果记录（包括重复行）"""
+    failed_record = build_failure_record(payload['row'], payload['idx'], error, elapsed)
+    return [failed_record] + fan_out_result(failed_record, payload['duplicates'])
+
+def process_queue_task(queue: WorkQueue, task: Dict, worker_id: str) -> None:
+    """处理一个租用的任务：后台线程定期续约，完成后写入结果（包括重复行的分发结果）"""
+    payload = task['payload']
+    stop_heartbeat = threading.Event()
+    lease_lost = threading.Event()
     
-    # 打印配置信息
-    print("🚀 增强版OECD.ai文档抓取工具")
-    print("=" * 80)
-    print("🔧 当前配置:")
-    print(f"   📁 输入文件: {Config.EXCEL_PATH}")
-    print(f"   🤖 智能导航: {'启用' if Config.ENABLE_SMART_NAVIGATION else '禁用'}")
-    print(f"   🔍 导航深度: {Config.MAX_NAVIGATION_DEPTH}")
-    print(f"   🔗 每页AI链接数: {Config.MAX_AI_LINKS_PER_PAGE}")
-    print(f"   📄 最大PDF下载: {Config.PDF_DOWNLOAD_LIMIT}")
-    print(f"   ⚡ 最大线程数: {Config.MAX_THREADS}")
-    print("=" * 80)
+    def heartbeat_loop():
+        while not stop_heartbeat.wait(Config.QUEUE_HEARTBEAT_SECONDS):
+            try:
+                if not queue.heartbeat(task['task_id'], worker_id, Config.QUEUE_LEASE_SECONDS):
+                    logger.warning(f"⚠️ 任务租约已被收回: {task['task_id']}")
+                    lease_lost.set()
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ 续约失败 {task['task_id']}: {e}")
     
-    logger.info("🚀 启动增强版OECD.ai文档抓取工具")
+    heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
+    heartbeat_thread.start()
+    start = time.time()
+    try:
+        with tracer.span('queue_task', parent=payload.get('traceparent'), task_id=task['task_id'],
+                         worker=worker_id, attempt=task['attempts']):
+            result = process_single_url(payload['idx'], payload['row'], payload['url_column'], 1)
+        records = [result] + fan_out_result(result, payload['duplicates'])
+        stop_heartbeat.set()
+        if lease_lost.is_set() or not queue.complete(task['task_id'], worker_id, records):
+            logger.warning(f"⚠️ 租约已被收回，丢弃本次结果: {task['task_id']}")
+    except Exception as e:
+        stop_heartbeat.set()
+        logger.error(f"❌ 队列任务失败 {task['task_id']}: {e}", exc_info=True)
+        if not lease_lost.is_set():
+            # 达到最大尝试次数时同时写入失败结果
+            queue.fail(task['task_id'], worker_id, str(e), Config.QUEUE_MAX_ATTEMPTS,
+                       build_queue_failure_records(payload, e, time.time() - start))
+    finally:
+        stop_heartbeat.set()
+
+def run_queue_worker(queue_path: Optional[Path] = None, worker_id: Optional[str] = None, threads: Optional[int] = None) -> int:
+    """
+    队列工作模式：每个线程循环租用并处理任务，直到队列中没有待处理和租用中的任务。
+    可在多台机器上同时运行（共享同一个队列文件）。返回本进程处理的任务数。
+    """
+    queue = open_work_queue(queue_path)
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    threads = threads or Config.MAX_THREADS
+    # 每个工作进程写自己的追踪文件（共享磁盘上多机追加同一文件不安全）
+    trace_path = Config.TRACE_OUTPUT_PATH
+    tracer.output_path = trace_path.with_name(f"{generate_safe_filename(worker_id)}.{trace_path.name}")
+    processed = 0
+    processed_lock = threading.Lock()
+    task_profiler.start_sampler()
+    memory_watchdog.start()
     
-    # 创建必要的目录
+    def worker_loop():
+        nonlocal processed
+        while True:
+            task = queue.lease(worker_id, Config.QUEUE_LEASE_SECONDS, Config.QUEUE_MAX_ATTEMPTS)
+            if task is None:
+                stats = queue.stats()
+                if stats['leased'] == 0:
+                    return  # 没有待处理任务，也没有可能过期回收的任务
+                time.sleep(Config.QUEUE_POLL_SECONDS)  # 等待其他工作进程的租约完成或过期
+                continue
+            logger.info(f"📥 [{worker_id}] 租用任务 (第{task['attempts']}次): {task['task_id']}")
+            process_queue_task(queue, task, worker_id)
+            with processed_lock:
+                processed += 1
+    
+    print(f"👷 队列工作进程 {worker_id} 启动，线程数: {threads}，队列: {queue_path or Config.QUEUE_PATH}")
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(worker_loop) for _ in range(threads)]:
+            future.result()
+    
+    print(f"✅ 工作进程 {worker_id} 结束，共处理 {processed} 个任务。队列状态: {queue.stats()}")
+    metrics_path = Config.METRICS_JSON_PATH
+    save_stage_metrics(metrics_path.with_name(f"{metrics_path.stem}.{generate_safe_filename(worker_id)}{metrics_path.suffix}"))
+    save_traces()
+    memory_watchdog.stop()
+    task_profiler.finish()
+    if task_profiler.mode != 'off':
+        merge_profiles()  # 多台机器共享输出目录时，合并的是目前所有工作进程写出的结果
+    return processed
+
+def ensure_output_dirs() -> bool:
+    """创建必要的输出目录，失败时返回False"""
     for path in [Config.SAVE_DIR, Config.PDF_SAVE_DIR, Config.TEMP_DIR]:
         try:
             path.mkdir(parents=True, exist_ok=True)
@@ -1358,56 +5143,167 @@ def main():
         except Exception as e:
             logger.error(f"❌ 创建目录失败 {path}: {e}")
             print(f"❌ 错误: 创建目录失败 {path}: {e}")
-            return
-    
-    # 读取输入文件
+            return False
+    return True
+
+def normalize_row_number(value: Any, fallback: int) -> Any:
+    """输入中的编号：整数值（'12'、12.0）转为整数，其他值（如 'P-001'）原样保留，空值使用全局顺序号"""
+    if value is None or (isinstance(value, float) and pd.isna(value)) or not str(value).strip():
+        return fallback
+    text = str(value).strip()
     try:
-        df = detect_and_read_file(Config.EXCEL_PATH)
-        logger.info(f"📖 成功读取文件: {Config.EXCEL_PATH}")
-        print(f"📊 读取到 {df.shape[0]} 行数据，{df.shape[1]} 列")
-        
+        number = float(text)
+    except ValueError:
+        return text
+    return int(number) if number.is_integer() else text
+
+def prepare_input_batch(df: pd.DataFrame, url_column: str, next_number: int) -> Tuple[pd.DataFrame, int]:
+    """
+    过滤无效行（URL列中没有 http(s) URL），把含多个URL的单元格展开为多个任务，
+    并编号（输入没有编号列时按全局顺序给每个任务编号），返回 (DataFrame, 下一个编号)。
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    df = df.dropna(subset=[url_column])  # 移除空URL行
+    df = expand_url_cells(df, url_column)
+    sequence = range(next_number, next_number + len(df))
+    if '编号' in df.columns:
+        df = df.assign(编号=[normalize_row_number(value, fallback) for value, fallback in zip(df['编号'], sequence)])
+    else:
+        df = df.assign(编号=sequence)
+    df.index = range(next_number - 1, next_number - 1 + len(df))  # 展开后每个任务的索引唯一
+    return df, next_number + len(df)
+
+def iter_input_rows(batch_size: Optional[int] = None):
+    """
+    流式读取输入文件：用第一批数据查找URL列，之后逐批过滤、编号后产出，内存中只保留一批。
+    返回 (DataFrame 批次的迭代器, URL列名)；失败时返回None。
+    编号在分片之前按全文件顺序分配，各分片、各次运行的编号一致。
+    """
+    try:
+        columns = None
+        if Config.INPUT_COLUMNS:
+            header = read_file_header(Config.EXCEL_PATH)
+            columns = set(Config.INPUT_COLUMNS) | set(Config.URL_COLUMN_CANDIDATES) | {'编号'}
+            columns = [c for c in header if c in columns]
+        batches = iter_file_batches(Config.EXCEL_PATH, batch_size, columns)
+        first = next(batches, None)
+        logger.info(f"📖 成功打开文件: {Config.EXCEL_PATH}")
     except Exception as e:
         logger.error(f"❌ 读取输入文件失败: {e}", exc_info=True)
         print(f"❌ 错误: 读取输入文件失败: {e}")
-        return
+        return None
+    if first is None:
+        print("❌ 输入文件为空")
+        return None
     
     # 查找URL列
-    url_column = find_url_column(df)
+    url_column = find_url_column(first)
     if not url_column:
         logger.error("❌ 未找到URL列，请检查数据格式")
-        print(f"❌ 未找到URL列！可用列: {list(df.columns)}")
-        return
-    
+        print(f"❌ 未找到URL列！可用列: {list(first.columns)}")
+        return None
     print(f"🔗 使用URL列: {url_column}")
     
-    # 数据预处理
-    original_count = len(df)
-    df = df.dropna(subset=[url_column])  # 移除空URL行
-    df[url_column] = df[url_column].astype(str).str.strip()
-    df = df[df[url_column].str.startswith(('http://', 'https://'))]  # 只保留有效URL
+    def generate():
+        next_number = 1
+        read_count = kept_count = expanded_count = 0
+        for batch in itertools.chain([first], batches):
+            read_count += len(batch)
+            batch, next_number = prepare_input_batch(batch, url_column, next_number)
+            kept_count += batch['来源行'].nunique()
+            expanded_count += int((batch['URL序号'] > 1).sum())
+            yield batch
+        print(f"📊 读取到 {read_count} 行数据")
+        if read_count > kept_count:
+            print(f"⚠️  过滤掉 {read_count - kept_count} 行无效数据 (URL列中没有 http(s) 链接)")
+        if expanded_count:
+            print(f"🔗 多URL单元格展开出 {expanded_count} 个额外任务（来源行、URL序号列记录对应关系）")
     
-    # 添加编号列（如果不存在）
-    if '编号' not in df.columns:
-        df['编号'] = range(1, len(df) + 1)
+    return generate(), url_column
+
+def load_input_rows() -> Optional[Tuple[pd.DataFrame, str]]:
+    """读取整个输入文件、查找URL列并过滤无效行，返回 (DataFrame, URL列名)；失败时返回None"""
+    loaded = iter_input_rows()
+    if loaded is None:
+        return None
+    batches, url_column = loaded
+    return pd.concat(list(batches)), url_column
+
+def shard_output_path(path: Path, shard: Optional[Tuple[int, int]]) -> Path:
+    """分片运行时为输出文件加上分片后缀，避免多台机器互相覆盖"""
+    if not shard:
+        return path
+    return path.with_name(f"{path.stem}.shard-{shard[0]}-of-{shard[1]}{path.suffix}")
+
+def main(shard: Optional[Tuple[int, int]] = None):
+    """
+    主程序入口。shard=(i, N) 时只处理按规范URL哈希属于第i个分片的行。
+    输入分批流式读取，结果边处理边追加写出（Parquet按行组、CSV按批），内存中只保留统计计数；
+    .xls 输入是例外，没有流式读取方式，整表读入内存。
+    """
+    start_time = time.time()
+    csv_output = shard_output_path(Config.CSV_OUTPUT, shard)
     
-    total_urls = len(df)
-    filtered_count = original_count - total_urls
+    # 打印配置信息
+    print("🚀 增强版OECD.ai文档抓取工具")
+    print("=" * 80)
+    print("🔧 当前配置:")
+    print(f"   📁 输入文件: {Config.EXCEL_PATH}")
+    print(f"   🤖 智能导航: {'启用' if Config.ENABLE_SMART_NAVIGATION else '禁用'}")
+    print(f"   🔍 导航深度: {Config.MAX_NAVIGATION_DEPTH}")
+    print(f"   🔗 每页AI链接数: {Config.MAX_AI_LINKS_PER_PAGE}")
+    print(f"   📄 最大PDF下载: {Config.PDF_DOWNLOAD_LIMIT}")
+    print(f"   ⚡ 最大线程数: {Config.MAX_THREADS}")
+    if Config.WORKER_PROCESSES > 0:
+        print(f"   👷 工作进程数: {Config.WORKER_PROCESSES}")
+    if shard:
+        print(f"   🧩 分片: {shard[0]}/{shard[1]}")
+    print("=" * 80)
     
-    if filtered_count > 0:
-        print(f"⚠️  过滤掉 {filtered_count} 行无效数据 (空URL或非HTTP/S开头)")
-        
-    logger.info(f"📈 开始处理 {total_urls} 个有效URL...")
-    print(f"📈 开始处理 {total_urls} 个有效URL...")
+    logger.info("🚀 启动增强版OECD.ai文档抓取工具")
+    
+    # 创建必要的目录
+    if not ensure_output_dirs():
+        return
+    
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_PORT)
+    tracer.output_path = shard_output_path(Config.TRACE_OUTPUT_PATH, shard)
+    if task_profiler.mode != 'off':
+        clear_profiles()
+        task_profiler.start_sampler()
+    memory_watchdog.start()
     
-    if total_urls == 0:
-        logger.error("❌ 没有找到有效的URL进行处理")
-        print("❌ 没有找到有效的URL进行处理")
+    # 流式读取输入：边读边派发任务，不等整个文件读完
+    loaded = iter_input_rows()
+    if loaded is None:
         return
+    batches, url_column = loaded
+    
+    if shard:
+        batches = (select_shard(batch, url_column, shard[0], shard[1]) for batch in batches)
+        print(f"🧩 只处理分片 {shard[0]}/{shard[1]}")
+    
+    logger.info(f"📈 开始流式处理输入（每批 {Config.INPUT_BATCH_SIZE} 行）...")
+    print(f"📈 开始流式处理输入（每批 {Config.INPUT_BATCH_SIZE} 行）...")
+    
+    # 核心处理流程：结果记录产生后立即交给Parquet/CSV写出器，内存中只保留统计计数
+    stats = ResultStats()
+    parquet_writer = open_parquet_results_writer(csv_output)
+    # 只配置了Parquet时CSV仍同步写出临时文件，Parquet写出失败时用它代替（成功时丢弃）
+    csv_writer = ResultsCsvWriter(csv_output.with_suffix('.csv'))
+    
+    def on_record(record: Dict) -> None:
+        stats.add(record)
+        if parquet_writer is not None:
+            parquet_writer.write(record)
+        csv_writer.write(record)
     
-    # 核心处理流程
-    results = []
     try:
-        results = main_worker(df, url_column, total_urls, start_time)
+        main_worker(batches, url_column, None, start_time, on_record=on_record)
+        if not stats.total_count:
+            logger.error("❌ 没有找到有效的URL进行处理")
+            print("❌ 没有找到有效的URL进行处理")
         
     except KeyboardInterrupt:
         print("\n🛑 用户中断程序，正在保存已处理的结果...")
@@ -1415,37 +5311,708 @@ def main():
     except Exception as e:
         print(f"\n💥 程序异常: {e}")
         logger.error(f"💥 程序异常: {e}", exc_info=True)
-    
-    # 保存最终结果
-    if results:
-        try:
-            save_processing_results(results, Config.CSV_OUTPUT)
-            print(f"💾 结果已保存到: {Config.CSV_OUTPUT}")
-        except Exception as e:
-            logger.error(f"❌ 保存最终结果失败: {e}")
-            print(f"❌ 保存结果失败: {e}")
+    finally:
+        shutdown_process_pool()
+        if parquet_writer is not None:
+            parquet_writer.close()
+            if parquet_writer.failed:
+                print(f"❌ Parquet结果写出失败（{parquet_writer.failed}），改为保存CSV")
+            else:
+                print(f"💾 Parquet结果已保存到: {parquet_writer.path}")
+        # 结果已在处理过程中写出；Parquet不可用或写出失败时总是保留CSV
+        parquet_ok = parquet_writer is not None and not parquet_writer.failed
+        if 'csv' in Config.RESULTS_FORMATS or not parquet_ok:
+            csv_writer.close()
+            if csv_writer.failed:
+                print(f"❌ 保存结果失败: {csv_writer.failed}")
+            elif csv_writer.rows_written:
+                print(f"💾 结果已保存到: {csv_writer.path}")
+        else:
+            csv_writer.discard()
     
     # 打印统计报告
     total_time = time.time() - start_time
-    print_summary_statistics(results, total_time)
+    print_summary_statistics(stats, total_time)
     
     # 输出路径信息
     print(f"\n📁 输出目录信息:")
-    print(f"   📝 文本文件: {Config.SAVE_DIR}")
+    print(f"   📝 文本: {Config.TEXT_STORE_DIR if Config.TEXT_STORAGE == 'sharded' else Config.SAVE_DIR}")
     print(f"   📄 PDF文件: {Config.PDF_SAVE_DIR}")
-    print(f"   📊 结果CSV: {Config.CSV_OUTPUT}")
+    print(f"   📊 结果: {', '.join(str(csv_output.with_suffix('.' + fmt)) for fmt in Config.RESULTS_FORMATS)}")
     print(f"   📋 日志文件: scraper.log")
+    save_stage_metrics(shard_output_path(Config.METRICS_JSON_PATH, shard))
+    save_traces()
+    memory_watchdog.stop()
+    task_profiler.finish()
+    if task_profiler.mode != 'off':
+        merge_profiles()
     
     logger.info("🎉 处理完成！")
     print("\n🎉 处理完成！")
 
-if __name__ == "__main__":
+# --- 分阶段流水线 (Staged Pipeline) ---
+# discover -> download -> extract -> score -> export，每个阶段只读取上一阶段持久化的状态：
+#   discover  渲染页面、探测文档链接，为每个唯一URL写一份文档清单（manifest）
+#   download  按清单下载文档到 PDF_SAVE_DIR（已存在的文件不重复下载）
+#   extract   从本地文件提取文本（进程池 + 提取缓存），保存每行文本
+#   score     只根据提取的文本计算AI相关性，生成结果记录
+#   export    把结果记录导出为CSV
+# 修改关键词只需重新运行 score/export，更换提取策略只需从 extract 开始，都不需要重新抓取网站。
+# 每个阶段逐个清单保存进度，中断后重新运行会跳过已完成的清单；--force 重做本阶段（下游阶段随之重做）。
+
+class ManifestStore:
+    """每个唯一URL一个JSON清单（按规范URL哈希命名），原子写入"""
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or Config.STAGE_DIR / "manifests")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(canonical_url: str) -> str:
+        return hashlib.sha1(canonical_url.encode('utf-8')).hexdigest()[:20]
+
+    def path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        return self._load(path)
+
+    def put(self, manifest: Dict) -> None:
+        path = self.path(manifest['key'])
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def select(self, shard: Optional[Tuple[int, int]] = None):
+        """
+        按编号顺序逐个产出全部清单（或属于指定分片的清单）。
+        清单包含页面文本，不同时加载：先逐个读取一遍只记下排序键和路径，再按顺序重新读取。
+        """
+        order = []
+        for path in self.root.glob("*.json"):
+            manifest = self._load(path)
+            if shard is None or shard_of(manifest['url'], shard[1]) == shard[0]:
+                order.append((str(manifest['idx']).zfill(12), path.name))
+        for _, name in sorted(order):
+            yield self._load(self.root / name)
+
+    @staticmethod
+    def _load(path: Path) -> Dict:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def run_stage_tasks(name: str, items: List, fn: Callable, workers: int, describe: Callable[[Any], str]) -> Tuple[int, int]:
+    """在线程池中对每个条目运行 fn，单个条目失败只记录日志（下次运行重试），返回 (成功数, 失败数)"""
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                done += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"❌ [{name}] {describe(futures[future])} 失败: {e}", exc_info=True)
+            if (done + failed) % 10 == 0 or done + failed == len(items):
+                print(f"   [{name}] {done + failed}/{len(items)} (失败 {failed})")
+    return done, failed
+
+def new_manifest(task: Dict) -> Dict:
+    """队列任务（build_queue_tasks）对应的空清单"""
+    payload = task['payload']
+    row_dict = payload['row']
+    url = row_dict[payload['url_column']]
+    idx = row_task_id(row_dict, payload['idx'])
+    return {
+        'key': ManifestStore.key_for(task['task_id']),
+        'url': url,
+        'idx': idx,
+        'row': row_dict,
+        'duplicates': payload['duplicates'],
+        'filename_txt': f"{row_filename_base(row_dict, idx)}.txt",
+        'direct_document': False,
+        'page_texts': [],
+        'documents': [],
+        'cookies': [],
+        'processing_info': {'url': url, 'method': 'unknown', 'documents_found': 0, 'pages_visited': 0,
+                            'ai_links_found': 0, 'success': False},
+        'timings': {},
+        'discovered_at': time.time(),
+    }
+
+def failed_manifest(task: Dict, error: Exception, elapsed: float) -> Dict:
+    """
+    discover 失败时的清单：没有待下载文档，提取结果直接记为错误，score/export 为该行输出失败记录。
+    下次运行 discover 会重新处理（discover_error）。
+    """
+    manifest = new_manifest(task)
+    error_text = f"{type(error).__name__}: {error}"
+    manifest['processing_info'].update({'method': 'failed', 'error': error_text})
+    manifest.update({
+        'discover_error': error_text,
+        'downloads': [],
+        'extraction': {
+            'text': f"[ERROR] 文档发现失败: {error_text}",
+            'pdf_docs_count': 0,
+            'processing_info': manifest['processing_info'],
+            'extracted_at': time.time(),
+        },
+    })
+    manifest['timings']['discover'] = round(elapsed, 2)
+    return manifest
+
+def discover_manifest(task: Dict, force_navigation: bool = False) -> Dict:
+    """
+    discover 阶段：对一个唯一URL渲染页面、发现并探测文档链接，返回文档清单。
+    直接文档链接不启动浏览器；extract 阶段发现该文档不可用时会标记 needs_navigation，下次 discover 改用导航。
+    已知站点先用站点适配器获取页面文本和文档列表；未启用智能导航时只分析首页（深度0）。
+    """
+    start = time.time()
+    manifest = new_manifest(task)
+    url, processing_info = manifest['url'], manifest['processing_info']
+    budget = TaskBudget.from_config()
+    session = new_download_session()
+    
+    with tracer.span('discover', url=url):
+        if not force_navigation and is_valid_pdf_url(url) and (
+                not Config.ENABLE_DOCUMENT_PROBE or
+                is_downloadable_probe(probe_documents([{'url': url}], session, budget)[0])):
+            manifest['direct_document'] = True
+            manifest['documents'] = [{'url': url, 'text': ''}]
+            processing_info.update({'method': 'direct_pdf', 'documents_found': 1})
+        else:
+            browser = LazyBrowser()
+            try:
+                adapter_result = fetch_with_site_adapter(url, session, budget)
+                if adapter_result is not None:
+                    page_texts, discovered_docs = adapter_result['page_texts'], adapter_result['documents']
+                    manifest['page_heading'] = adapter_result.get('heading', '')
+                    processing_info['site_adapter'] = adapter_result['adapter']
+                else:
+                    max_depth = Config.MAX_NAVIGATION_DEPTH if Config.ENABLE_SMART_NAVIGATION else 0
+                    page_headings = {}
+                    with stage_timer('navigation', url):
+                        page_texts, discovered_docs, _ = smart_navigate_and_extract(browser.get, url, max_depth, budget,
+                                                                                    page_headings)
+                    manifest['page_heading'] = page_headings.get(url, '')
+                manifest['page_texts'] = page_texts
+                manifest['cookies'] = browser.cookies()
+                apply_browser_cookies(session, manifest['cookies'])
+                sorted_docs = rank_discovered_documents(discovered_docs)
+                processing_info.update({
+                    'pages_visited': len(page_texts),
+                    'ai_links_found': len([d for d in discovered_docs if 'ai' in d.get('text', '').lower()]),
+                    'documents_found': len(sorted_docs)
+                })
+                manifest['documents'] = select_documents_to_download(sorted_docs, session, budget)
+            except BudgetExceeded as e:
+                logger.warning(f"⏱️ 文档发现因预算耗尽提前结束，保留部分结果: {e}")
+            finally:
+                browser.close()
+    
+    if budget.exhausted:
+        processing_info['budget_exhausted'] = budget.exhausted_reason
+    manifest['timings']['discover'] = round(time.time() - start, 2)
+    logger.info(f"🧭 发现 {len(manifest['documents'])} 个待下载文档、{len(manifest['page_texts'])} 个页面: {url}")
+    return manifest
+
+def run_discover_stage(shard: Optional[Tuple[int, int]] = None, force: bool = False,
+                       threads: Optional[int] = None) -> None:
+    """discover 阶段：为输入文件中每个还没有清单（或需要改用导航）的唯一URL生成文档清单"""
+    loaded = load_input_rows()
+    if loaded is None:
+        return
+    df, url_column = loaded
+    if shard:
+        df = select_shard(df, url_column, shard[0], shard[1])
+    
+    store = ManifestStore()
+    pending = []
+    for task in build_queue_tasks(df, url_column):
+        existing = None if force else store.get(ManifestStore.key_for(task['task_id']))
+        if existing is None or existing.get('needs_navigation') or existing.get('discover_error'):
+            pending.append((task, bool(existing and existing.get('needs_navigation'))))
+    print(f"🧭 discover: {len(pending)} 个URL需要发现文档（其余已有清单）")
+    
+    def discover(item):
+        task, force_navigation = item
+        start = time.time()
+        try:
+            manifest = discover_manifest(task, force_navigation)
+        except Exception as e:
+            store.put(failed_manifest(task, e, time.time() - start))  # 该行仍出现在结果表中（失败）
+            raise
+        store.put(manifest)
+    
+    run_stage_tasks('discover', pending, discover, threads or Config.MAX_THREADS, lambda item: item[0]['task_id'])
+
+def download_manifest(manifest: Dict) -> Dict:
+    """download 阶段：下载清单中的文档（download_document_smart 会跳过已存在的文件），记录文件名或错误"""
+    start = time.time()
+    session = new_download_session()
+    apply_browser_cookies(session, manifest.get('cookies', []))
+    budget = TaskBudget.from_config()
+    page_info = build_page_info(manifest['url'], manifest['idx'], manifest['row'], manifest.get('page_heading'))
+    
+    downloads = []
+    for i, doc in enumerate(manifest['documents']):
+        url_index = manifest['idx'] if manifest['direct_document'] else f"{manifest['idx']}_{i}"
+        try:
+            doc_path, error, _ = download_document_smart(doc['url'], session, Config.PDF_SAVE_DIR, url_index, page_info, budget)
+        except BudgetExceeded as e:
+            downloads.append({'url': doc['url'], 'file': None, 'error': f"预算耗尽: {e}"})
+            manifest['processing_info']['budget_exhausted'] = budget.exhausted_reason
+            break
+        except Exception as e:
+            doc_path, error = None, str(e)
+        downloads.append({'url': doc['url'], 'file': doc_path.name if doc_path else None, 'error': error})
+    
+    manifest['downloads'] = downloads
+    manifest.pop('extraction', None)  # 文件可能变化，提取结果需要重做
+    manifest['timings']['download'] = round(time.time() - start, 2)
+    return manifest
+
+def run_download_stage(shard: Optional[Tuple[int, int]] = None, force: bool = False,
+                       threads: Optional[int] = None) -> None:
+    """download 阶段：处理所有还没有下载记录的清单"""
+    store = ManifestStore()
+    # 只记下待处理清单的键，下载时再逐个读取；discover 失败的清单没有文档可下载
+    pending = [(m['key'], m['url']) for m in store.select(shard)
+               if not m.get('discover_error') and (force or 'downloads' not in m)]
+    print(f"📥 download: {len(pending)} 个清单待下载")
+    run_stage_tasks('download', pending, lambda item: store.put(download_manifest(store.get(item[0]))),
+                    threads or Config.MAX_THREADS, lambda item: item[1])
+
+def assemble_manifest_text(manifest: Dict, texts: Dict[Path, Tuple[str, float]]) -> Dict:
+    """extract 阶段：组合文档文本和页面文本（与 crawl 流程相同的规则），成功时保存文本"""
+    processing_info = dict(manifest['processing_info'])
+    successful_texts = []
+    extract_seconds = 0.0
+    for download in manifest.get('downloads', []):
+        if not download['file']:
+            continue
+        text, seconds = texts.get(Config.PDF_SAVE_DIR / download['file'], ("[ERROR] 文件不存在", 0.0))
+        extract_seconds += seconds
+        if not text.startswith("[ERROR]") and len(text.strip()) > 100:
+            successful_texts.append(text)
+        else:
+            logger.warning(f"⚠️ 文档内容提取问题 {download['file']}: {text[:100]}")
+    
+    if manifest['direct_document']:
+        extracted_text = direct_document_text(successful_texts[0], processing_info) if successful_texts else ""
+        if successful_texts:
+            processing_info.update({'method': 'direct_pdf', 'success': True})
+    else:
+        extracted_text = combine_content_blocks(successful_texts, manifest['page_texts'], processing_info)
+    final_text = finalize_extracted_text(extracted_text, manifest['url'], processing_info)
+    
+    succeeded = not final_text.startswith(("[ERROR]", "[WARNING]"))
+    if succeeded:
+        save_row_text(manifest['filename_txt'], final_text, manifest['url'], manifest['row'])
+    if manifest['direct_document'] and not succeeded:
+        manifest['needs_navigation'] = True  # 直接文档不可用：下次 discover 改用智能导航
+    
+    manifest['extraction'] = {
+        'text': None if succeeded else final_text,  # 成功的文本已由 save_row_text 保存
+        'pdf_docs_count': len(successful_texts),
+        'processing_info': processing_info,
+        'extracted_at': time.time(),
+    }
+    manifest['timings']['extract'] = round(extract_seconds, 2)
+    return manifest
+
+def open_extraction_pool(processes: int) -> Optional[ProcessPoolExecutor]:
+    """创建文档提取进程池并交给内存看门狗监控（processes <= 0 时返回None，在本进程内提取）"""
+    if processes <= 0:
+        return None
+    executor = ProcessPoolExecutor(max_workers=processes, initializer=_extraction_worker_init)
+    memory_watchdog.track_pool(executor, 'extract_worker')
+    return executor
+
+def close_extraction_pool(executor: Optional[ProcessPoolExecutor]) -> None:
+    if executor is not None:
+        memory_watchdog.untrack_pool(executor)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def refresh_extraction_pool(executor: Optional[ProcessPoolExecutor], processes: int) -> Optional[ProcessPoolExecutor]:
+    """批次之间调用：进程池中有进程内存超限时关闭并重建（批次内的任务已全部完成，不会丢失）"""
+    if executor is None or not memory_watchdog.should_recycle(executor):
+        return executor
+    memory_watchdog.count_recycle('extract_pool')
+    close_extraction_pool(executor)
+    return open_extraction_pool(processes)
+
+def run_extract_stage(shard: Optional[Tuple[int, int]] = None, force: bool = False,
+                      processes: Optional[int] = None) -> None:
+    """extract 阶段：按批次提取已下载文档的文本（进程池并行，命中提取缓存的文档不再提取）"""
+    store = ManifestStore()
+    pending = [m['key'] for m in store.select(shard)
+               if 'downloads' in m and not m.get('discover_error') and (force or 'extraction' not in m)]
+    processes = Config.EXTRACT_PROCESSES if processes is None else processes
+    print(f"📝 extract: {len(pending)} 个清单待提取，{processes} 个提取进程")
+    
+    executor = open_extraction_pool(processes)
+    batch_size = max(8, processes * 8)  # 每批处理完立即保存，内存中只保留一批文本
+    try:
+        for start in range(0, len(pending), batch_size):
+            executor = refresh_extraction_pool(executor, processes)
+            batch = [store.get(key) for key in pending[start:start + batch_size]]
+            paths = [Config.PDF_SAVE_DIR / d['file'] for m in batch for d in m['downloads']
+                     if d['file'] and (Config.PDF_SAVE_DIR / d['file']).exists()]
+            with stage_timer('extraction', method='batch'):
+                texts = extract_documents_parallel(paths, executor)
+            for manifest in batch:
+                try:
+                    store.put(assemble_manifest_text(manifest, texts))
+                except Exception as e:
+                    logger.error(f"❌ [extract] {manifest['url']} 失败: {e}", exc_info=True)
+            print(f"   [extract] {min(start + batch_size, len(pending))}/{len(pending)}")
+    finally:
+        close_extraction_pool(executor)
+
+def stage_results_path(shard: Optional[Tuple[int, int]] = None) -> Path:
+    return shard_output_path(Config.STAGE_DIR / "results.jsonl", shard)
+
+def run_score_stage(shard: Optional[Tuple[int, int]] = None) -> int:
+    """score 阶段：只读取提取好的文本，计算AI相关性并生成结果记录（包括重复行），写入 results.jsonl"""
+    store = ManifestStore()
+    written = 0
+    skipped = 0
+    path = stage_results_path(shard)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.jsonl.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for manifest in store.select(shard):
+            extraction = manifest.get('extraction')
+            if not extraction:
+                skipped += 1
+                continue
+            text = extraction['text']
+            if text is None:
+                try:
+                    text = load_row_text(manifest['filename_txt'])
+                except OSError as e:
+                    text = f"[ERROR] 文本读取失败: {e}"
+                if text is None:
+                    text = f"[ERROR] 文本不存在: {manifest['filename_txt']}"
+            record = build_result_record(manifest['row'], manifest['url'], manifest['filename_txt'], text,
+                                         extraction['pdf_docs_count'], extraction['processing_info'],
+                                         sum(manifest['timings'].values()), save_text=False)
+            for item in [record] + fan_out_result(record, manifest['duplicates']):
+                f.write(json.dumps(item, ensure_ascii=False, default=_json_default) + '\n')
+                written += 1
+    os.replace(tmp_path, path)
+    print(f"🤖 score: {written} 条结果记录已写入 {path}" + (f"（{skipped} 个清单尚未提取）" if skipped else ""))
+    return written
+
+def run_export_stage(shard: Optional[Tuple[int, int]] = None, output: Optional[Path] = None) -> None:
+    """export 阶段：把 score 阶段的结果记录导出为结果表（Parquet/CSV，见 Config.RESULTS_FORMATS）"""
+    path = stage_results_path(shard)
+    if not path.exists():
+        print(f"⚠️ 没有结果记录，请先运行 score: {path}")
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    output = Path(output or shard_output_path(Config.CSV_OUTPUT, shard))
+    save_processing_results(records, output)
+    print(f"💾 {len(records)} 条结果已导出到: {output}")
+
+def scan_downloaded_documents() -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+    """
+    扫描 PDF_SAVE_DIR 中已下载的文档，返回 (规范来源URL -> 文档列表, 编号 -> 文档列表)。
+    有 JSON 元数据文件的文档按其中的 page_info.source_url 关联输入行；
+    没有元数据的按文件名前缀（download_document_smart 写入的 <编号>_ 或 <编号>_<序号>_）关联。
+    文档条目: {'file': 路径, 'url': 文档URL, 'direct': 文档URL是否就是来源URL}
+    """
+    by_source: Dict[str, List[Dict]] = {}
+    by_index: Dict[str, List[Dict]] = {}
+    for path in sorted(Config.PDF_SAVE_DIR.iterdir()):
+        if not path.is_file() or path.suffix.lower() not in DOCUMENT_EXTENSIONS + ['.html', '.htm', '.xml']:
+            continue
+        sidecar = path.with_suffix('.json')
+        metadata = {}
+        if sidecar.exists():
+            try:
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ 元数据文件无法读取 {sidecar.name}: {e}")
+        source_url = (metadata.get('page_info') or {}).get('source_url')
+        doc_url = metadata.get('url', '')
+        doc = {'file': path, 'url': doc_url,
+               'direct': bool(source_url) and canonicalize_url(doc_url) == canonicalize_url(source_url)}
+        if source_url:
+            by_source.setdefault(canonicalize_url(source_url), []).append(doc)
+        else:
+            by_index.setdefault(path.name.split('_', 1)[0], []).append(doc)
+    return by_source, by_index
+
+def run_reextract(shard: Optional[Tuple[int, int]] = None, output: Optional[Path] = None,
+                  processes: Optional[int] = None) -> None:
+    """
+    离线重新提取：不访问网络，用 PDF_SAVE_DIR 中已下载的文档（通过JSON元数据关联回输入行）
+    重新生成每行的文本和结果表。文档用进程池并行提取，未变化的文档直接命中提取缓存。
+    如果 discover 阶段为该URL保存过清单，清单中的页面文本也会并入（与 crawl 的组合规则相同）。
+    结果默认写入 <CSV_OUTPUT>.reextracted.csv，不覆盖抓取时的结果表。
+    """
+    loaded = load_input_rows()
+    if loaded is None:
+        return
+    df, url_column = loaded
+    if shard:
+        df = select_shard(df, url_column, shard[0], shard[1])
+    df_unique, duplicate_rows = split_duplicate_rows(df, url_column)
+    
+    by_source, by_index = scan_downloaded_documents()
+    store = ManifestStore()
+    rows = []
+    for idx, row in df_unique.iterrows():
+        row_dict = row.to_dict()
+        docs = by_source.get(row_dict['规范URL']) or by_index.get(str(row_task_id(row_dict, idx)), [])
+        manifest = store.get(ManifestStore.key_for(row_dict['规范URL']))
+        rows.append((idx, row_dict, docs, manifest['page_texts'] if manifest else []))
+    with_docs = sum(1 for row in rows if row[2])
+    print(f"♻️ reextract: {len(rows)} 个唯一URL，其中 {with_docs} 个有本地文档（共 {sum(len(row[2]) for row in rows)} 个文件）")
+    
+    processes = Config.EXTRACT_PROCESSES if processes is None else processes
+    executor = open_extraction_pool(processes)
+    batch_size = max(8, processes * 8)
+    records = []
+    try:
+        for start in range(0, len(rows), batch_size):
+            executor = refresh_extraction_pool(executor, processes)
+            batch = rows[start:start + batch_size]
+            texts = extract_documents_parallel([doc['file'] for _, _, docs, _ in batch for doc in docs], executor)
+            for idx, row_dict, docs, page_texts in batch:
+                url = row_dict[url_column]
+                processing_info = {'url': url, 'method': 'unknown', 'documents_found': len(docs),
+                                   'pages_visited': len(page_texts), 'ai_links_found': 0, 'success': False}
+                doc_texts = [texts[doc['file']][0] for doc in docs]
+                successful_texts = [t for t in doc_texts if not t.startswith("[ERROR]") and len(t.strip()) > 100]
+                
+                if docs and all(doc['direct'] for doc in docs) and not page_texts:
+                    extracted_text = direct_document_text(successful_texts[0], processing_info) if successful_texts else ""
+                    if successful_texts:
+                        processing_info.update({'method': 'direct_pdf', 'success': True})
+                else:
+                    extracted_text = combine_content_blocks(successful_texts, page_texts, processing_info)
+                if not docs and not page_texts:
+                    extracted_text = "[ERROR] 本地没有该行的已下载文档或页面文本"
+                final_text = finalize_extracted_text(extracted_text, url, processing_info)
+                
+                record = build_result_record(row_dict, url, f"{row_filename_base(row_dict, row_dict.get('编号', idx))}.txt",
+                                             final_text, len(successful_texts), processing_info,
+                                             sum(texts[doc['file']][1] for doc in docs))
+                records.append(record)
+                records.extend(fan_out_result(record, duplicate_rows.get(row_dict['规范URL'], [])))
+            print(f"   [reextract] {min(start + batch_size, len(rows))}/{len(rows)}")
+    finally:
+        close_extraction_pool(executor)
+    
+    csv_output = shard_output_path(Config.CSV_OUTPUT, shard)
+    output = Path(output or csv_output.with_name(f"{csv_output.stem}.reextracted{csv_output.suffix}"))
+    save_processing_results(records, output)
+    succeeded = sum(1 for r in records if str(r['处理状态']).startswith('成功'))
+    print(f"💾 {len(records)} 条结果（成功 {succeeded}）已写入: {output}")
+
+# --- 命令行 (Command Line) ---
+def queue_init(queue_path: Optional[Path] = None, shard: Optional[Tuple[int, int]] = None) -> None:
+    """读取输入文件，把每个唯一URL作为一个任务加入工作队列"""
+    loaded = load_input_rows()
+    if loaded is None:
+        return
+    df, url_column = loaded
+    if shard:
+        df = select_shard(df, url_column, shard[0], shard[1])
+    
+    queue = open_work_queue(queue_path)
+    added = queue.enqueue(build_queue_tasks(df, url_column))
+    print(f"📥 新增 {added} 个任务到队列: {queue_path or Config.QUEUE_PATH}")
+    print(f"📊 队列状态: {queue.stats()}")
+
+def queue_status(queue_path: Optional[Path] = None) -> None:
+    """打印队列中各状态的任务数量"""
+    stats = open_work_queue(queue_path).stats()
+    total = sum(stats.values())
+    print(f"📊 队列: {queue_path or Config.QUEUE_PATH}")
+    for status, count in stats.items():
+        print(f"   {status:<8} {count:>8}  ({count / total * 100 if total else 0:.1f}%)")
+
+def queue_export(queue_path: Optional[Path] = None, output: Optional[Path] = None) -> None:
+    """把队列结果日志导出为结果表（Parquet/CSV，见 Config.RESULTS_FORMATS）"""
+    results = list(open_work_queue(queue_path).iter_results())
+    if not results:
+        print("⚠️ 结果日志为空")
+        return
+    output = Path(output or Config.CSV_OUTPUT)
+    save_processing_results(results, output)
+    print(f"💾 {len(results)} 条结果已导出到: {output}")
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """解析 'i/N' 形式的分片参数"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("分片格式应为 i/N，例如 0/4")
+    if count <= 0 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"无效的分片: {value}")
+    return index, count
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数：不带子命令时等同于 crawl"""
+    parser = argparse.ArgumentParser(description="增强版OECD.ai文档抓取工具")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    crawl = subparsers.add_parser("crawl", help="在本机完整运行抓取流程（默认）")
+    crawl.add_argument("--shard", type=parse_shard, help="只处理第 i 个分片（共 N 个），格式 i/N")
+    crawl.add_argument("--processes", type=int, help="工作进程数（每个进程一个浏览器），覆盖 Config.WORKER_PROCESSES")
+    crawl.add_argument("--metrics-port", type=int, help="在该端口提供 Prometheus /metrics 端点")
+    crawl.add_argument("--profile", choices=["sample", "cprofile"], help="启用性能剖析，结果写入 Config.PROFILE_OUTPUT_DIR")
+    crawl.add_argument("--profile-fraction", type=float, help="剖析的URL任务比例（1.0 表示整个运行）")
+    
+    init = subparsers.add_parser("queue-init", help="将输入文件中的URL加入共享工作队列")
+    init.add_argument("--queue", type=Path, help="队列文件路径（默认 Config.QUEUE_PATH）")
+    init.add_argument("--shard", type=parse_shard, help="只入队第 i 个分片，格式 i/N")
+    
+    worker = subparsers.add_parser("worker", help="从共享工作队列租用并处理任务（可在多台机器上运行）")
+    worker.add_argument("--queue", type=Path, help="队列文件路径（默认 Config.QUEUE_PATH）")
+    worker.add_argument("--worker-id", help="工作进程标识（默认 主机名-进程号）")
+    worker.add_argument("--threads", type=int, help="并发线程数（默认 Config.MAX_THREADS）")
+    worker.add_argument("--metrics-port", type=int, help="在该端口提供 Prometheus /metrics 端点")
+    worker.add_argument("--profile", choices=["sample", "cprofile"], help="启用性能剖析，结果写入 Config.PROFILE_OUTPUT_DIR")
+    worker.add_argument("--profile-fraction", type=float, help="剖析的URL任务比例（1.0 表示整个运行）")
+    
+    status = subparsers.add_parser("queue-status", help="查看队列进度")
+    status.add_argument("--queue", type=Path, help="队列文件路径")
+    
+    export = subparsers.add_parser("queue-export", help="将队列结果日志导出为CSV")
+    export.add_argument("--queue", type=Path, help="队列文件路径")
+    export.add_argument("--output", type=Path, help="结果输出路径（默认 Config.CSV_OUTPUT；以 .parquet 结尾时只写Parquet）")
+    
+    # 分阶段流水线：各阶段只读取上一阶段持久化在 Config.STAGE_DIR 中的状态
+    discover = subparsers.add_parser("discover", help="阶段1：渲染页面并生成文档清单（不下载）")
+    download = subparsers.add_parser("download", help="阶段2：按文档清单下载文档")
+    extract = subparsers.add_parser("extract", help="阶段3：从本地文档提取文本（进程池 + 提取缓存）")
+    score = subparsers.add_parser("score", help="阶段4：根据提取的文本计算AI相关性，生成结果记录")
+    stage_export = subparsers.add_parser("export", help="阶段5：把结果记录导出为CSV")
+    for stage in (discover, download, extract, score, stage_export):
+        stage.add_argument("--shard", type=parse_shard, help="只处理第 i 个分片，格式 i/N")
+    for stage in (discover, download, extract):
+        stage.add_argument("--force", action="store_true", help="重做本阶段（忽略已完成的进度）")
+    for stage in (discover, download):
+        stage.add_argument("--threads", type=int, help="并发线程数（默认 Config.MAX_THREADS）")
+    extract.add_argument("--processes", type=int, help="提取进程数（默认 Config.EXTRACT_PROCESSES）")
+    stage_export.add_argument("--output", type=Path, help="结果输出路径（默认 Config.CSV_OUTPUT；以 .parquet 结尾时只写Parquet）")
+    
+    reextract = subparsers.add_parser("reextract", help="离线：用已下载的文档和JSON元数据重新生成文本和结果表")
+    reextract.add_argument("--shard", type=parse_shard, help="只处理第 i 个分片，格式 i/N")
+    reextract.add_argument("--processes", type=int, help="提取进程数（默认 Config.EXTRACT_PROCESSES）")
+    reextract.add_argument("--output", type=Path, help="结果输出路径（默认 <CSV_OUTPUT>.reextracted.csv；以 .parquet 结尾时只写Parquet）")
+    
+    search = subparsers.add_parser("search", help="在全文检索索引中搜索提取的文本")
+    search.add_argument("query", nargs="?", help="FTS5 查询，例如 'facial recognition'、'\"AI act\" NOT draft'、'regulat*'")
+    search.add_argument("--limit", type=int, default=20, help="最多返回的结果数")
+    search.add_argument("--country", help="只返回该国家的结果")
+    search.add_argument("--rebuild", action="store_true", help="先按输入文件为已保存的文本补建索引")
+    
+    duplicates = subparsers.add_parser("duplicates", help="近似重复文档统计（去重后的文档数和最大的重复聚类）")
+    duplicates.add_argument("--top", type=int, default=10, help="显示的聚类数")
+    
+    texts = subparsers.add_parser("texts", help="管理压缩分片文本存储（Config.TEXT_STORE_DIR）")
+    texts.add_argument("action", choices=["stats", "get", "export", "import", "compact"],
+                       help="stats 统计；get 读取一条；export 写回 .txt 文件；import 导入已有的 .txt 文件；compact 回收死数据")
+    texts.add_argument("key", nargs="?", help="get 的键（文本文件名，例如 France-123.txt）")
+    texts.add_argument("--dir", type=Path, help="export/import 的目录（默认 Config.SAVE_DIR）")
+    return parser
+
+def cli(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    args = build_arg_parser().parse_args(argv)
+    command = args.command or "crawl"
+    if getattr(args, 'metrics_port', None):
+        Config.METRICS_PORT = args.metrics_port
+    if getattr(args, 'profile', None):
+        Config.PROFILE_MODE = args.profile
+    if getattr(args, 'profile_fraction', None) is not None:
+        Config.PROFILE_TASK_FRACTION = args.profile_fraction
+    
+    # crawl 和 worker 自己设置追踪文件；离线阶段命令的span写入同一个（按分片区分的）追踪文件
+    traced = command in ("discover", "download", "extract", "reextract") or (command == "search" and args.rebuild)
+    if traced:
+        tracer.output_path = shard_output_path(Config.TRACE_OUTPUT_PATH, getattr(args, 'shard', None))
+    try:
+        if command == "crawl":
+            if getattr(args, 'processes', None) is not None:
+                Config.WORKER_PROCESSES = args.processes
+            main(shard=getattr(args, 'shard', None))
+        elif command == "queue-init":
+            queue_init(args.queue, args.shard)
+        elif command == "worker":
+            if not ensure_output_dirs():
+                return
+            if Config.METRICS_PORT:
+                start_metrics_server(Config.METRICS_PORT)
+            try:
+                run_queue_worker(args.queue, args.worker_id, args.threads)
+            finally:
+                shutdown_process_pool()
+        elif command == "queue-status":
+            queue_status(args.queue)
+        elif command == "queue-export":
+            queue_export(args.queue, args.output)
+        elif command in ("discover", "download", "extract"):
+            if not ensure_output_dirs():
+                return
+            memory_watchdog.start()
+            try:
+                if command == "discover":
+                    run_discover_stage(args.shard, args.force, args.threads)
+                elif command == "download":
+                    run_download_stage(args.shard, args.force, args.threads)
+                else:
+                    run_extract_stage(args.shard, args.force, args.processes)
+            finally:
+                memory_watchdog.stop()
+                shutdown_process_pool()
+        elif command == "reextract":
+            if not ensure_output_dirs():
+                return
+            memory_watchdog.start()
+            try:
+                run_reextract(args.shard, args.output, args.processes)
+            finally:
+                memory_watchdog.stop()
+        elif command == "score":
+            run_score_stage(args.shard)
+        elif command == "export":
+            run_export_stage(args.shard, args.output)
+        elif command == "search":
+            run_search_command(args.query, args.limit, args.country, args.rebuild)
+        elif command == "duplicates":
+            run_duplicates_command(args.top)
+        elif command == "texts":
+            if args.action == "get" and not args.key:
+                print("❌ get 需要指定键")
+                return
+            run_text_store_command(args.action, args.key, args.dir)
+    finally:
+        if traced:
+            save_traces()
+
+def run_cli(argv: Optional[List[str]] = None) -> None:
+    """脚本入口（本文件和站点配置脚本共用）：记录中断和未捕获的异常"""
     try:
         # 确保主程序异常也能被捕获并记录
-        main()
+        cli(argv)
     except KeyboardInterrupt:
         print("\n🛑 用户中断程序")
         logger.info("🛑 用户中断程序")
     except Exception as e:
         print(f"\n💥 程序异常退出: {e}")
-        logger.error(f"💥 程序异常退出: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"💥 程序异常退出: {e}", exc_info=True)
+
+if __name__ == "__main__":
+    run_cli()